@@ -0,0 +1,152 @@
+import json
+import math
+from typing import (
+    Callable,
+    Dict,
+    List
+)
+
+import numpy as np
+from scipy import stats
+
+from gumeter.metrics import (
+    get_cost,
+    get_execution_time,
+    measure_elasticity
+)
+
+
+DEFAULT_MIN_REPLICAS = 3
+DEFAULT_MAX_REPLICAS = 20
+DEFAULT_CONFIDENCE = 0.95
+
+STOP_REASONS = {
+    "target": "CI target met",
+    "budget": "budget exhausted",
+    "max_replicas": "replica cap reached",
+    "fixed": "fixed replica count",
+    None: "not stopped"
+}
+
+METRICS: Dict[str, Callable[[dict], float]] = {
+    "time": get_execution_time,
+    "cost": lambda data: get_cost(data, data.get("backend")),
+    "elasticity": measure_elasticity
+}
+
+
+def confidence_interval(
+    values: List[float],
+    confidence: float = DEFAULT_CONFIDENCE
+) -> tuple:
+    # Student's t interval on the mean, replicas being few and independent
+    values = np.asarray(values, dtype=float)
+    mean = float(np.mean(values)) if len(values) else math.nan
+    if len(values) < 2:
+        return mean, math.inf
+    sem = float(np.std(values, ddof=1)) / math.sqrt(len(values))
+    half_width = stats.t.ppf((1 + confidence) / 2, len(values) - 1) * sem
+    return mean, float(half_width)
+
+
+def load_result(result_file: str) -> dict:
+    with open(result_file, "r") as f:
+        return json.load(f)
+
+
+class StoppingRule:
+
+    def __init__(
+        self,
+        target_rel_ci: float = None,
+        metric: str = "time",
+        confidence: float = DEFAULT_CONFIDENCE,
+        min_replicas: int = DEFAULT_MIN_REPLICAS,
+        max_replicas: int = DEFAULT_MAX_REPLICAS,
+        budget: float = None
+    ):
+        # The CI half-width relative to the mean must fall below
+        # target_rel_ci; budget caps the summed cost (USD) of the replicas.
+        # Without a target the rule only reports the achieved CI.
+        if metric not in METRICS:
+            raise ValueError(
+                f"Unknown metric '{metric}'. Valid metrics are: "
+                f"{list(METRICS)}."
+            )
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be between 0 and 1.")
+        if min_replicas < 2 or max_replicas < min_replicas:
+            raise ValueError(
+                "Adaptive replicas need 2 <= min_replicas <= max_replicas."
+            )
+        self.target_rel_ci = target_rel_ci
+        self.metric = metric
+        self.confidence = confidence
+        self.min_replicas = min_replicas
+        self.max_replicas = max_replicas
+        self.budget = budget
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "StoppingRule":
+        # Plan syntax, e.g. {min: 3, max: 30, target_rel_ci: 0.05,
+        # metric: cost, confidence: 0.95, budget: 10}
+        return cls(
+            target_rel_ci=config.get("target_rel_ci"),
+            metric=config.get("metric", "time"),
+            confidence=config.get("confidence", DEFAULT_CONFIDENCE),
+            min_replicas=config.get("min", DEFAULT_MIN_REPLICAS),
+            max_replicas=config.get("max", DEFAULT_MAX_REPLICAS),
+            budget=config.get("budget")
+        )
+
+    def evaluate(
+        self,
+        results: List[dict],
+        attempts: int = None
+    ) -> dict:
+        # attempts counts failed replicas too, so a configuration that keeps
+        # failing cannot run forever
+        attempts = len(results) if attempts is None else attempts
+        values = [METRICS[self.metric](data) for data in results]
+        spent = sum(METRICS["cost"](data) for data in results)
+        mean, half_width = confidence_interval(values, self.confidence)
+        rel_ci = half_width / abs(mean) if mean else math.inf
+
+        if (
+            self.target_rel_ci is not None
+            and len(values) >= self.min_replicas
+            and rel_ci <= self.target_rel_ci
+        ):
+            stop_reason = "target"
+        elif self.budget is not None and spent >= self.budget:
+            stop_reason = "budget"
+        elif attempts >= self.max_replicas:
+            stop_reason = "max_replicas"
+        else:
+            stop_reason = None
+
+        return {
+            "metric": self.metric,
+            "replicas": len(values),
+            "attempts": attempts,
+            "mean": mean,
+            "ci_low": mean - half_width,
+            "ci_high": mean + half_width,
+            "rel_ci": rel_ci,
+            "target_rel_ci": self.target_rel_ci,
+            "confidence": self.confidence,
+            "cost": spent,
+            "stop_reason": stop_reason
+        }
+
+
+def format_report(label: str, report: dict) -> str:
+    target = report["target_rel_ci"]
+    target = f", target ±{target:.1%}" if target is not None else ""
+    return (
+        f"{label}: {report['replicas']} replicas, {report['metric']} "
+        f"{report['mean']:.4g} [{report['ci_low']:.4g}, "
+        f"{report['ci_high']:.4g}] at {report['confidence']:.0%} "
+        f"(±{report['rel_ci']:.1%}{target}), "
+        f"{STOP_REASONS[report['stop_reason']]}"
+    )
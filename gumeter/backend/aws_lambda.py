@@ -13,10 +13,6 @@ AWS_LITHOPS_EQUIVALENCES = {
     "aws_secret_access_key": "secret_access_key",
     "aws_session_token": "session_token"
 }
-AWS_LAMBDA_COST_MB = 0.00001667 / 1024
-AWS_LAMBDA_REQ_COST = 0.2 / 10 ** 6
-AWS_S3_PUT_COST = 0.005 / 1000
-AWS_S3_GET_COST = 0.0004 / 1000
 
 
 def set_lithops_config_aws(
@@ -0,0 +1,342 @@
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Tuple
+)
+
+from lithops import FunctionExecutor
+
+from gumeter.backend.code_engine import get_docker_username_from_config
+from gumeter.benchmarks.monitor import (
+    RunMonitor,
+    monitoring,
+    watch_stage
+)
+from gumeter.benchmarks.phases import (
+    unwrap_failed,
+    unwrap_phases,
+    with_phases
+)
+from gumeter.benchmarks.retries import (
+    FAILURES_KEY,
+    RETRIES_KEY,
+    RetryPolicy,
+    parse_retries,
+    new_failures,
+    stage_retries
+)
+from gumeter.benchmarks.sampler import check_sample_interval
+from gumeter.benchmarks.speculation import (
+    BACKUPS_KEY,
+    SPECULATION_KEY,
+    Speculator,
+    parse_speculation,
+    settle_backups
+)
+from gumeter.config import (
+    BACKEND_MEMORY,
+    BACKEND_STORAGE,
+    DOCKER_BACKENDS,
+    INPUT_BUCKET,
+    RUNTIME_NAMES,
+    TAGS,
+    Backend
+)
+
+
+def get_runtime(backend: str) -> str:
+    runtime = RUNTIME_NAMES.get(backend)
+    tag = TAGS.get(backend)
+    runtime = f"{runtime}:{tag}"
+    if backend in DOCKER_BACKENDS:
+        docker_username = get_docker_username_from_config()
+        runtime = f"{docker_username}/{runtime}"
+    return runtime
+
+
+class Param:
+
+    def __init__(
+        self,
+        type: type,
+        default: Any = None,
+        help: str = "",
+        choices: list = None,
+        many: bool = False
+    ):
+        self.type = type
+        self.default = default
+        self.help = help
+        self.choices = choices
+        # Parameters taking a list also accept a single value
+        self.many = many
+
+    def _parse_one(self, name: str, value: Any):
+        if value is None:
+            return None
+        try:
+            value = self.type(value)
+        except (TypeError, ValueError):
+            raise ValueError(
+                f"Parameter '{name}' expects {self.type.__name__}, "
+                f"got {value!r}."
+            )
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(
+                f"Parameter '{name}' must be one of {self.choices}, "
+                f"got {value!r}."
+            )
+        return value
+
+    def parse(self, name: str, value: Any):
+        if self.many:
+            if not isinstance(value, (list, tuple)):
+                value = [value]
+            return [self._parse_one(name, v) for v in value]
+        return self._parse_one(name, value)
+
+
+class BenchmarkContext:
+
+    def __init__(
+        self,
+        backend: str,
+        storage: str = None,
+        params: Dict[str, Any] = None,
+        runtime_memory: int = None,
+        log_level: str = "INFO",
+        sample_interval: float = None,
+        monitor: RunMonitor = None,
+        retries: RetryPolicy = None,
+        speculation: float = None
+    ):
+        self.backend = backend
+        self.storage = storage or BACKEND_STORAGE[backend]
+        self.params = params or {}
+        self.runtime = get_runtime(backend)
+        self.runtime_memory = runtime_memory or BACKEND_MEMORY.get(backend)
+        self.bucket = INPUT_BUCKET.get(backend)
+        self.log_level = log_level
+        # Seconds between resource samples in every worker, None disables
+        # sampling
+        check_sample_interval(sample_interval)
+        self.sample_interval = sample_interval
+        # Reports the progress of every stage while the benchmark runs
+        self.monitor = monitor
+        # Times a failed call is resubmitted, for every stage or per stage
+        self.retries = parse_retries(retries)
+        # Percentile of task durations past which a running task gets a
+        # backup copy, None disables speculation
+        self.speculation = parse_speculation(speculation)
+
+    def executor(
+        self,
+        backend: str = None,
+        storage: str = None
+    ) -> FunctionExecutor:
+        return FunctionExecutor(
+            backend=backend or self.backend,
+            storage=storage or self.storage,
+            runtime_memory=self.runtime_memory,
+            log_level=self.log_level,
+            runtime=self.runtime
+        )
+
+
+class Benchmark:
+    name: str = None
+    description: str = ""
+    params: Dict[str, Param] = {}
+    # Sweeps set the worker count through workers_param and the problem
+    # size through size_param, which holds the work of a single worker
+    workers_param: str = None
+    size_param: str = None
+    size_unit: str = ""
+
+    def supports_backend(self, backend: str) -> bool:
+        # The Redis backend only serves TeraSort's shuffle
+        return backend != Backend.AWS_LAMBDA_REDIS.value
+
+    def resolve_params(self, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        params = dict(params or {})
+        unknown = set(params) - set(self.params)
+        if unknown:
+            raise ValueError(
+                f"Unknown parameters for benchmark '{self.name}': "
+                f"{sorted(unknown)}. Valid parameters are: "
+                f"{sorted(self.params)}."
+            )
+        return {
+            name: param.parse(name, params.get(name, param.default))
+            for name, param in self.params.items()
+        }
+
+    def scaling_params(
+        self,
+        workers: int,
+        size: float = None
+    ) -> Dict[str, Any]:
+        # size is the total problem size, split evenly among the workers
+        if self.workers_param is None:
+            raise ValueError(
+                f"Benchmark '{self.name}' does not support sweeps."
+            )
+        params = {self.workers_param: workers}
+        if size is not None:
+            if self.size_param is None:
+                raise ValueError(
+                    f"Benchmark '{self.name}' has a fixed problem size."
+                )
+            params[self.size_param] = max(round(size / workers), 1)
+        return params
+
+    def workers(self, params: Dict[str, Any]) -> int:
+        if self.workers_param is None:
+            return None
+        return params.get(self.workers_param)
+
+    def problem_size(self, params: Dict[str, Any]) -> float:
+        workers = self.workers(params)
+        if self.size_param is None or workers is None:
+            return None
+        return workers * params[self.size_param]
+
+    def setup(self, ctx: BenchmarkContext):
+        pass
+
+    def run_stages(self, ctx: BenchmarkContext, results: dict):
+        raise NotImplementedError
+
+    def teardown(self, ctx: BenchmarkContext):
+        pass
+
+    def run(self, ctx: BenchmarkContext) -> dict:
+        results = {
+            "benchmark": self.name,
+            "backend": ctx.backend,
+            "runtime_memory": ctx.runtime_memory,
+            "params": ctx.params
+        }
+        # run_stage finds the sample interval with the results it fills
+        if ctx.sample_interval:
+            results["sample_interval"] = ctx.sample_interval
+        if ctx.retries:
+            results[RETRIES_KEY] = ctx.retries
+        if ctx.speculation:
+            results[SPECULATION_KEY] = ctx.speculation
+        try:
+            self.setup(ctx)
+            with monitoring(ctx.monitor):
+                results["start_time"] = time.time()
+                if ctx.monitor is not None:
+                    ctx.monitor.start()
+                self.run_stages(ctx, results)
+                results["end_time"] = time.time()
+        finally:
+            # Backups still running would write after the teardown
+            settle_backups()
+            self.teardown(ctx)
+        return results
+
+
+def map_with_retries(
+    executor: FunctionExecutor,
+    func: Callable,
+    iterdata: List[Any],
+    name: str,
+    retries: int = 0,
+    sample_interval: float = None,
+    speculator: Speculator = None
+) -> Tuple[list, list, dict]:
+    # Resubmits the calls that fail, up to retries times each. Returns the
+    # last attempt of every call with its value (None if it failed) and the
+    # failure record of the map, which keeps the stats of failed attempts
+    # since they were billed and ran on the platform too, with the storage
+    # requests they made. A speculator
+    # backs up the slow calls of the first attempt and picks the attempt
+    # kept for every call; retries are not speculated.
+    wrapped = with_phases(func, sample_interval)
+    futures = list(executor.map(wrapped, iterdata))
+    failures = new_failures(len(futures))
+    if speculator is not None:
+        speculator.start(executor, wrapped, iterdata, futures)
+        watch_stage(executor, futures, name, speculator)
+        futures = speculator.winners()
+        failures["failed"] += speculator.failed_attempts()
+    else:
+        watch_stage(executor, futures, name)
+    values = executor.get_result(futures, throw_except=False)
+    unwrap_failed(futures)
+    pending = [i for i, future in enumerate(futures) if future.error]
+    for attempt in range(1, retries + 1):
+        if not pending:
+            break
+        failures["failed"] += [futures[i].stats for i in pending]
+        failures["retried"] += len(pending)
+        retry_futures = executor.map(wrapped, [iterdata[i] for i in pending])
+        watch_stage(executor, retry_futures, f"{name} retry {attempt}")
+        retry_values = executor.get_result(retry_futures, throw_except=False)
+        unwrap_failed(retry_futures)
+        for i, future, value in zip(pending, retry_futures, retry_values):
+            futures[i] = future
+            values[i] = value
+        pending = [i for i in pending if futures[i].error]
+    failures["failed"] += [futures[i].stats for i in pending]
+    failures["failed_attempts"] = len(failures["failed"])
+    failures["lost"] = len(pending)
+    if failures["failed_attempts"]:
+        print(
+            f"\033[93m{name}: {failures['failed_attempts']} failed "
+            f"attempts, {failures['retried']} retried, "
+            f"{failures['lost']} lost\033[0m"
+        )
+    return futures, unwrap_phases(futures, values), failures
+
+
+def run_stage(
+    executor: FunctionExecutor,
+    results: dict,
+    stage: int,
+    func: Callable,
+    iterdata: List[Any],
+    fetch_results: bool = True,
+    retries: int = None
+):
+    # The retry count defaults to the run's policy for this stage. A call
+    # still failing after its retries fails the stage, as later stages
+    # need every output. With speculation on, a backup writes the same
+    # storage keys as the call it copies, so every speculated call must
+    # write the same bytes on every attempt: the Monte Carlo maps draw
+    # from a seed derived from their input for that reason.
+    if retries is None:
+        retries = stage_retries(results.get(RETRIES_KEY), stage)
+    speculator = None
+    if results.get(SPECULATION_KEY):
+        speculator = Speculator(results[SPECULATION_KEY])
+    futures, values, failures = map_with_retries(
+        executor,
+        func,
+        iterdata,
+        f"stage{stage}",
+        retries,
+        results.get("sample_interval"),
+        speculator
+    )
+    results.setdefault(FAILURES_KEY, {})[f"stage{stage}"] = failures
+    if speculator is not None:
+        backups = speculator.record()
+        results.setdefault(BACKUPS_KEY, {})[f"stage{stage}"] = backups
+        if backups["backups"]:
+            print(
+                f"\033[93mstage{stage}: {backups['backups']} backups, "
+                f"{backups['backup_wins']} won, {backups['abandoned']} "
+                f"abandoned\033[0m"
+            )
+    results[f"stage{stage}"] = [f.stats for f in futures if not f.error]
+    results[f"stage{stage}_time"] = time.time()
+    if failures["lost"]:
+        executor.get_result([f for f in futures if f.error])
+    return values if fetch_results else None
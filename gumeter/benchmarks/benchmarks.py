@@ -1,104 +1,204 @@
 import os
+import json
 
-from gumeter.config import (
-    BACKEND_STORAGE,
-    RESULTS_DIR,
-    Backend
+import numpy as np
+
+from gumeter.adaptive import (
+    StoppingRule,
+    format_report,
+    load_result
+)
+from gumeter.config import RESULTS_DIR
+from gumeter.benchmarks.base import BenchmarkContext
+from gumeter.benchmarks.monitor import RunMonitor
+from gumeter.benchmarks.registry import (
+    get_benchmark,
+    list_benchmarks
 )
-from gumeter.benchmarks.flops.flops import run_flops
-from gumeter.benchmarks.terasort.terasort import run_terasort
-from gumeter.benchmarks.mandelbrot.mandelbrot import run_mandelbrot
-from gumeter.benchmarks.montecarlo_pi.montecarlo_pi import run_montecarlo_pi
-from gumeter.benchmarks.montecarlo_stock.montecarlo_stock import (
-    run_montecarlo_stock
+from gumeter.benchmarks.retries import RetryPolicy
+from gumeter.ledger import RunLedger
+from gumeter.metrics_cache import load_metrics
+from gumeter.pricing import (
+    backend_rates,
+    worker_second_cost
 )
 
 
-def run_benchmark(
+# Past runs of a configuration needed before its p95 is trusted
+MIN_HISTORY_RUNS = 5
+
+
+def save_results(
+    results: dict,
+    out_dir: str = RESULTS_DIR,
+    ledger: RunLedger = None
+) -> str:
+    ledger = ledger or RunLedger(out_dir)
+    prefix = f"{results['benchmark']}_{results['backend']}"
+    results["replica"] = ledger.allocate_replica(prefix)
+    fdir = f"{out_dir}/{prefix}_replica{results['replica']}.json"
+    # Readers never see a half-written result
+    tmp_fdir = f"{fdir}.tmp"
+    with open(tmp_fdir, "w") as f:
+        json.dump(results, f)
+    os.replace(tmp_fdir, fdir)
+    print(f"Results saved to {fdir}")
+    return fdir
+
+
+def resolve_benchmark_params(
     benchmark_name: str,
     backend: str,
-    out_dir: str = RESULTS_DIR,
-    num_replicas: int = 1
-):
-    if (
-        benchmark_name != "terasort"
-        and backend == Backend.AWS_LAMBDA_REDIS.value
-    ):
+    params: dict = None
+) -> dict:
+    benchmark = get_benchmark(benchmark_name)()
+    if not benchmark.supports_backend(backend):
         raise ValueError(
-            "Backend AWS_LAMBDA_REDIS only supports the TeraSort benchmark."
+            f"Benchmark '{benchmark_name}' does not support "
+            f"backend '{backend}'."
         )
+    return benchmark.resolve_params(params)
+
+
+def historical_p95(
+    ctx: BenchmarkContext,
+    benchmark_name: str,
+    out_dir: str = RESULTS_DIR
+) -> float:
+    # Past runs of the same benchmark, backend, parameters and memory
+    params = json.loads(json.dumps(ctx.params))
+    times = [
+        run["metrics"]["execution_time"]
+        for run in load_metrics(out_dir).runs(benchmark_name, ctx.backend)
+        if run["params"] == params
+        and run["runtime_memory"] == ctx.runtime_memory
+        and run["metrics"]["execution_time"] is not None
+    ]
+    if len(times) < MIN_HISTORY_RUNS:
+        return None
+    return float(np.percentile(times, 95))
+
+
+def new_run_monitor(
+    ctx: BenchmarkContext,
+    benchmark_name: str,
+    out_dir: str = RESULTS_DIR
+) -> RunMonitor:
+    try:
+        second_cost = worker_second_cost(ctx.backend, ctx.runtime_memory)
+        request_cost = backend_rates(ctx.backend)["request"]
+    except ValueError:
+        second_cost, request_cost = None, 0.0
+    return RunMonitor(
+        f"[{benchmark_name}@{ctx.backend}]",
+        second_cost=second_cost,
+        request_cost=request_cost,
+        p95=historical_p95(ctx, benchmark_name, out_dir)
+    )
+
+
+def run_replica(
+    benchmark_name: str,
+    backend: str,
+    params: dict,
+    out_dir: str = RESULTS_DIR,
+    run_id: str = None,
+    ledger: RunLedger = None,
+    runtime_memory: int = None,
+    sample_interval: float = None,
+    monitor: bool = False,
+    retries: RetryPolicy = None,
+    speculation: float = None
+) -> str:
+    ledger = ledger or RunLedger(out_dir)
+    if run_id is None:
+        run_id = ledger.add_run(benchmark_name, backend, params)
+    ledger.start(run_id)
+    try:
+        ctx = BenchmarkContext(
+            backend=backend,
+            params=params,
+            runtime_memory=runtime_memory,
+            sample_interval=sample_interval,
+            retries=retries,
+            speculation=speculation
+        )
+        if monitor:
+            ctx.monitor = new_run_monitor(ctx, benchmark_name, out_dir)
+        results = get_benchmark(benchmark_name)().run(ctx)
+        result_file = save_results(results, out_dir, ledger)
+    except BaseException as e:
+        ledger.fail(run_id, repr(e))
+        raise
+    ledger.complete(run_id, result_file, results["replica"])
+    return result_file
+
+
+def run_benchmark(
+    benchmark_name: str,
+    backend: str,
+    out_dir: str = RESULTS_DIR,
+    num_replicas: int = 1,
+    params: dict = None,
+    stopping: StoppingRule = None,
+    sample_interval: float = None,
+    monitor: bool = False,
+    retries: RetryPolicy = None,
+    speculation: float = None
+) -> list:
+    # With a stopping rule, replicas are added until the rule is met and
+    # num_replicas is ignored
+    params = resolve_benchmark_params(benchmark_name, backend, params)
 
     if not os.path.exists(out_dir):
         os.makedirs(out_dir)
-    storage = BACKEND_STORAGE[backend]
-    for _ in range(num_replicas):
+    result_files = []
+    results = []
+    attempts = 0
+    while True:
+        if stopping is None:
+            if attempts == num_replicas:
+                break
+        elif attempts >= stopping.min_replicas:
+            report = stopping.evaluate(results, attempts)
+            if report["stop_reason"] is not None:
+                print(format_report(f"{benchmark_name} on {backend}", report))
+                break
+        attempts += 1
         print("Replica %d of benchmark '%s' on backend '%s'" % (
-            _ + 1, benchmark_name, backend
+            attempts, benchmark_name, backend
         ))
-        if benchmark_name == "flops":
-            run_flops(
-                backend=backend,
-                storage=storage,
-                outdir=out_dir
-            )
-        elif benchmark_name == "terasort":
-            run_terasort(
-                backend=backend,
-                storage=storage,
-                outdir=out_dir
-            )
-        elif benchmark_name == "mandelbrot":
-            run_mandelbrot(
-                backend=backend,
-                storage=storage,
-                outdir=out_dir
-            )
-        elif benchmark_name == "montecarlo_pi":
-            run_montecarlo_pi(
-                backend=backend,
-                storage=storage,
-                outdir=out_dir
-            )
-        elif benchmark_name == "montecarlo_stock":
-            run_montecarlo_stock(
-                backend=backend,
-                storage=storage,
-                outdir=out_dir
-            )
+        result_file = run_replica(
+            benchmark_name,
+            backend,
+            params,
+            out_dir,
+            sample_interval=sample_interval,
+            monitor=monitor,
+            retries=retries,
+            speculation=speculation
+        )
+        result_files.append(result_file)
+        if stopping is not None:
+            results.append(load_result(result_file))
+    return result_files
 
 
 def run_all_benchmarks(
     backend: str,
     out_dir: str = RESULTS_DIR,
-    num_replicas: int = 1
-):
-    run_benchmark(
-        "flops",
-        backend,
-        out_dir,
-        num_replicas
-    )
-    run_benchmark(
-        "terasort",
-        backend,
-        out_dir,
-        num_replicas
-    )
-    run_benchmark(
-        "mandelbrot",
-        backend,
-        out_dir,
-        num_replicas
-    )
-    run_benchmark(
-        "montecarlo_pi",
-        backend,
-        out_dir,
-        num_replicas
-    )
-    run_benchmark(
-        "montecarlo_stock",
-        backend,
-        out_dir,
-        num_replicas
-    )
+    num_replicas: int = 1,
+    monitor: bool = False
+) -> dict:
+    all_results = {}
+    for benchmark_name, benchmark_cls in list_benchmarks().items():
+        if not benchmark_cls().supports_backend(backend):
+            continue
+        all_results[benchmark_name] = run_benchmark(
+            benchmark_name,
+            backend,
+            out_dir,
+            num_replicas,
+            monitor=monitor
+        )
+    return all_results
@@ -14,122 +14,232 @@
 # limitations under the License.
 #
 
+import os
 import time
-import json
 import numpy as np
+from threadpoolctl import (
+    threadpool_info,
+    threadpool_limits
+)
 
 from lithops import FunctionExecutor
 
-from gumeter.config import (
-    DOCKER_BACKENDS,
-    BACKEND_MEMORY,
-    MAX_TASKS,
-    RESULTS_DIR,
-    RUNTIME_NAMES,
-    TAGS
+from gumeter.config import MAX_TASKS
+from gumeter.benchmarks.base import (
+    Benchmark,
+    BenchmarkContext,
+    Param,
+    map_with_retries
+)
+from gumeter.benchmarks.phases import phase
+from gumeter.benchmarks.registry import register_benchmark
+from gumeter.benchmarks.retries import (
+    FAILURES_KEY,
+    stage_retries
 )
-from gumeter.backend.code_engine import get_docker_username_from_config
-from gumeter.utils import get_fname_w_replica_num
+
+
+DTYPES = ["float64"]
+MATNS = [1024]
+LOOPCOUNT = 10
+WARMUP = 1
+
+
+def blas_info():
+    return [
+        {
+            "internal_api": pool.get("internal_api"),
+            "num_threads": pool.get("num_threads"),
+            "version": pool.get("version")
+        }
+        for pool in threadpool_info()
+        if pool.get("user_api") == "blas"
+    ]
 
 
 def compute_flops(
     loopcount,
-    mat_n
+    mat_n,
+    dtype: str = "float64",
+    blas_threads: int = None,
+    warmup: int = WARMUP
 ):
 
-    A = np.arange(mat_n**2, dtype=np.float64).reshape(mat_n, mat_n)
-    B = np.arange(mat_n**2, dtype=np.float64).reshape(mat_n, mat_n)
-
-    start = time.time()
-    for i in range(loopcount):
-        _ = np.sum(np.dot(A, B))
+    with phase("setup"):
+        A = np.arange(mat_n**2, dtype=dtype).reshape(mat_n, mat_n)
+        B = np.arange(mat_n**2, dtype=dtype).reshape(mat_n, mat_n)
+        C = np.empty((mat_n, mat_n), dtype=dtype)
+
+    with threadpool_limits(limits=blas_threads, user_api="blas"):
+        blas = blas_info()
+        with phase("warmup"):
+            for i in range(warmup):
+                np.dot(A, B, out=C)
+
+        iteration_ns = []
+        with phase("compute"):
+            for i in range(loopcount):
+                start = time.perf_counter_ns()
+                np.dot(A, B, out=C)
+                iteration_ns.append(time.perf_counter_ns() - start)
+        # Keeps the product live without timing the reduction
+        _ = np.sum(C)
 
     FLOPS = 2 * mat_n**3 * loopcount
-
-    end = time.time()
-
-    return {'flops': FLOPS / (end-start)}
+    compute_time = sum(iteration_ns) / 1e9
+
+    return {
+        'flops': FLOPS / compute_time,
+        'measured_flops': FLOPS,
+        'compute_time': compute_time,
+        'compute_gflops': FLOPS / compute_time / 1e9,
+        'iteration_ns': iteration_ns,
+        'warmup': warmup,
+        'blas': blas,
+        'cpu_count': os.cpu_count(),
+        'cpu_affinity': len(os.sched_getaffinity(0))
+    }
 
 
 def benchmark(
-    backend: str,
-    storage: str,
+    fexec: FunctionExecutor,
     workers: int = MAX_TASKS,
-    loopcount: int = 10,
+    loopcount: int = LOOPCOUNT,
     matn: int = 1024,
-    debug: bool = False
+    dtype: str = "float64",
+    blas_threads: int = None,
+    warmup: int = WARMUP,
+    sample_interval: float = None,
+    retries: int = 0
 ):
-    iterable = [(loopcount, matn) for i in range(workers)]
-    log_level = 'INFO' if not debug else 'DEBUG'
-    runtime = RUNTIME_NAMES.get(backend)
-    tag = TAGS.get(backend)
-    memory = BACKEND_MEMORY.get(backend)
-    runtime = f"{runtime}:{tag}"
-    if backend in DOCKER_BACKENDS:
-        docker_username = get_docker_username_from_config()
-        runtime = f"{docker_username}/{runtime}"
-    fexec = FunctionExecutor(
-        backend=backend,
-        storage=storage,
-        runtime_memory=memory,
-        log_level=log_level,
-        runtime=runtime
-    )
+    iterable = [
+        (loopcount, matn, dtype, blas_threads, warmup) for i in range(workers)
+    ]
     start_time = time.time()
-    worker_futures = fexec.map(
+    worker_futures, results, failures = map_with_retries(
+        fexec,
         compute_flops,
-        iterable
+        iterable,
+        f"matn={matn} {dtype}",
+        retries,
+        sample_interval
     )
-    results = fexec.get_result(throw_except=False)
     end_time = time.time()
-    results = [flops for flops in results if flops is not None]
+
+    # End-to-end time of a worker spans from its submission to the moment
+    # the driver saw it done, the rest over compute time is platform overhead
+    worker_results = []
+    for future, flops in zip(worker_futures, results):
+        if flops is None:
+            continue
+        stats = future.stats
+        e2e_time = stats['host_status_done_tstamp'] - stats['host_submit_tstamp']
+        flops['e2e_time'] = e2e_time
+        flops['e2e_gflops'] = flops['measured_flops'] / e2e_time / 1e9
+        flops['overhead_time'] = e2e_time - flops['compute_time']
+        worker_results.append(flops)
+    results = worker_results
     worker_stats = [f.stats for f in worker_futures if not f.error]
     total_time = end_time-start_time
 
-    print("Total time:", round(total_time, 3))
+    print(f"[{dtype}, {matn}x{matn}] Total time:", round(total_time, 3))
     toal_executed_tasks = len(worker_stats)
     est_flops = toal_executed_tasks * 2 * loopcount * matn ** 3
-    print('Estimated GFLOPS:', round(est_flops / 1e9 / total_time, 4))
+    gflops = est_flops / 1e9 / total_time
+    compute_gflops = sum(flops['compute_gflops'] for flops in results)
+    print(f"[{dtype}, {matn}x{matn}] Estimated GFLOPS:", round(gflops, 4))
+    print(
+        f"[{dtype}, {matn}x{matn}] Compute-only GFLOPS:",
+        round(compute_gflops, 4)
+    )
 
     res = {
         'start_time': start_time,
         'total_time': total_time,
         'est_flops': est_flops,
+        'gflops': gflops,
+        'compute_gflops': compute_gflops,
+        'worker_compute_gflops': _mean(
+            [flops['compute_gflops'] for flops in results]
+        ),
+        'worker_e2e_gflops': _mean(
+            [flops['e2e_gflops'] for flops in results]
+        ),
+        'worker_overhead_time': _mean(
+            [flops['overhead_time'] for flops in results]
+        ),
         'worker_stats': worker_stats,
+        FAILURES_KEY: failures,
         'results': results,
         'workers': toal_executed_tasks,
         'loopcount': loopcount,
-        'MATN': matn
+        'warmup': warmup,
+        'MATN': matn,
+        'dtype': dtype,
+        'blas_threads': blas_threads
     }
 
     return res
 
 
-def run_flops(
-    backend,
-    storage,
-    tasks: int = MAX_TASKS,
-    outdir: str = RESULTS_DIR,
-):
-    pass
-
-    res = benchmark(
-        backend,
-        storage,
-        tasks
-    )
-    fname = f"flops_{backend}.json"
-    fdir = f"{outdir}/{fname}"
-    fdir = get_fname_w_replica_num(
-        fname=fdir
-    )
-    json.dump(
-        res,
-        open(fdir, "w")
-    )
-    print(f"Results saved to {fdir}")
-
-
-
-if __name__ == "__main__":
-    run_flops()
+def _mean(values: list) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def get_flops_configs(
+    flops_data: dict
+) -> list:
+    # Results written before the sweep hold a single configuration
+    return flops_data.get("configs", [flops_data])
+
+
+@register_benchmark
+class FlopsBenchmark(Benchmark):
+    name = "flops"
+    description = "Dense matrix multiplication throughput per worker."
+    params = {
+        "tasks": Param(int, MAX_TASKS, "Number of workers."),
+        "matns": Param(int, MATNS, "Matrix sizes to sweep.", many=True),
+        "dtypes": Param(
+            str,
+            DTYPES,
+            "Data types to sweep.",
+            choices=["float32", "float64"],
+            many=True
+        ),
+        "loopcount": Param(int, LOOPCOUNT, "Measured matmuls per worker."),
+        "warmup": Param(int, WARMUP, "Unmeasured matmuls per worker."),
+        "blas_threads": Param(
+            int,
+            None,
+            "BLAS threads per worker (default: leave unpinned)."
+        )
+    }
+    workers_param = "tasks"
+    size_param = "loopcount"
+    size_unit = "matmuls"
+
+    def setup(self, ctx: BenchmarkContext):
+        self.fexec = ctx.executor()
+
+    def run_stages(self, ctx: BenchmarkContext, results: dict):
+        # Each configuration is a stage of the retry policy
+        configs = [
+            (dtype, matn)
+            for dtype in ctx.params["dtypes"]
+            for matn in ctx.params["matns"]
+        ]
+        results["configs"] = [
+            benchmark(
+                self.fexec,
+                ctx.params["tasks"],
+                loopcount=ctx.params["loopcount"],
+                matn=matn,
+                dtype=dtype,
+                blas_threads=ctx.params["blas_threads"],
+                warmup=ctx.params["warmup"],
+                sample_interval=ctx.sample_interval,
+                retries=stage_retries(ctx.retries, i)
+            )
+            for i, (dtype, matn) in enumerate(configs)
+        ]
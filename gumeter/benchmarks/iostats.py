@@ -0,0 +1,146 @@
+import threading
+from typing import (
+    Dict,
+    List
+)
+
+import numpy as np
+
+
+STORAGE_OPERATIONS = ["get", "put", "list", "delete"]
+# Workers that count their storage requests report them under this key of
+# their stats, as {storage backend: {operation: count}}
+STORAGE_OPS_KEY = "storage_ops"
+# Bytes and request latencies of those operations, per storage backend
+STORAGE_IO_KEY = "storage_io"
+# Upper bounds of the latency histogram buckets, in milliseconds; a last
+# bucket holds the slower requests
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+# Backend label of the records saved before they were split per backend
+UNLABELLED_BACKEND = "storage"
+
+_local = threading.local()
+
+
+def _new_ops() -> Dict[str, dict]:
+    return {
+        op: {
+            "bytes": 0,
+            "time": 0.0,
+            "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        }
+        for op in STORAGE_OPERATIONS
+    }
+
+
+class IOStats:
+    # A worker can use several storage backends, TeraSort over Redis reads
+    # and writes S3 too: each backend gets its own record
+
+    def __init__(self):
+        self.backends: Dict[str, Dict[str, dict]] = {}
+
+    def record(self, backend: str, op: str, nbytes: int, seconds: float):
+        stats = self.backends.setdefault(backend, _new_ops())[op]
+        stats["bytes"] += nbytes
+        stats["time"] += seconds
+        bucket = int(np.searchsorted(LATENCY_BUCKETS_MS, seconds * 1e3))
+        stats["histogram"][bucket] += 1
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        return {
+            backend: {op: sum(s["histogram"]) for op, s in ops.items()}
+            for backend, ops in self.backends.items()
+        }
+
+    def to_dict(self) -> dict:
+        return {"buckets_ms": LATENCY_BUCKETS_MS, "backends": self.backends}
+
+
+def start_io_stats():
+    _local.io_stats = IOStats()
+
+
+def stop_io_stats() -> IOStats:
+    io_stats, _local.io_stats = getattr(_local, "io_stats", None), None
+    return io_stats
+
+
+def record_storage_op(backend: str, op: str, nbytes: int, seconds: float):
+    # Outside a function run by with_phases nothing is recorded
+    io_stats = getattr(_local, "io_stats", None)
+    if io_stats is not None:
+        io_stats.record(backend, op, nbytes, seconds)
+
+
+def storage_op_counts(
+    worker_stats: dict,
+    default_backend: str = UNLABELLED_BACKEND
+) -> Dict[str, Dict[str, int]]:
+    # Request counts of a worker per backend; counts saved before they were
+    # split per backend are credited to default_backend
+    ops = worker_stats.get(STORAGE_OPS_KEY, {})
+    if any(isinstance(count, int) for count in ops.values()):
+        return {default_backend: ops}
+    return ops
+
+
+def _io_backends(storage_io: dict) -> Dict[str, Dict[str, dict]]:
+    if "backends" in storage_io:
+        return storage_io["backends"]
+    return {
+        UNLABELLED_BACKEND: {
+            op: storage_io[op] for op in STORAGE_OPERATIONS
+            if op in storage_io
+        }
+    }
+
+
+def histogram_percentile(
+    histogram: List[int],
+    percentile: float,
+    buckets_ms: List[float] = LATENCY_BUCKETS_MS
+) -> float:
+    # Upper bound of the bucket holding the percentile, in milliseconds;
+    # infinite when it falls past the last bound
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = np.searchsorted(np.cumsum(histogram), percentile / 100 * total)
+    return buckets_ms[rank] if rank < len(buckets_ms) else float("inf")
+
+
+def summarize_io(stats: List[dict]) -> dict:
+    # Requests, bytes and latency of every operation on every storage
+    # backend, over the workers of a stage that recorded their storage I/O
+    recorded = [w[STORAGE_IO_KEY] for w in stats if STORAGE_IO_KEY in w]
+    if not recorded:
+        return None
+    per_backend: Dict[str, List[dict]] = {}
+    for io in recorded:
+        for backend, ops in _io_backends(io).items():
+            per_backend.setdefault(backend, []).append(ops)
+    summary = {"workers": len(recorded), "backends": {}}
+    buckets_ms = recorded[0]["buckets_ms"]
+    for backend, workers in sorted(per_backend.items()):
+        summary["backends"][backend] = {}
+        for op in STORAGE_OPERATIONS:
+            histogram = np.sum(
+                [ops[op]["histogram"] for ops in workers],
+                axis=0
+            )
+            requests = int(histogram.sum())
+            summary["backends"][backend][op] = {
+                "requests": requests,
+                "bytes": sum(ops[op]["bytes"] for ops in workers),
+                "mean_ms": (
+                    sum(ops[op]["time"] for ops in workers) / requests * 1e3
+                    if requests else None
+                ),
+                "p95_ms": histogram_percentile(
+                    histogram.tolist(),
+                    95,
+                    buckets_ms
+                )
+            }
+    return summary
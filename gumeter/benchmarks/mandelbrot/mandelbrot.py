@@ -1,33 +1,39 @@
 from math import sqrt
-import time
-import json
 
 import numpy as np
 from lithops import FunctionExecutor
 
-from gumeter.backend.code_engine import get_docker_username_from_config
-from gumeter.config import (
-    BACKEND_MEMORY,
-    DOCKER_BACKENDS,
-    RESULTS_DIR,
-    RUNTIME_NAMES,
-    TAGS
+from gumeter.benchmarks.base import (
+    Benchmark,
+    BenchmarkContext,
+    Param,
+    run_stage
 )
-from gumeter.utils import get_fname_w_replica_num
+from gumeter.benchmarks.phases import phase
+from gumeter.benchmarks.registry import register_benchmark
 
 
 WIDTH = HEIGHT = 768
 MAXITER = 300
 XTARGET = -0.7436438870
 YTARGET = 0.1318259042
+ZOOM_FACTOR = 0.4
+# (maxiter, concurrency) of every zoom, each one ZOOM_FACTOR times closer
+ZOOMS = [
+    (MAXITER, 3**2),
+    (MAXITER, 5**2),
+    (MAXITER + 30, 7**2),
+    (MAXITER + 60, 9**2),
+    (MAXITER + 100, 10**2),
+    (MAXITER + 140, 12**2),
+    (500, 14**2)
+]
 
 
 def parallel_mandelbrot(
-    backend,
-    storage,
-    runtime_memory,
-    log_level,
-    runtime,
+    executor: FunctionExecutor,
+    results: dict,
+    stage: int,
     xmin,
     xmax,
     ymin,
@@ -63,10 +69,11 @@ def parallel_mandelbrot(
         output = np.zeros((mat_block_sz, mat_block_sz))
         z = np.zeros((mat_block_sz, mat_block_sz), np.complex64)
 
-        for it in range(maxiter+1):
-            notdone = np.less(z.real*z.real + z.imag*z.imag, 4.0)
-            output[notdone] = it
-            z[notdone] = z[notdone]**2 + c[notdone]
+        with phase("compute"):
+            for it in range(maxiter+1):
+                notdone = np.less(z.real*z.real + z.imag*z.imag, 4.0)
+                output[notdone] = it
+                z[notdone] = z[notdone]**2 + c[notdone]
 
         return output.T
 
@@ -77,236 +84,68 @@ def parallel_mandelbrot(
         } for limit in limits
     ]
 
-    executor = FunctionExecutor(
-        backend=backend,
-        storage=storage,
-        runtime_memory=runtime_memory,
-        log_level=log_level,
-        runtime=runtime
-    )
-    futures = executor.map(
+    chunks = run_stage(
+        executor,
+        results,
+        stage,
         mandelbrot_chunk_fn,
         iterdata
     )
-    results = executor.get_result(futures)
-    worker_stats = [f.stats for f in futures if not f.error]
 
     mat = np.zeros((width, height))
-    for i, mat_chunk in enumerate(results):
+    for i, mat_chunk in enumerate(chunks):
         idx = indexes[i]
         mat[idx[0]:idx[1], idx[2]:idx[3]] = mat_chunk
 
-    return worker_stats
-
-
-def run_mandelbrot(
-    backend,
-    storage,
-    outdir: str = RESULTS_DIR,
-    log_level: str = "INFO"
-):
-
-    runtime = RUNTIME_NAMES.get(backend)
-    tag = TAGS.get(backend)
-    memory = BACKEND_MEMORY.get(backend)
-    runtime = f"{runtime}:{tag}"
-    if backend in DOCKER_BACKENDS:
-        docker_username = get_docker_username_from_config()
-        runtime = f"{docker_username}/{runtime}"
-
-    results = {}
-    results["start_time"] = time.time()
-
-    # Initial rectangle position
-    delta = 1
-    xmin = XTARGET - delta
-    xmax = XTARGET + delta
-    ymin = YTARGET - delta
-    ymax = YTARGET + delta
-    maxiter = MAXITER
-    concurrency = 3**2
-    worker_stats = parallel_mandelbrot(
-        backend,
-        storage,
-        memory,
-        log_level,
-        runtime,
-        xmin,
-        xmax,
-        ymin,
-        ymax,
-        WIDTH,
-        HEIGHT,
-        maxiter,
-        concurrency
-    )
-    results["stage0"] = worker_stats
-    results["stage0_time"] = time.time()
-
-    # 1st zoom
-    delta = 0.4
-    xmin = XTARGET - delta
-    xmax = XTARGET + delta
-    ymin = YTARGET - delta
-    ymax = YTARGET + delta
-    concurrency = 5**2
-    worker_stats = parallel_mandelbrot(
-        backend,
-        storage,
-        memory,
-        log_level,
-        runtime,
-        xmin,
-        xmax,
-        ymin,
-        ymax,
-        WIDTH,
-        HEIGHT,
-        maxiter,
-        concurrency
-    )
-    results["stage1"] = worker_stats
-    results["stage1_time"] = time.time()
-
-    # 2nd zoom
-    delta *= 0.4
-    xmin = XTARGET - delta
-    xmax = XTARGET + delta
-    ymin = YTARGET - delta
-    ymax = YTARGET + delta
-    maxiter += 30
-    concurrency = 7**2
-    worker_stats = parallel_mandelbrot(
-        backend,
-        storage,
-        memory,
-        log_level,
-        runtime,
-        xmin,
-        xmax,
-        ymin,
-        ymax,
-        WIDTH,
-        HEIGHT,
-        maxiter,
-        concurrency
-    )
-    results["stage2"] = worker_stats
-    results["stage2_time"] = time.time()
-
-    # 3rd zoom
-    delta *= 0.4
-    xmin = XTARGET - delta
-    xmax = XTARGET + delta
-    ymin = YTARGET - delta
-    ymax = YTARGET + delta
-    maxiter += 30
-    concurrency = 9**2
-    worker_stats = parallel_mandelbrot(
-        backend,
-        storage,
-        memory,
-        log_level,
-        runtime,
-        xmin,
-        xmax,
-        ymin,
-        ymax,
-        WIDTH,
-        HEIGHT,
-        maxiter,
-        concurrency
-    )
-    results["stage3"] = worker_stats
-    results["stage3_time"] = time.time()
-
-    # 4th zoom
-    delta *= 0.4
-    xmin = XTARGET - delta
-    xmax = XTARGET + delta
-    ymin = YTARGET - delta
-    ymax = YTARGET + delta
-    maxiter += 40
-    concurrency = 10**2
-    worker_stats = parallel_mandelbrot(
-        backend,
-        storage,
-        memory,
-        log_level,
-        runtime,
-        xmin,
-        xmax,
-        ymin,
-        ymax,
-        WIDTH,
-        HEIGHT,
-        maxiter,
-        concurrency
-    )
-    results["stage4"] = worker_stats
-    results["stage4_time"] = time.time()
-
-    # 5th zoom
-    delta *= 0.4
-    xmin = XTARGET - delta
-    xmax = XTARGET + delta
-    ymin = YTARGET - delta
-    ymax = YTARGET + delta
-    maxiter += 40
-    concurrency = 12**2
-    worker_stats = parallel_mandelbrot(
-        backend,
-        storage,
-        memory,
-        log_level,
-        runtime,
-        xmin,
-        xmax,
-        ymin,
-        ymax,
-        WIDTH,
-        HEIGHT,
-        maxiter,
-        concurrency
-    )
-    results["stage5"] = worker_stats
-    results["stage5_time"] = time.time()
-
-    # 6th zoom
-    delta *= 0.4
-    xmin = XTARGET - delta
-    xmax = XTARGET + delta
-    ymin = YTARGET - delta
-    ymax = YTARGET + delta
-    maxiter = 500
-    concurrency = 14**2
-    worker_stats = parallel_mandelbrot(
-        backend,
-        storage,
-        memory,
-        log_level,
-        runtime,
-        xmin,
-        xmax,
-        ymin,
-        ymax,
-        WIDTH,
-        HEIGHT,
-        maxiter,
-        concurrency
-    )
-    results["stage6"] = worker_stats
-    results["stage6_time"] = time.time()
-
-    results["end_time"] = time.time()
-
-    fname = f"mandelbrot_{backend}.json"
-    fdir = f"{outdir}/{fname}"
-    fdir = get_fname_w_replica_num(
-        fname=fdir
-    )
-    json.dump(
-        results,
-        open(fdir, "w")
-    )
-    print(f"Results saved to {fdir}")
+    return mat
+
+
+@register_benchmark
+class MandelbrotBenchmark(Benchmark):
+    name = "mandelbrot"
+    description = "Successive Mandelbrot zooms with growing concurrency."
+    params = {
+        "concurrency": Param(
+            int,
+            None,
+            "Square number of workers of every zoom "
+            "(default: the growing zoom ladder)."
+        ),
+        "resolution": Param(int, WIDTH, "Side of every zoom, in pixels.")
+    }
+    workers_param = "concurrency"
+    size_param = "resolution"
+    size_unit = "pixels per zoom"
+
+    def scaling_params(self, workers: int, size: float = None) -> dict:
+        if int(sqrt(workers)) ** 2 != workers:
+            raise ValueError(
+                f"Mandelbrot concurrency must be a square number, "
+                f"got {workers}."
+            )
+        params = {"concurrency": workers}
+        if size is not None:
+            params["resolution"] = round(sqrt(size))
+        return params
+
+    def problem_size(self, params: dict) -> float:
+        return params["resolution"] ** 2
+
+    def run_stages(self, ctx: BenchmarkContext, results: dict):
+        resolution = ctx.params["resolution"]
+        for stage, (maxiter, concurrency) in enumerate(ZOOMS):
+            concurrency = ctx.params["concurrency"] or concurrency
+            delta = ZOOM_FACTOR ** stage
+            parallel_mandelbrot(
+                ctx.executor(),
+                results,
+                stage,
+                XTARGET - delta,
+                XTARGET + delta,
+                YTARGET - delta,
+                YTARGET + delta,
+                resolution,
+                resolution,
+                maxiter,
+                concurrency
+            )
@@ -0,0 +1,212 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Dict,
+    List,
+    TextIO
+)
+
+from lithops import FunctionExecutor
+from lithops.wait import ALWAYS
+
+from gumeter.benchmarks.speculation import Speculator
+
+
+# Seconds between two status checks of a stage's futures
+MONITOR_INTERVAL = 2.0
+FUTURE_STATES = ["pending", "running", "done", "failed"]
+
+_local = threading.local()
+
+
+def future_counts(futures: list) -> Dict[str, int]:
+    counts = dict.fromkeys(FUTURE_STATES, 0)
+    for future in futures:
+        if future.error:
+            counts["failed"] += 1
+        elif future.running:
+            counts["running"] += 1
+        elif future.ready or future.success or future.done:
+            counts["done"] += 1
+        else:
+            counts["pending"] += 1
+    return counts
+
+
+class RunMonitor:
+
+    def __init__(
+        self,
+        label: str,
+        second_cost: float = None,
+        request_cost: float = 0.0,
+        p95: float = None,
+        interval: float = MONITOR_INTERVAL,
+        out: TextIO = None
+    ):
+        # Costs are estimates: workers still running are charged from the
+        # moment the monitor saw them start, finished ones for what their
+        # stats report. Without a price for the backend no cost is shown.
+        self.label = label
+        self.second_cost = second_cost
+        self.request_cost = request_cost
+        # Historical p95 of the execution time of this configuration
+        self.p95 = p95
+        self.interval = interval
+        self.out = out or sys.stdout
+        self.start_time = None
+        self.settled_cost = 0.0
+        self.peak_concurrency = 0
+        self.flagged = False
+        # State of the stage being watched
+        self._seen: Dict[int, float] = {}
+        self._last = None
+        self._cost = None
+
+    def start(self):
+        self.start_time = time.time()
+        self.settled_cost = 0.0
+        self.peak_concurrency = 0
+        self.flagged = False
+
+    def _worker_seconds(self, futures: list, seen: Dict[int, float]) -> float:
+        now = time.time()
+        seconds = 0.0
+        for i, future in enumerate(futures):
+            stats = future.stats
+            if "worker_end_tstamp" in stats:
+                seconds += (
+                    stats["worker_end_tstamp"] - stats["worker_start_tstamp"]
+                )
+            elif future.running:
+                seconds += now - seen.setdefault(i, now)
+        return seconds
+
+    def _stage_cost(self, futures: list, seen: Dict[int, float]) -> float:
+        invoked = sum(1 for f in futures if not f.new)
+        return (
+            self.second_cost * self._worker_seconds(futures, seen)
+            + self.request_cost * invoked
+        )
+
+    def _check_elapsed(self, elapsed: float):
+        if self.p95 is None or self.flagged or elapsed <= self.p95:
+            return
+        self.flagged = True
+        self._clear_line()
+        print(
+            f"\033[93m\033[1m{self.label} has run for {elapsed:.1f}s, over "
+            f"the p95 of {self.p95:.1f}s of its past runs\033[0m",
+            file=self.out
+        )
+
+    def _clear_line(self):
+        if self.out.isatty():
+            self.out.write("\r\033[K")
+
+    def _report(
+        self,
+        name: str,
+        counts: Dict[str, int],
+        cost: float,
+        final: bool = False
+    ):
+        elapsed = time.time() - self.start_time
+        line = (
+            f"{self.label} {name}: {counts['done']}/"
+            f"{sum(counts.values())} done, {counts['running']} running, "
+            f"{counts['failed']} failed | concurrency "
+            f"{counts['running']} (peak {self.peak_concurrency})"
+        )
+        if cost is not None:
+            line += f" | ~${cost:.6f}"
+        line += f" | {elapsed:.1f}s"
+        # On a terminal the line is rewritten in place; logs get a line
+        # per change
+        if self.out.isatty():
+            self.out.write(f"\r\033[K{line}")
+            if final:
+                self.out.write("\n")
+            self.out.flush()
+        else:
+            print(line, file=self.out, flush=True)
+
+    def begin_stage(self):
+        if self.start_time is None:
+            self.start()
+        self._seen = {}
+        self._last = None
+        self._cost = None
+
+    def update(self, futures: List, name: str, finished: bool):
+        counts = future_counts(futures)
+        self.peak_concurrency = max(self.peak_concurrency, counts["running"])
+        cost = None
+        if self.second_cost is not None:
+            cost = self.settled_cost + self._stage_cost(futures, self._seen)
+        self._check_elapsed(time.time() - self.start_time)
+        if counts != self._last or finished or self.out.isatty():
+            self._report(name, counts, cost, final=finished)
+            self._last = counts
+        self._cost = cost
+
+    def end_stage(self):
+        if self._cost is not None:
+            self.settled_cost = self._cost
+
+
+def active_monitor() -> RunMonitor:
+    return getattr(_local, "monitor", None)
+
+
+@contextmanager
+def monitoring(monitor: RunMonitor):
+    # The stages run while the context is open report to the monitor
+    previous = active_monitor()
+    _local.monitor = monitor
+    try:
+        yield monitor
+    finally:
+        _local.monitor = previous
+
+
+def watch_stage(
+    executor: FunctionExecutor,
+    futures: List,
+    name: str,
+    speculator: Speculator = None
+):
+    # Polls the futures of a stage until it finishes, reporting to the
+    # active monitor. A speculator decides when the stage finished and adds
+    # its backups to the futures polled. Otherwise the caller just waits on
+    # the results. Returns leaving the results for the caller to fetch.
+    monitor = active_monitor()
+    if monitor is None and speculator is None:
+        return
+    if speculator is not None:
+        futures = speculator.futures
+    interval = MONITOR_INTERVAL
+    if monitor is not None:
+        interval = monitor.interval
+        monitor.begin_stage()
+    while True:
+        executor.wait(
+            futures,
+            throw_except=False,
+            return_when=ALWAYS,
+            show_progressbar=False
+        )
+        if speculator is not None:
+            finished = speculator.poll()
+        else:
+            counts = future_counts(futures)
+            finished = not counts["pending"] and not counts["running"]
+        if monitor is not None:
+            monitor.update(futures, name, finished)
+        if finished:
+            break
+        time.sleep(interval)
+    if monitor is not None:
+        monitor.end_stage()
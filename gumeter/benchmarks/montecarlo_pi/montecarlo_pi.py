@@ -1,171 +1,181 @@
 import os
-import time
-import json
-from random import random
+import random
 
 from lithops import (
     FunctionExecutor,
     Storage
 )
-import cloudpickle as pickle
-
-from gumeter.backend.code_engine import get_docker_username_from_config
-from gumeter.config import (
-    BACKEND_MEMORY,
-    DOCKER_BACKENDS,
-    INPUT_BUCKET,
-    RESULTS_DIR,
-    RUNTIME_NAMES,
-    TAGS
+
+from gumeter.benchmarks.base import (
+    Benchmark,
+    BenchmarkContext,
+    Param,
+    run_stage
 )
-from gumeter.utils import (
-    get_fname_w_replica_num,
-    remove_objects
+from gumeter.benchmarks.phases import phase
+from gumeter.benchmarks.reduction import (
+    DEFAULT_FAN_IN,
+    ReduceStrategy,
+    parallel_reduce,
+    put_partial
 )
+from gumeter.benchmarks.registry import register_benchmark
+from gumeter.utils import remove_objects
 
 
 MAP_INSTANCES = 100
+RANDOMIZE_PER_MAP = 10000000
 PARTITION_PREFIX = "intermediate_montecarlo_pi/"
 
 
 class EstimatePI:
-    randomize_per_map = 10000000
 
     def __init__(
         self,
-        bucket: str
+        bucket: str,
+        store_results: bool = True,
+        map_instances: int = MAP_INSTANCES,
+        randomize_per_map: int = RANDOMIZE_PER_MAP,
+        seed: int = None
     ):
-        self.total_randomize_points = MAP_INSTANCES * self.randomize_per_map
+        # Every map draws from the run's seed and its index, so a backup
+        # of a map writes the same partial as the map itself
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.map_instances = map_instances
+        self.randomize_per_map = randomize_per_map
+        self.total_randomize_points = map_instances * randomize_per_map
         self.bucket = bucket
+        self.store_results = store_results
 
     def __str__(self):
         return "Total Randomize Points: {:,}".format(
-            self.randomize_per_map * MAP_INSTANCES
+            self.total_randomize_points
         )
 
     @staticmethod
-    def predicate():
-        x = random()
-        y = random()
+    def predicate(rng: random.Random):
+        x = rng.random()
+        y = rng.random()
         return (x ** 2) + (y ** 2) <= 1
 
     def randomize_points(
         self,
         func_i: int
     ):
-        storage = Storage()
         in_circle = 0
-        for _ in range(self.randomize_per_map):
-            in_circle += self.predicate()
+        rng = random.Random(f"{self.seed}:{func_i}")
+        with phase("compute"):
+            for _ in range(self.randomize_per_map):
+                in_circle += self.predicate(rng)
+        result = float(in_circle / self.randomize_per_map)
+        if not self.store_results:
+            return result
         key = os.path.join(
             PARTITION_PREFIX,
             str(func_i)
         )
-        result = float(in_circle / self.randomize_per_map)
-        storage.put_object(
+        return put_partial(
             bucket=self.bucket,
             key=key,
-            body=pickle.dumps(result)
+            value=result
         )
-        return key
-
-    def process_in_circle_points(
-        self,
-        result_keys: list[str]
-    ):
-        storage = Storage()
-
-        results = [
-            pickle.loads(
-                storage.get_object(
-                    bucket=self.bucket,
-                    key=result_key
-                )
-            ) for result_key in result_keys
-        ]
 
+    @staticmethod
+    def combine_in_circle(
+        partials: list[float]
+    ) -> float:
         in_circle_percent = 0
-        for map_result in results:
+        for map_result in partials:
             in_circle_percent += map_result
-        estimate_PI = float(4 * (in_circle_percent / MAP_INSTANCES))
-        return estimate_PI
+        return float(in_circle_percent)
+
+    def estimate_pi(
+        self,
+        in_circle_percent: float
+    ) -> float:
+        return float(4 * (in_circle_percent / self.map_instances))
 
 
 def parallel_montecarlo_pi(
     executor: FunctionExecutor,
-    pi_estimator: EstimatePI
+    pi_estimator: EstimatePI,
+    results: dict,
+    reduce_strategy: str = ReduceStrategy.FUNCTION.value,
+    fan_in: int = DEFAULT_FAN_IN
 ):
 
-    results = {}
-    results["start_time"] = time.time()
+    results["seed"] = pi_estimator.seed
 
     # execute the code
-    map_futures = executor.map(
+    map_results = run_stage(
+        executor,
+        results,
+        0,
         pi_estimator.randomize_points,
-        list(range(MAP_INSTANCES))
+        list(range(pi_estimator.map_instances))
     )
-    map_results = executor.get_result(map_futures)
-    map_stats = [f.stats for f in map_futures if not f.error]
-    results["stage0"] = map_stats
-    results["stage0_time"] = time.time()
-
-    reduce_futures = executor.map(
-        pi_estimator.process_in_circle_points,
-        [map_results]
+
+    in_circle_percent = parallel_reduce(
+        executor=executor,
+        map_results=map_results,
+        combine=EstimatePI.combine_in_circle,
+        results=results,
+        bucket=pi_estimator.bucket,
+        prefix=PARTITION_PREFIX,
+        strategy=reduce_strategy,
+        fan_in=fan_in
     )
-    pi = executor.get_result(reduce_futures)[0]
+    pi = pi_estimator.estimate_pi(in_circle_percent)
     print(f"Estimated PI: {pi}")
-    reduce_stats = [f.stats for f in reduce_futures if not f.error]
-    results["stage1"] = reduce_stats
-
-    results["end_time"] = time.time()
 
     return results
 
 
-def run_montecarlo_pi(
-    backend,
-    storage,
-    outdir: str = RESULTS_DIR,
-    log_level: str = "INFO"
-):
-
-    runtime = RUNTIME_NAMES.get(backend)
-    tag = TAGS.get(backend)
-    memory = BACKEND_MEMORY.get(backend)
-    runtime = f"{runtime}:{tag}"
-    if backend in DOCKER_BACKENDS:
-        docker_username = get_docker_username_from_config()
-        runtime = f"{docker_username}/{runtime}"
-    bucket = INPUT_BUCKET.get(backend)
-
-    fexec = FunctionExecutor(
-        backend=backend,
-        storage=storage,
-        runtime_memory=memory,
-        log_level=log_level,
-        runtime=runtime
-    )
-
-    pi_estimator = EstimatePI(bucket)
-    results = parallel_montecarlo_pi(
-        fexec,
-        pi_estimator
-    )
-
-    fname = f"montecarlo_pi_{backend}.json"
-    fdir = f"{outdir}/{fname}"
-    fdir = get_fname_w_replica_num(
-        fname=fdir
-    )
-    json.dump(
-        results,
-        open(fdir, "w")
-    )
-    print(f"Results saved to {fdir}")
+@register_benchmark
+class MontecarloPiBenchmark(Benchmark):
+    name = "montecarlo_pi"
+    description = "Monte Carlo estimation of Pi with a map and a reduce."
+    params = {
+        "reduce_strategy": Param(
+            str,
+            ReduceStrategy.FUNCTION.value,
+            "Where map results are reduced.",
+            choices=[strategy.value for strategy in ReduceStrategy]
+        ),
+        "fan_in": Param(int, DEFAULT_FAN_IN, "Fan-in of the tree reduction."),
+        "map_instances": Param(int, MAP_INSTANCES, "Number of maps."),
+        "points_per_map": Param(
+            int,
+            RANDOMIZE_PER_MAP,
+            "Random points drawn by each map."
+        )
+    }
+    workers_param = "map_instances"
+    size_param = "points_per_map"
+    size_unit = "points"
+
+    def setup(self, ctx: BenchmarkContext):
+        self.fexec = ctx.executor()
+
+    def run_stages(self, ctx: BenchmarkContext, results: dict):
+        reduce_strategy = ctx.params["reduce_strategy"]
+        pi_estimator = EstimatePI(
+            ctx.bucket,
+            store_results=reduce_strategy != ReduceStrategy.DRIVER.value,
+            map_instances=ctx.params["map_instances"],
+            randomize_per_map=ctx.params["points_per_map"]
+        )
+        parallel_montecarlo_pi(
+            self.fexec,
+            pi_estimator,
+            results,
+            reduce_strategy=reduce_strategy,
+            fan_in=ctx.params["fan_in"]
+        )
 
-    remove_objects(
-        storage=fexec.storage,
-        bucket=bucket,
-        prefix=PARTITION_PREFIX
-    )
+    def teardown(self, ctx: BenchmarkContext):
+        remove_objects(
+            storage=Storage(backend=ctx.storage),
+            bucket=ctx.bucket,
+            prefix=PARTITION_PREFIX
+        )
@@ -1,181 +1,265 @@
+import math
 import os
-import time
-import json
 
 from lithops import (
     FunctionExecutor,
     Storage
 )
-import cloudpickle as pickle
 import numpy as np
-import scipy.stats as scpy
-
-from gumeter.backend.code_engine import get_docker_username_from_config
-from gumeter.config import (
-    BACKEND_MEMORY,
-    DOCKER_BACKENDS,
-    INPUT_BUCKET,
-    RESULTS_DIR,
-    RUNTIME_NAMES,
-    TAGS
+
+from gumeter.benchmarks.base import (
+    Benchmark,
+    BenchmarkContext,
+    Param,
+    run_stage
 )
-from gumeter.utils import (
-    get_fname_w_replica_num,
-    remove_objects
+from gumeter.benchmarks.phases import phase
+from gumeter.benchmarks.reduction import (
+    DEFAULT_FAN_IN,
+    ReduceStrategy,
+    parallel_reduce,
+    put_partial
 )
+from gumeter.benchmarks.montecarlo_stock.summaries import ValueSummary
+from gumeter.benchmarks.registry import register_benchmark
+from gumeter.utils import remove_objects
 
 
 MAP_INSTANCES = 10
 PARTITION_PREFIX = "intermediate_montecarlo_stock/"
+FORECASTS_PER_MAP = 100
+# Forecast rows generated at once, bounds the (rows, days) matrix to ~47 MB
+FORECAST_CHUNK_SIZE = 8192
+# Histogram range around the expected log-price, in standard deviations
+HIST_SIGMAS = 6
+RAW_AGGREGATION = "raw"
+SKETCH_AGGREGATION = "sketch"
 
 
 class StockData:
-    forecasts_per_map = 100
     days2predict = 730
 
-    def __init__(self, title, drift, std_dev, last_value):
+    def __init__(
+        self,
+        title,
+        drift,
+        std_dev,
+        last_value,
+        forecasts_per_map: int = FORECASTS_PER_MAP
+    ):
         self.title = title
         self.last_value = last_value
         self.std_dev = std_dev
         self.drift = drift
+        self.forecasts_per_map = forecasts_per_map
 
-    def single_forecast_generator(self):
-        predicts_est = [self.last_value]
-        for predict in range(1, self.days2predict + 1):
-            rand = np.random.rand()
-            pow_r = scpy.norm.ppf(rand)
-            predicts_est.append(
-                predicts_est[predict - 1] *
-                np.exp(self.drift + (self.std_dev * pow_r))
+    def forecast_chunks(
+        self,
+        num_forecasts: int,
+        seed: list = None,
+        chunk_size: int = FORECAST_CHUNK_SIZE
+    ):
+        # Each path is last_value * exp(cumsum(drift + std_dev * N(0, 1))),
+        # only its mid and end values are kept.
+        mid = int(self.days2predict / 2)
+        rng = np.random.default_rng(seed)
+        for chunk_start in range(0, num_forecasts, chunk_size):
+            rows = min(chunk_size, num_forecasts - chunk_start)
+            log_returns = rng.standard_normal((rows, self.days2predict))
+            log_returns *= self.std_dev
+            log_returns += self.drift
+            np.cumsum(log_returns, axis=1, out=log_returns)
+            yield (
+                self.last_value * np.exp(log_returns[:, mid - 1]),
+                self.last_value * np.exp(log_returns[:, -1])
             )
-        return predicts_est
+
+    def forecast_generator(
+        self,
+        num_forecasts: int,
+        seed: list = None
+    ):
+        chunks = list(self.forecast_chunks(num_forecasts, seed))
+        hist_mid = np.concatenate([chunk[0] for chunk in chunks])
+        hist_end = np.concatenate([chunk[1] for chunk in chunks])
+        return hist_mid, hist_end
+
+    def value_range(
+        self,
+        day: int
+    ):
+        center = math.log(self.last_value) + self.drift * day
+        spread = HIST_SIGMAS * self.std_dev * math.sqrt(day)
+        return math.exp(center - spread), math.exp(center + spread)
+
+    def forecast_summaries(
+        self,
+        num_forecasts: int,
+        seed: list = None
+    ):
+        mid = int(self.days2predict / 2)
+        summary_mid = ValueSummary(*self.value_range(mid))
+        summary_end = ValueSummary(*self.value_range(self.days2predict))
+        for hist_mid, hist_end in self.forecast_chunks(num_forecasts, seed):
+            summary_mid.update(hist_mid)
+            summary_end.update(hist_end)
+        return (summary_mid, summary_end)
+
+
+def combine_forecasts(
+    partials: list
+):
+    hist_end = list()
+    hist_mid = list()
+    for single_map_result in partials:
+        hist_end.extend(single_map_result[1])
+        hist_mid.extend(single_map_result[0])
+    return (hist_mid, hist_end)
+
+
+def combine_summaries(
+    partials: list
+):
+    summary_mid, summary_end = partials[0]
+    for single_map_result in partials[1:]:
+        summary_mid.merge(single_map_result[0])
+        summary_end.merge(single_map_result[1])
+    return (summary_mid, summary_end)
 
 
 def parallel_montecarlo_stock(
     executor: FunctionExecutor,
     current_stock: StockData,
-    bucket: str
+    bucket: str,
+    results: dict,
+    reduce_strategy: str = ReduceStrategy.FUNCTION.value,
+    fan_in: int = DEFAULT_FAN_IN,
+    aggregation: str = SKETCH_AGGREGATION,
+    map_instances: int = MAP_INSTANCES
 ):
+    if aggregation not in (RAW_AGGREGATION, SKETCH_AGGREGATION):
+        raise ValueError(f"Unknown aggregation '{aggregation}'.")
+    store_results = reduce_strategy != ReduceStrategy.DRIVER.value
+    # Every map draws from the run's seed and its index, so a backup of a
+    # map writes the same partial as the map itself
+    seed = int(np.random.default_rng().integers(2**32))
+    results["seed"] = seed
 
     def process_forecasts(
         func_i: int
     ):
-        storage = Storage()
-        end = current_stock.days2predict
-        mid = int(end / 2)
-        hist_end = list()
-        hist_mid = list()
-        for i in range(StockData.forecasts_per_map):
-            frc = current_stock.single_forecast_generator()
-            hist_end.append(frc[end])
-            hist_mid.append(frc[mid])
-        result = (hist_mid, hist_end)
+        with phase("compute"):
+            if aggregation == SKETCH_AGGREGATION:
+                result = current_stock.forecast_summaries(
+                    current_stock.forecasts_per_map,
+                    [seed, func_i]
+                )
+            else:
+                hist_mid, hist_end = current_stock.forecast_generator(
+                    current_stock.forecasts_per_map,
+                    [seed, func_i]
+                )
+                result = (hist_mid.tolist(), hist_end.tolist())
+        if not store_results:
+            return result
         key = os.path.join(
             PARTITION_PREFIX,
             str(func_i)
         )
-        storage.put_object(
+        return put_partial(
             bucket=bucket,
             key=key,
-            body=pickle.dumps(result)
+            value=result
         )
-        return key
-
-    def combine_forecasts(
-        result_keys: list[str]
-    ):
-        storage = Storage()
-        results = [
-            pickle.loads(
-                storage.get_object(
-                    bucket=bucket,
-                    key=key
-                )
-            )
-            for key in result_keys
-        ]
-        hist_end = list()
-        hist_mid = list()
-        for single_map_result in results:
-            hist_end.extend(single_map_result[1])
-            hist_mid.extend(single_map_result[0])
-        return (hist_mid, hist_end)
-
-    results = {}
-    results["start_time"] = time.time()
 
     # execute the code
-    map_futures = executor.map(
+    map_results = run_stage(
+        executor,
+        results,
+        0,
         process_forecasts,
-        list(range(MAP_INSTANCES))
+        list(range(map_instances))
     )
-    map_results = executor.get_result(map_futures)
-    map_stats = [f.stats for f in map_futures if not f.error]
-    results["stage0"] = map_stats
-    results["stage0_time"] = time.time()
-
-    reduce_futures = executor.map(
-        combine_forecasts,
-        [map_results]
+
+    forecasts = parallel_reduce(
+        executor=executor,
+        map_results=map_results,
+        combine=(
+            combine_summaries if aggregation == SKETCH_AGGREGATION
+            else combine_forecasts
+        ),
+        results=results,
+        bucket=bucket,
+        prefix=PARTITION_PREFIX,
+        strategy=reduce_strategy,
+        fan_in=fan_in
     )
-    _ = executor.get_result(reduce_futures)[0]
-    reduce_stats = [f.stats for f in reduce_futures if not f.error]
-    results["stage1"] = reduce_stats
 
-    results["end_time"] = time.time()
+    results["forecasts_per_map"] = current_stock.forecasts_per_map
+    results["aggregation"] = aggregation
+    if aggregation == SKETCH_AGGREGATION:
+        results["forecast_summary"] = {
+            "mid": forecasts[0].to_dict(),
+            "end": forecasts[1].to_dict()
+        }
 
     return results
 
 
-def run_montecarlo_stock(
-    backend,
-    storage,
-    outdir: str = RESULTS_DIR,
-    log_level: str = "INFO"
-):
-
-    runtime = RUNTIME_NAMES.get(backend)
-    tag = TAGS.get(backend)
-    memory = BACKEND_MEMORY.get(backend)
-    runtime = f"{runtime}:{tag}"
-    if backend in DOCKER_BACKENDS:
-        docker_username = get_docker_username_from_config()
-        runtime = f"{docker_username}/{runtime}"
-    bucket = INPUT_BUCKET.get(backend)
-
-    fexec = FunctionExecutor(
-        backend=backend,
-        storage=storage,
-        runtime_memory=memory,
-        log_level=log_level,
-        runtime=runtime
-    )
+@register_benchmark
+class MontecarloStockBenchmark(Benchmark):
+    name = "montecarlo_stock"
+    description = "Monte Carlo stock price forecasting with a map and a reduce."
+    params = {
+        "reduce_strategy": Param(
+            str,
+            ReduceStrategy.FUNCTION.value,
+            "Where map results are reduced.",
+            choices=[strategy.value for strategy in ReduceStrategy]
+        ),
+        "fan_in": Param(int, DEFAULT_FAN_IN, "Fan-in of the tree reduction."),
+        "forecasts_per_map": Param(
+            int,
+            FORECASTS_PER_MAP,
+            "Simulated paths per map."
+        ),
+        "aggregation": Param(
+            str,
+            SKETCH_AGGREGATION,
+            "What maps send to the reducers.",
+            choices=[RAW_AGGREGATION, SKETCH_AGGREGATION]
+        ),
+        "map_instances": Param(int, MAP_INSTANCES, "Number of maps.")
+    }
+    workers_param = "map_instances"
+    size_param = "forecasts_per_map"
+    size_unit = "forecasts"
 
-    stock_data = StockData(
-        title="Example 2014, 2015, 2016",
-        drift=-0.00022513546014255100,
-        std_dev=0.0121678341323272,
-        last_value=159.44
-    )
-    results = parallel_montecarlo_stock(
-        executor=fexec,
-        current_stock=stock_data,
-        bucket=bucket
-    )
+    def setup(self, ctx: BenchmarkContext):
+        self.fexec = ctx.executor()
 
-    fname = f"montecarlo_stock_{backend}.json"
-    fdir = f"{outdir}/{fname}"
-    fdir = get_fname_w_replica_num(
-        fname=fdir
-    )
-    json.dump(
-        results,
-        open(fdir, "w")
-    )
-    print(f"Results saved to {fdir}")
+    def run_stages(self, ctx: BenchmarkContext, results: dict):
+        stock_data = StockData(
+            title="Example 2014, 2015, 2016",
+            drift=-0.00022513546014255100,
+            std_dev=0.0121678341323272,
+            last_value=159.44,
+            forecasts_per_map=ctx.params["forecasts_per_map"]
+        )
+        parallel_montecarlo_stock(
+            executor=self.fexec,
+            current_stock=stock_data,
+            bucket=ctx.bucket,
+            results=results,
+            reduce_strategy=ctx.params["reduce_strategy"],
+            fan_in=ctx.params["fan_in"],
+            aggregation=ctx.params["aggregation"],
+            map_instances=ctx.params["map_instances"]
+        )
 
-    remove_objects(
-        storage=fexec.storage,
-        bucket=bucket,
-        prefix=PARTITION_PREFIX
-    )
+    def teardown(self, ctx: BenchmarkContext):
+        remove_objects(
+            storage=Storage(backend=ctx.storage),
+            bucket=ctx.bucket,
+            prefix=PARTITION_PREFIX
+        )
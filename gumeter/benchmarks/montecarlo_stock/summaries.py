@@ -0,0 +1,186 @@
+import math
+from typing import List
+
+import numpy as np
+
+
+HIST_BINS = 200
+KLL_K = 200
+SUMMARY_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+class Moments:
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        other = Moments()
+        other.count = len(values)
+        other.mean = float(np.mean(values))
+        other.m2 = float(np.sum((values - other.mean) ** 2))
+        other.min = float(np.min(values))
+        other.max = float(np.max(values))
+        self.merge(other)
+
+    def merge(self, other: "Moments"):
+        # Chan et al. parallel variance update
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+class FixedHistogram:
+
+    def __init__(
+        self,
+        low: float,
+        high: float,
+        bins: int = HIST_BINS
+    ):
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, values: np.ndarray):
+        self.underflow += int(np.count_nonzero(values < self.edges[0]))
+        self.overflow += int(np.count_nonzero(values > self.edges[-1]))
+        counts, _ = np.histogram(values, bins=self.edges)
+        self.counts += counts
+
+    def merge(self, other: "FixedHistogram"):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bins.")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+
+class KLLSketch:
+    # Compactor hierarchy from Karnin, Lang and Liberty (2016). Level h
+    # items weigh 2**h; capacities shrink by 2/3 from the top level down.
+    # Instead of a random coin, every level alternates which half of its
+    # items it promotes, so the same inputs merged in the same order give
+    # the same sketch: a speculative backup writes the same bytes.
+
+    def __init__(
+        self,
+        k: int = KLL_K
+    ):
+        self.k = k
+        self.compactors = [np.empty(0)]
+        self.offsets = [0]
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                    self.offsets.append(0)
+                items = np.sort(items)
+                # An odd item out stays at this level
+                keep = items[:len(items) % 2]
+                items = items[len(items) % 2:]
+                promoted = items[self.offsets[level]::2]
+                self.offsets[level] ^= 1
+                self.compactors[level] = keep
+                self.compactors[level + 1] = np.concatenate(
+                    [self.compactors[level + 1], promoted]
+                )
+            level += 1
+
+    def update(self, values: np.ndarray):
+        self.compactors[0] = np.concatenate(
+            [self.compactors[0], np.asarray(values, dtype=np.float64)]
+        )
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+            self.offsets.append(0)
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate(
+                [self.compactors[level], items]
+            )
+        self._compress()
+
+    def quantiles(self, qs: List[float]) -> List[float]:
+        values = np.concatenate(self.compactors)
+        if len(values) == 0:
+            return [math.nan for _ in qs]
+        weights = np.concatenate([
+            np.full(len(items), 2 ** level, dtype=np.float64)
+            for level, items in enumerate(self.compactors)
+        ])
+        order = np.argsort(values)
+        values = values[order]
+        cum_weights = np.cumsum(weights[order])
+        ranks = np.asarray(qs) * cum_weights[-1]
+        idx = np.searchsorted(cum_weights, ranks, side="left")
+        idx = np.minimum(idx, len(values) - 1)
+        return values[idx].tolist()
+
+
+class ValueSummary:
+
+    def __init__(
+        self,
+        low: float,
+        high: float,
+        bins: int = HIST_BINS,
+        k: int = KLL_K
+    ):
+        self.histogram = FixedHistogram(low, high, bins)
+        self.sketch = KLLSketch(k)
+        self.moments = Moments()
+
+    def update(self, values: np.ndarray):
+        self.histogram.update(values)
+        self.sketch.update(values)
+        self.moments.update(values)
+
+    def merge(self, other: "ValueSummary"):
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+        self.moments.merge(other.moments)
+
+    def to_dict(self, qs: List[float] = SUMMARY_QUANTILES) -> dict:
+        return {
+            "count": self.moments.count,
+            "mean": self.moments.mean,
+            "std": self.moments.std,
+            "min": self.moments.min,
+            "max": self.moments.max,
+            "quantiles": dict(zip(
+                [str(q) for q in qs],
+                self.sketch.quantiles(qs)
+            )),
+            "hist_edges": self.histogram.edges.tolist(),
+            "hist_counts": self.histogram.counts.tolist(),
+            "hist_underflow": self.histogram.underflow,
+            "hist_overflow": self.histogram.overflow
+        }
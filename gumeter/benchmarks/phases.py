@@ -0,0 +1,175 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    List
+)
+
+from lithops import FunctionExecutor
+
+from gumeter.benchmarks.iostats import (
+    STORAGE_IO_KEY,
+    STORAGE_OPS_KEY,
+    IOStats,
+    start_io_stats,
+    stop_io_stats
+)
+from gumeter.benchmarks.sampler import (
+    RESOURCES_KEY,
+    start_sampler
+)
+
+
+# Worker stats key holding the phases of a worker, in the order they ran
+PHASES_KEY = "phases"
+# Attribute of the exception of a failed call holding what it recorded
+PHASED_ATTR = "gumeter_phases"
+
+_local = threading.local()
+
+
+class PhaseRecord:
+
+    def __init__(self, name: str, nbytes: int = 0):
+        self.name = name
+        self.bytes = nbytes
+        self.start_tstamp = time.time()
+        self.end_tstamp = None
+
+    def add_bytes(self, nbytes: int):
+        self.bytes += nbytes
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start_tstamp": self.start_tstamp,
+            "end_tstamp": self.end_tstamp,
+            "duration": self.end_tstamp - self.start_tstamp,
+            "bytes": self.bytes
+        }
+
+
+@contextmanager
+def phase(name: str, nbytes: int = 0):
+    # Times a phase of a worker function. Outside a function run by
+    # with_phases nothing is recorded.
+    record = PhaseRecord(name, nbytes)
+    open_phases = _open_phases()
+    open_phases.append(record)
+    try:
+        yield record
+    finally:
+        record.end_tstamp = time.time()
+        open_phases.remove(record)
+        phases = getattr(_local, "phases", None)
+        if phases is not None:
+            phases.append(record.to_dict())
+
+
+def _open_phases() -> List[PhaseRecord]:
+    if not hasattr(_local, "open_phases"):
+        _local.open_phases = []
+    return _local.open_phases
+
+
+def count_bytes(nbytes: int):
+    # Credits bytes read or written to the innermost open phase, so storage
+    # helpers can count them without knowing which phase they run in
+    open_phases = _open_phases()
+    if open_phases:
+        open_phases[-1].add_bytes(nbytes)
+
+
+class PhasedResult:
+
+    def __init__(
+        self,
+        value,
+        phases: List[dict],
+        resources: dict = None,
+        io_stats: IOStats = None
+    ):
+        self.value = value
+        self.phases = phases
+        self.resources = resources
+        self.io_stats = io_stats
+
+
+class with_phases:
+    # A class rather than a closure, so Lithops pickles it by reference and
+    # the thread-local state stays out of the payload. __wrapped__ keeps the
+    # signature Lithops binds the iterdata to. With a sample interval the
+    # worker's resources are sampled while the function runs. Requests made
+    # through InstrumentedStorage are accounted too.
+
+    def __init__(self, func: Callable, sample_interval: float = None):
+        self.func = func
+        self.sample_interval = sample_interval
+        self.__wrapped__ = func
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        _local.phases = []
+        start_io_stats()
+        sampler = start_sampler(self.sample_interval)
+        try:
+            value = self.func(*args, **kwargs)
+        except Exception as e:
+            # A failed call was billed for its requests too: what it
+            # recorded travels back with the exception
+            setattr(e, PHASED_ATTR, self._finish(None, sampler))
+            raise
+        return self._finish(value, sampler)
+
+    def _finish(self, value, sampler) -> PhasedResult:
+        phases, _local.phases = _local.phases, None
+        io_stats = stop_io_stats()
+        resources = sampler.stop() if sampler is not None else None
+        return PhasedResult(value, phases, resources, io_stats)
+
+
+def _move_to_stats(future, result: PhasedResult):
+    future.stats[PHASES_KEY] = result.phases
+    if result.resources is not None:
+        future.stats[RESOURCES_KEY] = result.resources
+    io_stats = result.io_stats
+    if io_stats is not None and io_stats.backends:
+        future.stats[STORAGE_OPS_KEY] = io_stats.counts()
+        future.stats[STORAGE_IO_KEY] = io_stats.to_dict()
+
+
+def unwrap_phases(futures: list, values: list) -> list:
+    # Moves the phases, resource samples and storage requests of every
+    # worker into its stats and hands back the plain return values. Workers
+    # that made no storage request get no storage keys.
+    unwrapped = []
+    for future, value in zip(futures, values):
+        if isinstance(value, PhasedResult):
+            _move_to_stats(future, value)
+            value = value.value
+        unwrapped.append(value)
+    return unwrapped
+
+
+def unwrap_failed(futures: list):
+    # Same for the failed calls among the futures, once their status was
+    # fetched: Lithops keeps the exception it rebuilt in _exception. An
+    # exception that did not pickle comes back without the record.
+    for future in futures:
+        exc_info = getattr(future, "_exception", None)
+        if future.error and isinstance(exc_info, tuple):
+            result = getattr(exc_info[1], PHASED_ATTR, None)
+            if isinstance(result, PhasedResult):
+                _move_to_stats(future, result)
+
+
+def fetch_phases(executor: FunctionExecutor, futures: list) -> list:
+    # Results of futures nobody fetched, such as losing backups, with what
+    # their workers recorded moved into their stats
+    if not futures:
+        return []
+    values = executor.get_result(futures, throw_except=False)
+    unwrap_failed(futures)
+    return unwrap_phases(futures, values)
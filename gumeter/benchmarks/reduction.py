@@ -0,0 +1,128 @@
+import os
+import time
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    List
+)
+
+from lithops import FunctionExecutor
+import cloudpickle as pickle
+
+from gumeter.benchmarks.base import run_stage
+from gumeter.benchmarks.phases import phase
+from gumeter.benchmarks.storage import InstrumentedStorage
+
+
+DEFAULT_FAN_IN = 4
+
+
+class ReduceStrategy(Enum):
+    DRIVER = "driver"
+    FUNCTION = "function"
+    TREE = "tree"
+
+
+def put_partial(
+    bucket: str,
+    key: str,
+    value: Any
+) -> str:
+    storage = InstrumentedStorage()
+    body = pickle.dumps(value)
+    with phase("write"):
+        storage.put_object(
+            bucket=bucket,
+            key=key,
+            body=body
+        )
+    return key
+
+
+def reduce_partials(
+    keys: List[str],
+    combine: Callable,
+    bucket: str,
+    out_key: str = None
+):
+    storage = InstrumentedStorage()
+    partials = []
+    with phase("read"):
+        for key in keys:
+            body = storage.get_object(
+                bucket=bucket,
+                key=key
+            )
+            partials.append(pickle.loads(body))
+    with phase("combine"):
+        value = combine(partials)
+    # The last level hands the value back to the driver directly
+    if out_key is None:
+        return value
+    return put_partial(bucket, out_key, value)
+
+
+def parallel_reduce(
+    executor: FunctionExecutor,
+    map_results: list,
+    combine: Callable,
+    results: dict,
+    bucket: str,
+    prefix: str,
+    strategy: str = ReduceStrategy.FUNCTION.value,
+    fan_in: int = DEFAULT_FAN_IN,
+    first_stage: int = 1
+):
+    # With DRIVER, map results are the partial values themselves; otherwise
+    # they are the storage keys the maps wrote them to. FUNCTION is a tree
+    # with a single level. Every reduce level is recorded as a stage.
+    strategy = ReduceStrategy(strategy)
+    if strategy == ReduceStrategy.TREE and fan_in < 2:
+        raise ValueError("Tree reduction requires a fan-in of at least 2.")
+
+    reduce_start = time.time()
+    if strategy == ReduceStrategy.DRIVER:
+        value = combine(map_results)
+        fan_in = None
+    else:
+        if strategy == ReduceStrategy.FUNCTION:
+            fan_in = max(len(map_results), 1)
+        keys = map_results
+        level = 0
+        stage = first_stage
+        while True:
+            groups = [
+                keys[i:i + fan_in] for i in range(0, len(keys), fan_in)
+            ]
+            last_level = len(groups) == 1
+            iterdata = [
+                {
+                    "keys": group,
+                    "combine": combine,
+                    "bucket": bucket,
+                    "out_key": None if last_level else os.path.join(
+                        prefix,
+                        f"reduce_{level}_{group_i}"
+                    )
+                }
+                for group_i, group in enumerate(groups)
+            ]
+            keys = run_stage(
+                executor,
+                results,
+                stage,
+                reduce_partials,
+                iterdata
+            )
+            if last_level:
+                value = keys[0]
+                break
+            level += 1
+            stage += 1
+
+    results["reduce_strategy"] = strategy.value
+    results["reduce_fan_in"] = fan_in
+    results["reduce_time"] = time.time() - reduce_start
+
+    return value
@@ -0,0 +1,66 @@
+import importlib
+from importlib.metadata import entry_points
+from typing import (
+    Dict,
+    Type
+)
+
+from gumeter.benchmarks.base import Benchmark
+
+
+ENTRY_POINT_GROUP = "gumeter.benchmarks"
+BUILTIN_BENCHMARK_MODULES = [
+    "gumeter.benchmarks.flops.flops",
+    "gumeter.benchmarks.stream.stream",
+    "gumeter.benchmarks.terasort.terasort",
+    "gumeter.benchmarks.mandelbrot.mandelbrot",
+    "gumeter.benchmarks.montecarlo_pi.montecarlo_pi",
+    "gumeter.benchmarks.montecarlo_stock.montecarlo_stock"
+]
+
+_BENCHMARKS: Dict[str, Type[Benchmark]] = {}
+_loaded = False
+
+
+def register_benchmark(cls: Type[Benchmark]) -> Type[Benchmark]:
+    if not cls.name:
+        raise ValueError(f"Benchmark class {cls.__name__} has no name.")
+    registered = _BENCHMARKS.get(cls.name)
+    if registered is not None and registered is not cls:
+        raise ValueError(f"Benchmark '{cls.name}' is already registered.")
+    _BENCHMARKS[cls.name] = cls
+    return cls
+
+
+def _load_benchmarks():
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    for module in BUILTIN_BENCHMARK_MODULES:
+        importlib.import_module(module)
+    # Third-party packages expose their Benchmark subclasses as e.g.
+    # [project.entry-points."gumeter.benchmarks"] my_bench = "pkg.mod:MyBench"
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            register_benchmark(entry_point.load())
+        except Exception as e:
+            print(
+                f"\033[93mCould not load benchmark '{entry_point.name}' "
+                f"from {entry_point.value}: {e}\033[0m"
+            )
+
+
+def get_benchmark(name: str) -> Type[Benchmark]:
+    _load_benchmarks()
+    if name not in _BENCHMARKS:
+        raise ValueError(
+            f"Unknown benchmark '{name}'. Available benchmarks are: "
+            f"{list(_BENCHMARKS)}."
+        )
+    return _BENCHMARKS[name]
+
+
+def list_benchmarks() -> Dict[str, Type[Benchmark]]:
+    _load_benchmarks()
+    return dict(_BENCHMARKS)
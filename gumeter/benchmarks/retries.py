@@ -0,0 +1,75 @@
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Union
+)
+
+
+# Results key holding the retry policy of the run
+RETRIES_KEY = "retries"
+# Results key, and FLOPS/STREAM configuration key, holding the failures of
+# every stage: counts and the stats of every failed attempt
+FAILURES_KEY = "failures"
+
+RetryPolicy = Union[int, Dict[str, int]]
+
+
+def parse_retries(policy: RetryPolicy) -> RetryPolicy:
+    # A policy is a retry count for every stage, or a mapping from stage
+    # number to retry count where missing stages are not retried. Stage
+    # numbers are kept as strings, as they are once stored in JSON.
+    if isinstance(policy, dict):
+        policy = {str(stage): count for stage, count in policy.items()}
+    counts = policy.values() if isinstance(policy, dict) else [policy or 0]
+    for count in counts:
+        if not isinstance(count, int) or count < 0:
+            raise ValueError(
+                f"Retries must be non-negative integers, got {count!r}."
+            )
+    return policy
+
+
+def stage_retries(policy: RetryPolicy, stage: int) -> int:
+    if isinstance(policy, dict):
+        return policy.get(str(stage), 0)
+    return policy or 0
+
+
+def new_failures(tasks: int) -> dict:
+    return {
+        "tasks": tasks,
+        "failed_attempts": 0,
+        "retried": 0,
+        "lost": 0,
+        "failed": []
+    }
+
+
+def stage_failures(data: dict, stage_key: str) -> dict:
+    return data.get(FAILURES_KEY, {}).get(stage_key)
+
+
+def iter_failures(data: dict) -> Iterator[dict]:
+    # Failure records of every stage, or of every FLOPS/STREAM configuration
+    yield from data.get(FAILURES_KEY, {}).values()
+    for config in data.get("configs", []):
+        if FAILURES_KEY in config:
+            yield config[FAILURES_KEY]
+
+
+def failed_workers(data: dict) -> List[dict]:
+    # Stats of the attempts that failed, billed although their work is lost
+    return [
+        worker_stats
+        for failures in iter_failures(data)
+        for worker_stats in failures["failed"]
+    ]
+
+
+def failure_counts(data: dict) -> Dict[str, int]:
+    counts = dict.fromkeys(["tasks", "failed_attempts", "retried", "lost"], 0)
+    for failures in iter_failures(data):
+        for name in counts:
+            counts[name] += failures[name]
+    return counts
@@ -0,0 +1,143 @@
+import threading
+import time
+from typing import (
+    Dict,
+    List
+)
+
+
+# Worker stats key holding the resource samples of a worker
+RESOURCES_KEY = "resources"
+MIN_SAMPLE_INTERVAL = 0.05
+# Past this many samples every other one is dropped and the interval
+# doubled, so long workers keep a bounded, evenly spaced series
+MAX_SAMPLES = 1024
+SAMPLE_COLUMNS = ["t", "cpu_percent", "rss_mb", "net_sent", "net_recv"]
+
+
+def psutil_available() -> bool:
+    try:
+        import psutil  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def check_sample_interval(interval: float):
+    if interval is not None and interval < MIN_SAMPLE_INTERVAL:
+        raise ValueError(
+            f"The sample interval must be at least {MIN_SAMPLE_INTERVAL}s."
+        )
+
+
+class ResourceSampler:
+
+    def __init__(
+        self,
+        interval: float,
+        max_samples: int = MAX_SAMPLES
+    ):
+        # Samples the CPU use of the worker process (percent of one CPU),
+        # its RSS and the bytes sent and received since the sampler started
+        check_sample_interval(interval)
+        self.interval = interval
+        self.max_samples = max_samples
+        self.samples: Dict[str, List[float]] = {
+            column: [] for column in SAMPLE_COLUMNS
+        }
+        # Kept apart from the series, as thinning it can drop the peak
+        self.peak_rss_mb = 0.0
+        # Time spent taking samples, the cost of sampling to the worker
+        self.overhead = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "ResourceSampler":
+        start = time.perf_counter()
+        import psutil
+        self._psutil = psutil
+        self._process = psutil.Process()
+        self._process.cpu_percent(None)
+        net = psutil.net_io_counters()
+        self._net_base = (net.bytes_sent, net.bytes_recv)
+        self._start = time.time()
+        self.overhead += time.perf_counter() - start
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        sample_start = time.perf_counter()
+        net = self._psutil.net_io_counters()
+        values = [
+            round(time.time() - self._start, 3),
+            round(self._process.cpu_percent(None), 1),
+            round(self._process.memory_info().rss / 2**20, 1),
+            net.bytes_sent - self._net_base[0],
+            net.bytes_recv - self._net_base[1]
+        ]
+        for column, value in zip(SAMPLE_COLUMNS, values):
+            self.samples[column].append(value)
+        self.peak_rss_mb = max(self.peak_rss_mb, values[2])
+        if len(self.samples["t"]) > self.max_samples:
+            for column in SAMPLE_COLUMNS:
+                self.samples[column] = self.samples[column][1::2]
+            self.interval *= 2
+        self.overhead += time.perf_counter() - sample_start
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        elapsed = time.time() - self._start
+        return {
+            "interval": self.interval,
+            **self.samples,
+            "peak_rss_mb": self.peak_rss_mb,
+            "overhead_s": self.overhead,
+            "overhead_fraction": self.overhead / elapsed if elapsed else 0.0
+        }
+
+
+def start_sampler(interval: float) -> ResourceSampler:
+    # Without psutil in the runtime the worker runs unsampled
+    if not interval or not psutil_available():
+        return None
+    return ResourceSampler(interval).start()
+
+
+def summarize_resources(stats: List[dict]) -> dict:
+    # Averages over the sampled workers of a stage: mean CPU use, peak RSS
+    # (MiB) and network throughput (MiB/s), to tell CPU-bound from
+    # network-bound stages
+    sampled = [w[RESOURCES_KEY] for w in stats if RESOURCES_KEY in w]
+    if not sampled:
+        return None
+    summaries = []
+    for resources in sampled:
+        elapsed = resources["t"][-1] if resources["t"] else 0.0
+        scale = 1 / 2**20 / elapsed if elapsed else 0.0
+        cpu = resources["cpu_percent"]
+        # Samples stored before the running peak only have the series
+        peak_rss_mb = resources.get(
+            "peak_rss_mb",
+            max(resources["rss_mb"], default=0.0)
+        )
+        summaries.append({
+            "cpu_percent": sum(cpu) / len(cpu) if cpu else 0.0,
+            "peak_rss_mb": peak_rss_mb,
+            "net_sent_mib_s": resources["net_sent"][-1] * scale,
+            "net_recv_mib_s": resources["net_recv"][-1] * scale,
+            "overhead_fraction": resources["overhead_fraction"]
+        })
+    return {
+        "workers": len(summaries),
+        **{
+            name: sum(s[name] for s in summaries) / len(summaries)
+            for name in summaries[0]
+        }
+    }
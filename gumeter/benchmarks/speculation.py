@@ -0,0 +1,240 @@
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List
+)
+
+import numpy as np
+from lithops import FunctionExecutor
+from lithops.wait import ALWAYS
+
+from gumeter.benchmarks.phases import (
+    fetch_phases,
+    unwrap_failed
+)
+
+
+# Results key holding the speculation percentile of the run
+SPECULATION_KEY = "speculation"
+# Results key holding, per stage, the backups speculation launched: counts
+# and the stats of the attempts whose result was not used
+BACKUPS_KEY = "backups"
+DEFAULT_SPECULATION_PERCENTILE = 75
+
+_local = threading.local()
+
+
+def parse_speculation(percentile: float) -> float:
+    # None or 0 disables speculation
+    if not percentile:
+        return None
+    if not 0 < percentile < 100:
+        raise ValueError(
+            f"Speculation percentile must be between 0 and 100, got "
+            f"{percentile!r}."
+        )
+    return float(percentile)
+
+
+def _succeeded(future) -> bool:
+    return not future.error and (future.ready or future.success or future.done)
+
+
+def _submitted(future) -> float:
+    return future.stats["host_job_create_tstamp"]
+
+
+class Speculator:
+    # Launches a backup copy of every task still running past the given
+    # percentile of the durations of the finished tasks, once that share of
+    # the tasks finished, and keeps the first attempt to succeed. Durations
+    # run from the submission of the attempt. A task gets a single backup.
+    #
+    # Backups run on the same input as the task and write the same storage
+    # keys, so a speculated task must write the same bytes on every
+    # attempt: the losing attempt can still overwrite the winner's output.
+
+    def __init__(self, percentile: float):
+        self.percentile = parse_speculation(percentile)
+        self.executor = None
+        self.func = None
+        self.iterdata = []
+        self.attempts: List[List] = []
+        # Every attempt, backups appended in launch order
+        self.futures: List = []
+        self.threshold = None
+        self.kept = None
+        self.failed = []
+
+    def start(
+        self,
+        executor: FunctionExecutor,
+        func: Callable,
+        iterdata: List[Any],
+        futures: List
+    ):
+        self.executor = executor
+        self.func = func
+        self.iterdata = iterdata
+        self.attempts = [[future] for future in futures]
+        self.futures = list(futures)
+        self.kept = None
+        self.failed = []
+
+    def _winner(self, task: int):
+        # First attempt to succeed, None while none did
+        succeeded = [f for f in self.attempts[task] if _succeeded(f)]
+        if not succeeded:
+            return None
+        return min(succeeded, key=lambda f: f.stats["worker_end_tstamp"])
+
+    def _finished(self, task: int) -> bool:
+        attempts = self.attempts[task]
+        return (
+            self._winner(task) is not None
+            or all(future.error for future in attempts)
+        )
+
+    def poll(self) -> bool:
+        # Launches the backups due; True once every task finished
+        tasks = len(self.attempts)
+        finished = [i for i in range(tasks) if self._finished(i)]
+        if len(finished) == tasks:
+            return True
+        durations = [
+            winner.stats["worker_end_tstamp"] - _submitted(winner)
+            for winner in map(self._winner, finished)
+            if winner is not None
+        ]
+        if not durations or len(finished) < self.percentile / 100 * tasks:
+            return False
+        self.threshold = float(np.percentile(durations, self.percentile))
+        now = time.time()
+        finished = set(finished)
+        late = [
+            i for i in range(tasks)
+            if i not in finished
+            and len(self.attempts[i]) == 1
+            and now - _submitted(self.attempts[i][0]) > self.threshold
+        ]
+        if late:
+            backups = self.executor.map(
+                self.func,
+                [self.iterdata[i] for i in late]
+            )
+            for i, backup in zip(late, backups):
+                self.attempts[i].append(backup)
+                self.futures.append(backup)
+        return False
+
+    def winners(self) -> List:
+        # The attempt kept for every task, the last one when all failed;
+        # chosen once, as losers finishing later must not replace it
+        if self.kept is None:
+            self.kept = [
+                self._winner(i) or attempts[-1]
+                for i, attempts in enumerate(self.attempts)
+            ]
+        return self.kept
+
+    def failed_attempts(self) -> List[dict]:
+        # Stats of the failed attempts other than the ones kept
+        winners = self.winners()
+        self.failed = [
+            future
+            for winner, attempts in zip(winners, self.attempts)
+            for future in attempts
+            if future.error and future is not winner
+        ]
+        unwrap_failed(self.failed)
+        return [future.stats for future in self.failed]
+
+    def record(self) -> dict:
+        # Losing attempts still running are abandoned: the run waits for
+        # them before its teardown, see settle_backups
+        winners = self.winners()
+        losers = [
+            future
+            for winner, attempts in zip(winners, self.attempts)
+            for future in attempts
+            if future is not winner
+            and not any(future is failed for failed in self.failed)
+        ]
+        if losers:
+            self.executor.wait(
+                losers,
+                throw_except=False,
+                return_when=ALWAYS,
+                show_progressbar=False
+            )
+        abandoned = [f for f in losers if "worker_end_tstamp" not in f.stats]
+        # Losers were billed for their storage requests too
+        fetch_phases(
+            self.executor,
+            [f for f in losers if "worker_end_tstamp" in f.stats]
+        )
+        record = {
+            "tasks": len(self.attempts),
+            "percentile": self.percentile,
+            "threshold": self.threshold,
+            "backups": len(self.futures) - len(self.attempts),
+            "backup_wins": sum(
+                1 for winner, attempts in zip(winners, self.attempts)
+                if _succeeded(winner) and winner is not attempts[0]
+            ),
+            "losers": [
+                f.stats for f in losers if "worker_end_tstamp" in f.stats
+            ],
+            "abandoned": len(abandoned),
+            "unsettled": 0,
+            "unsettled_seconds": 0.0
+        }
+        if abandoned:
+            if not hasattr(_local, "abandoned"):
+                _local.abandoned = []
+            _local.abandoned.append((self.executor, abandoned, record))
+        return record
+
+
+def settle_backups():
+    # Waits for the attempts the stages of this thread abandoned, so none
+    # writes after the benchmark removed its data, and bills them for the
+    # time they ran. Attempts lost without reporting their end stay
+    # unsettled, billed from their submission to now.
+    pending, _local.abandoned = getattr(_local, "abandoned", []), []
+    for executor, futures, record in pending:
+        executor.wait(futures, throw_except=False, show_progressbar=False)
+        fetch_phases(
+            executor,
+            [f for f in futures if "worker_end_tstamp" in f.stats]
+        )
+        now = time.time()
+        for future in futures:
+            if "worker_end_tstamp" in future.stats:
+                record["losers"].append(future.stats)
+            else:
+                record["unsettled"] += 1
+                record["unsettled_seconds"] += now - _submitted(future)
+
+
+def iter_backups(data: dict) -> Iterator[dict]:
+    yield from data.get(BACKUPS_KEY, {}).values()
+
+
+def stage_backups(data: dict, stage_key: str) -> dict:
+    return data.get(BACKUPS_KEY, {}).get(stage_key)
+
+
+def backup_counts(data: dict) -> Dict[str, int]:
+    counts = dict.fromkeys(
+        ["tasks", "backups", "backup_wins", "abandoned"],
+        0
+    )
+    for backups in iter_backups(data):
+        for name in counts:
+            counts[name] += backups[name]
+    return counts
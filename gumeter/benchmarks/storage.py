@@ -0,0 +1,111 @@
+import time
+from typing import (
+    Dict,
+    List,
+    Optional
+)
+
+from lithops import Storage
+
+from gumeter.benchmarks.iostats import record_storage_op
+from gumeter.benchmarks.phases import count_bytes
+
+
+def _body_size(body) -> int:
+    # Streamed bodies are not read here, their size is unknown
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    return 0
+
+
+class InstrumentedStorage(Storage):
+    # Lithops Storage counting every request of a worker by backend and
+    # operation, with its bytes and latency. Bytes are also credited to the
+    # open phase. A call is counted as one request, even a listing the backend paginates.
+
+    def _timed(self, call, *args, **kwargs):
+        start = time.perf_counter()
+        result = call(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+    def put_object(self, bucket: str, key: str, body):
+        result, seconds = self._timed(
+            super().put_object,
+            bucket,
+            key,
+            body
+        )
+        nbytes = _body_size(body)
+        record_storage_op(self.backend, "put", nbytes, seconds)
+        count_bytes(nbytes)
+        return result
+
+    def get_object(
+        self,
+        bucket: str,
+        key: str,
+        stream: Optional[bool] = False,
+        extra_get_args: Optional[Dict] = {}
+    ):
+        result, seconds = self._timed(
+            super().get_object,
+            bucket,
+            key,
+            stream=stream,
+            extra_get_args=extra_get_args
+        )
+        nbytes = _body_size(result)
+        record_storage_op(self.backend, "get", nbytes, seconds)
+        count_bytes(nbytes)
+        return result
+
+    def head_object(self, bucket: str, key: str) -> Dict:
+        # Billed as a GET by the object stores
+        result, seconds = self._timed(super().head_object, bucket, key)
+        record_storage_op(self.backend, "get", 0, seconds)
+        return result
+
+    def list_objects(
+        self,
+        bucket: str,
+        prefix: Optional[str] = None,
+        match_pattern: Optional[str] = None
+    ) -> List[Dict]:
+        result, seconds = self._timed(
+            super().list_objects,
+            bucket,
+            prefix,
+            match_pattern
+        )
+        record_storage_op(self.backend, "list", 0, seconds)
+        return result
+
+    def list_keys(self, bucket: str, prefix: str = None) -> List[str]:
+        result, seconds = self._timed(
+            super().list_keys,
+            bucket,
+            prefix
+        )
+        record_storage_op(self.backend, "list", 0, seconds)
+        return result
+
+    def delete_object(self, bucket: str, key: str):
+        result, seconds = self._timed(
+            super().delete_object,
+            bucket,
+            key
+        )
+        record_storage_op(self.backend, "delete", 0, seconds)
+        return result
+
+    def delete_objects(self, bucket: str, key_list: List[str]):
+        # A single batched request
+        result, seconds = self._timed(
+            super().delete_objects,
+            bucket,
+            key_list
+        )
+        record_storage_op(self.backend, "delete", 0, seconds)
+        return result
@@ -0,0 +1,178 @@
+import time
+import numpy as np
+
+from lithops import FunctionExecutor
+
+from gumeter.config import MAX_TASKS
+from gumeter.benchmarks.base import (
+    Benchmark,
+    BenchmarkContext,
+    Param,
+    map_with_retries
+)
+from gumeter.benchmarks.phases import phase
+from gumeter.benchmarks.registry import register_benchmark
+from gumeter.benchmarks.retries import (
+    FAILURES_KEY,
+    stage_retries
+)
+
+
+ARRAY_SIZES = [10_000_000]  # float64 elements per array
+DTYPE = np.float64
+NTIMES = 10
+SCALAR = 3.0
+# Elements per block of triad; its scaled block stays in cache, so only
+# the three arrays travel through memory
+TRIAD_BLOCK = 32_768
+# Arrays read plus written per element, as counted by STREAM
+KERNEL_ARRAYS = {
+    "copy": 2,
+    "scale": 2,
+    "add": 3,
+    "triad": 3
+}
+
+
+def compute_bandwidth(
+    ntimes,
+    array_size
+):
+
+    with phase("setup"):
+        a = np.full(array_size, 1.0, dtype=DTYPE)
+        b = np.full(array_size, 2.0, dtype=DTYPE)
+        c = np.zeros(array_size, dtype=DTYPE)
+        scaled = np.empty(min(TRIAD_BLOCK, array_size), dtype=DTYPE)
+
+    kernel_times = {kernel: [] for kernel in KERNEL_ARRAYS}
+    with phase("kernels"):
+        for i in range(ntimes):
+            start = time.perf_counter()
+            np.copyto(c, a)
+            kernel_times["copy"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            np.multiply(c, SCALAR, out=b)
+            kernel_times["scale"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            np.add(a, b, out=c)
+            kernel_times["add"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for lo in range(0, array_size, TRIAD_BLOCK):
+                hi = min(lo + TRIAD_BLOCK, array_size)
+                block = scaled[:hi - lo]
+                np.multiply(c[lo:hi], SCALAR, out=block)
+                np.add(b[lo:hi], block, out=a[lo:hi])
+            kernel_times["triad"].append(time.perf_counter() - start)
+
+    # Best time per kernel, skipping the first pass as STREAM does
+    bandwidth = {}
+    for kernel, times in kernel_times.items():
+        best = min(times[1:]) if len(times) > 1 else times[0]
+        kernel_bytes = KERNEL_ARRAYS[kernel] * array_size * a.itemsize
+        bandwidth[kernel] = kernel_bytes / best
+
+    return {'bandwidth': bandwidth}
+
+
+def benchmark(
+    fexec: FunctionExecutor,
+    workers: int = MAX_TASKS,
+    ntimes: int = NTIMES,
+    array_size: int = ARRAY_SIZES[0],
+    sample_interval: float = None,
+    retries: int = 0
+):
+    iterable = [(ntimes, array_size) for i in range(workers)]
+    start_time = time.time()
+    worker_futures, results, failures = map_with_retries(
+        fexec,
+        compute_bandwidth,
+        iterable,
+        f"array_size={array_size}",
+        retries,
+        sample_interval
+    )
+    end_time = time.time()
+    results = [res for res in results if res is not None]
+    worker_stats = [f.stats for f in worker_futures if not f.error]
+    total_time = end_time-start_time
+
+    print(f"[{array_size} elements] Total time:", round(total_time, 3))
+    executed_tasks = len(worker_stats)
+    bytes_per_pass = (
+        sum(KERNEL_ARRAYS.values()) * array_size * np.dtype(DTYPE).itemsize
+    )
+    est_bytes = executed_tasks * ntimes * bytes_per_pass
+    worker_gbps = {
+        kernel: [res['bandwidth'][kernel] / 1e9 for res in results]
+        for kernel in KERNEL_ARRAYS
+    }
+    aggregate_gbps = {
+        kernel: sum(values) for kernel, values in worker_gbps.items()
+    }
+    mean_gbps = {
+        kernel: sum(values) / len(values) if values else 0.0
+        for kernel, values in worker_gbps.items()
+    }
+    print(
+        f"[{array_size} elements] Triad GB/s per worker:",
+        round(mean_gbps["triad"], 4),
+        "aggregate:",
+        round(aggregate_gbps["triad"], 4)
+    )
+
+    res = {
+        'start_time': start_time,
+        'total_time': total_time,
+        'est_bytes': est_bytes,
+        'gbps': est_bytes / 1e9 / total_time,
+        'worker_gbps': mean_gbps,
+        'aggregate_gbps': aggregate_gbps,
+        'worker_stats': worker_stats,
+        FAILURES_KEY: failures,
+        'results': results,
+        'workers': executed_tasks,
+        'ntimes': ntimes,
+        'array_size': array_size
+    }
+
+    return res
+
+
+@register_benchmark
+class StreamBenchmark(Benchmark):
+    name = "stream"
+    description = "STREAM copy/scale/add/triad memory bandwidth per worker."
+    params = {
+        "tasks": Param(int, MAX_TASKS, "Number of workers."),
+        "array_sizes": Param(
+            int,
+            ARRAY_SIZES,
+            "Float64 elements per array to sweep.",
+            many=True
+        ),
+        "ntimes": Param(int, NTIMES, "Passes over the kernels per worker.")
+    }
+    workers_param = "tasks"
+    size_param = "ntimes"
+    size_unit = "kernel passes"
+
+    def setup(self, ctx: BenchmarkContext):
+        self.fexec = ctx.executor()
+
+    def run_stages(self, ctx: BenchmarkContext, results: dict):
+        results["configs"] = [
+            benchmark(
+                self.fexec,
+                ctx.params["tasks"],
+                ntimes=ctx.params["ntimes"],
+                array_size=array_size,
+                sample_interval=ctx.sample_interval,
+                retries=stage_retries(ctx.retries, i)
+            )
+            for i, array_size in enumerate(ctx.params["array_sizes"])
+        ]
@@ -1,4 +1,3 @@
-import time
 from typing import (
     Dict,
     List,
@@ -12,21 +11,21 @@ from lithops import (
 import pandas as pd
 import numpy as np
 import pickle
-import json
 
-from gumeter.backend.code_engine import get_docker_username_from_config
 from gumeter.config import (
-    BACKEND_MEMORY,
-    DOCKER_BACKENDS,
-    INPUT_BUCKET,
-    RESULTS_DIR,
-    RUNTIME_NAMES,
-    TAGS
+    BACKEND_STORAGE,
+    Backend
 )
-from gumeter.utils import (
-    get_fname_w_replica_num,
-    remove_objects
+from gumeter.benchmarks.base import (
+    Benchmark,
+    BenchmarkContext,
+    Param,
+    run_stage
 )
+from gumeter.benchmarks.phases import phase
+from gumeter.benchmarks.registry import register_benchmark
+from gumeter.benchmarks.storage import InstrumentedStorage
+from gumeter.utils import remove_objects
 
 
 MIN_CHAR_ASCII = 32
@@ -173,8 +172,8 @@ def mapper(
     partition_prefix: str = "part_",
     storage_backend: str = None
 ):
-    input_storage = Storage()
-    storage = Storage(backend=storage_backend)
+    input_storage = InstrumentedStorage()
+    storage = InstrumentedStorage(backend=storage_backend)
 
     lower_bound, upper_bound = get_read_range(
         data_size=data_size,
@@ -182,28 +181,32 @@ def mapper(
         num_partitions=num_mappers
     )
 
-    chunk = read_input(
-        storage=input_storage,
-        bucket=bucket,
-        key=key,
-        lower_bound=lower_bound,
-        upper_bound=upper_bound
-    )
+    with phase("read"):
+        chunk = read_input(
+            storage=input_storage,
+            bucket=bucket,
+            key=key,
+            lower_bound=lower_bound,
+            upper_bound=upper_bound
+        )
     print("Read %d bytes of input" % (len(chunk)))
 
-    parsed_data = parse_input(chunk)
+    with phase("parse"):
+        parsed_data = parse_input(chunk)
 
-    partitioned_data = partition_data(
-        data=parsed_data,
-        num_partitions=num_reducers
-    )
+    with phase("partition"):
+        partitioned_data = partition_data(
+            data=parsed_data,
+            num_partitions=num_reducers
+        )
 
-    write_partitions(
-        storage=storage,
-        bucket=bucket,
-        partition_prefix=f"{partition_prefix}mapper_{mapper_id}",
-        partitions=partitioned_data
-    )
+    with phase("write"):
+        write_partitions(
+            storage=storage,
+            bucket=bucket,
+            partition_prefix=f"{partition_prefix}mapper_{mapper_id}",
+            partitions=partitioned_data
+        )
 
 
 def read_partitions(
@@ -251,10 +254,11 @@ def write_output(
     df: pd.DataFrame
 ):
 
+    body = pickle.dumps(df)
     storage.put_object(
         bucket=bucket,
         key=output_key,
-        body=pickle.dumps(df)
+        body=body
     )
 
 
@@ -267,145 +271,135 @@ def reducer(
     storage_backend: str = None
 ):
 
-    output_storage = Storage()
-    storage = Storage(backend=storage_backend)
+    output_storage = InstrumentedStorage()
+    storage = InstrumentedStorage(backend=storage_backend)
 
-    partition_list = read_partitions(
-        storage=storage,
-        bucket=bucket,
-        partition_prefix=partition_prefix,
-        num_mappers=num_mappers,
-        reducer_id=reducer_id
-    )
+    with phase("read"):
+        partition_list = read_partitions(
+            storage=storage,
+            bucket=bucket,
+            partition_prefix=partition_prefix,
+            num_mappers=num_mappers,
+            reducer_id=reducer_id
+        )
 
-    concatenated_data = concat_partitions(partition_list)
+    with phase("concat"):
+        concatenated_data = concat_partitions(partition_list)
 
-    sorted_data = sort_dataframe(concatenated_data)
+    with phase("sort"):
+        sorted_data = sort_dataframe(concatenated_data)
 
     output_key = f"{out_prefix}_reducer_{reducer_id}.pkl"
-    write_output(
-        storage=output_storage,
-        bucket=bucket,
-        output_key=output_key,
-        df=sorted_data
-    )
+    with phase("write"):
+        write_output(
+            storage=output_storage,
+            bucket=bucket,
+            output_key=output_key,
+            df=sorted_data
+        )
 
     return output_key
 
 
-def run_terasort(
-    backend,
-    storage,
-    num_tasks: int = NUM_TASKS,
-    outdir: str = RESULTS_DIR,
-    log_level: str = "INFO"
-):
-
-    runtime = RUNTIME_NAMES.get(backend)
-    tag = TAGS.get(backend)
-    memory = BACKEND_MEMORY.get(backend)
-    runtime = f"{runtime}:{tag}"
-    if backend in DOCKER_BACKENDS:
-        docker_username = get_docker_username_from_config()
-        runtime = f"{docker_username}/{runtime}"
-    bucket = INPUT_BUCKET.get(backend)
-
-    if backend == "aws_lambda_redis":
-        executor_backend = "aws_lambda"
-        executor_storage = "aws_s3"
-    else:
-        executor_backend = backend
-        executor_storage = storage
-
-    fexec = FunctionExecutor(
-        backend=executor_backend,
-        storage=executor_storage,
-        runtime_memory=memory,
-        log_level=log_level,
-        runtime=runtime
-    )
-
-    data_size = int(fexec.storage.head_object(
-        bucket=bucket,
-        key=FILE_NAME
-    )['content-length'])
-
-    num_mappers = num_tasks // 2
-    mapper_args = [
-        {
-            "bucket": bucket,
-            "key": FILE_NAME,
-            "data_size": data_size,
-            "mapper_id": mapper_id,
-            "num_mappers": num_mappers,
-            "num_reducers": num_tasks,
-            "partition_prefix": PARTITION_PREFIX,
-            "storage_backend": storage
-        }
-        for mapper_id in range(num_mappers)
-    ]
-    reducer_args = [
-        {
-            "bucket": bucket,
-            "partition_prefix": PARTITION_PREFIX,
-            "num_mappers": num_mappers,
-            "reducer_id": reducer_id,
-            "out_prefix": OUTPUT_PREFIX,
-            "storage_backend": storage
-        }
-        for reducer_id in range(num_tasks)
-    ]
-
-    results = {}
-    results["start_time"] = time.time()
-
-    mapper_futures = fexec.map(
-        mapper,
-        mapper_args
-    )
-    fexec.wait(mapper_futures)
-    mapper_stats = [f.stats for f in mapper_futures if not f.error]
-    results["stage0"] = mapper_stats
-    results["stage0_time"] = time.time()
-
-    print("Stage 0 completed, starting Stage 1...")
-
-    fexec = FunctionExecutor(
-        backend=executor_backend,
-        storage=executor_storage,
-        runtime_memory=memory,
-        log_level=log_level,
-        runtime=runtime
-    )
-
-    reducer_futures = fexec.map(
-        reducer,
-        reducer_args
-    )
-    fexec.wait(
-        reducer_futures
-    )
-    reducer_stats = [f.stats for f in reducer_futures if not f.error]
-    results["stage1"] = reducer_stats
+@register_benchmark
+class TerasortBenchmark(Benchmark):
+    name = "terasort"
+    description = "TeraSort over a 5 GB input with a map and a reduce stage."
+    params = {
+        "num_tasks": Param(
+            int,
+            NUM_TASKS,
+            "Number of reducers, half as many mappers."
+        )
+    }
+    # The input dataset is fixed, so sweeps only scale strongly
+    workers_param = "num_tasks"
+
+    def supports_backend(self, backend: str) -> bool:
+        return True
+
+    def executor_backends(self, ctx: BenchmarkContext) -> Tuple[str, str]:
+        # With Redis, Lambda functions shuffle through Redis but keep
+        # reading the input from and writing the output to S3
+        if ctx.backend == Backend.AWS_LAMBDA_REDIS.value:
+            return (
+                Backend.AWS_LAMBDA.value,
+                BACKEND_STORAGE[Backend.AWS_LAMBDA.value]
+            )
+        return ctx.backend, ctx.storage
+
+    def executor(self, ctx: BenchmarkContext) -> FunctionExecutor:
+        backend, storage = self.executor_backends(ctx)
+        return ctx.executor(backend=backend, storage=storage)
+
+    def setup(self, ctx: BenchmarkContext):
+        self.fexec = self.executor(ctx)
+        self.data_size = int(self.fexec.storage.head_object(
+            bucket=ctx.bucket,
+            key=FILE_NAME
+        )['content-length'])
+
+    def run_stages(self, ctx: BenchmarkContext, results: dict):
+        num_tasks = ctx.params["num_tasks"]
+        results["data_size"] = self.data_size
+        num_mappers = num_tasks // 2
+        mapper_args = [
+            {
+                "bucket": ctx.bucket,
+                "key": FILE_NAME,
+                "data_size": self.data_size,
+                "mapper_id": mapper_id,
+                "num_mappers": num_mappers,
+                "num_reducers": num_tasks,
+                "partition_prefix": PARTITION_PREFIX,
+                "storage_backend": ctx.storage
+            }
+            for mapper_id in range(num_mappers)
+        ]
+        reducer_args = [
+            {
+                "bucket": ctx.bucket,
+                "partition_prefix": PARTITION_PREFIX,
+                "num_mappers": num_mappers,
+                "reducer_id": reducer_id,
+                "out_prefix": OUTPUT_PREFIX,
+                "storage_backend": ctx.storage
+            }
+            for reducer_id in range(num_tasks)
+        ]
+
+        run_stage(
+            self.fexec,
+            results,
+            0,
+            mapper,
+            mapper_args,
+            fetch_results=False
+        )
 
-    results["end_time"] = time.time()
+        print("Stage 0 completed, starting Stage 1...")
 
-    fname = f"terasort_{backend}.json"
-    fdir = f"{outdir}/{fname}"
-    fdir = get_fname_w_replica_num(
-        fname=fdir
-    )
-    json.dump(results, open(fdir, "w"))
-    print(f"Results saved to {fdir}")
+        self.fexec = self.executor(ctx)
+        run_stage(
+            self.fexec,
+            results,
+            1,
+            reducer,
+            reducer_args,
+            fetch_results=False
+        )
 
-    print("\033[93m\033[1mRemoving intermediate terasort data - this may take a while...\033[0m")
-    remove_objects(
-        storage=fexec.storage,
-        bucket=bucket,
-        prefix=PARTITION_PREFIX
-    )
-    remove_objects(
-        storage=fexec.storage,
-        bucket=bucket,
-        prefix=OUTPUT_PREFIX
-    )
+    def teardown(self, ctx: BenchmarkContext):
+        print("\033[93m\033[1mRemoving intermediate terasort data - this may take a while...\033[0m")
+        _, storage_backend = self.executor_backends(ctx)
+        storage = Storage(backend=storage_backend)
+        remove_objects(
+            storage=storage,
+            bucket=ctx.bucket,
+            prefix=PARTITION_PREFIX
+        )
+        remove_objects(
+            storage=storage,
+            bucket=ctx.bucket,
+            prefix=OUTPUT_PREFIX
+        )
@@ -1,16 +1,5 @@
-from lithops import FunctionExecutor
-from lithops.wait import wait
-
-from gumeter.backend.code_engine import get_docker_username_from_config
-from gumeter.config import (
-    BACKEND_MEMORY,
-    DOCKER_BACKENDS,
-    MAX_TASKS,
-    RUNTIME_NAMES,
-    TAGS,
-    BACKEND_STORAGE,
-    Backend
-)
+from gumeter.benchmarks.base import BenchmarkContext
+from gumeter.config import MAX_TASKS
 
 
 def mock(x):
@@ -22,23 +11,13 @@ def run_warm_up(
     times: int = 3,
     log_level: str = "INFO"
 ):
-    storage = BACKEND_STORAGE[backend]
-    runtime = RUNTIME_NAMES.get(backend)
-    tag = TAGS.get(backend)
-    memory = BACKEND_MEMORY.get(backend)
-    runtime = f"{runtime}:{tag}"
-    if backend in DOCKER_BACKENDS:
-        docker_username = get_docker_username_from_config()
-        runtime = f"{docker_username}/{runtime}"
+    ctx = BenchmarkContext(
+        backend=backend,
+        log_level=log_level
+    )
 
     for _ in range(times):
-        fexec = FunctionExecutor(
-            backend=backend,
-            storage=storage,
-            runtime_memory=memory,
-            log_level=log_level,
-            runtime=runtime
-        )
+        fexec = ctx.executor()
 
         futures = fexec.map(
             mock,
@@ -0,0 +1,403 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from typing import (
+    Dict,
+    List
+)
+
+import yaml
+
+from gumeter.adaptive import (
+    StoppingRule,
+    load_result
+)
+from gumeter.benchmarks.benchmarks import (
+    resolve_benchmark_params,
+    run_replica
+)
+from gumeter.benchmarks.retries import (
+    RetryPolicy,
+    parse_retries
+)
+from gumeter.benchmarks.speculation import parse_speculation
+from gumeter.benchmarks.warm_up import run_warm_up
+from gumeter.config import RESULTS_DIR
+from gumeter.ledger import (
+    COMPLETED,
+    FAILED,
+    PLANNED,
+    RUNNING,
+    RunLedger
+)
+from gumeter.sweep import (
+    grid,
+    sweep_points
+)
+
+
+def load_plan(path: str) -> dict:
+    with open(path, "r") as f:
+        if path.endswith(".json"):
+            plan = json.load(f)
+        else:
+            plan = yaml.safe_load(f)
+    # Runs of a campaign are found again on --resume by its name
+    plan.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return plan
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def params_hash(params: dict) -> str:
+    encoded = json.dumps(params, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()[:8]
+
+
+def _new_run(
+    campaign: str,
+    config_id: str,
+    benchmark: str,
+    backend: str,
+    params: dict,
+    replica: int,
+    stopping: StoppingRule = None,
+    runtime_memory: int = None,
+    sample_interval: float = None,
+    retries: RetryPolicy = None,
+    speculation: float = None
+) -> dict:
+    return {
+        "id": f"{campaign}/{config_id}:{replica}",
+        "config_id": config_id,
+        "benchmark": benchmark,
+        "backend": backend,
+        "params": params,
+        "runtime_memory": runtime_memory,
+        "sample_interval": sample_interval,
+        "retries": retries,
+        "speculation": speculation,
+        "replica": replica,
+        "stopping": stopping,
+        "status": PLANNED,
+        "result_file": None,
+        "error": None,
+        "start_time": None,
+        "end_time": None
+    }
+
+
+def expand_plan(plan: dict) -> List[dict]:
+    # Every entry is a grid of benchmarks x backends x memory sizes,
+    # repeated `replicas` times with the same parameters. A sweep entry
+    # further multiplies it by its workers x problem size points. An
+    # adaptive entry, whose replicas is a stopping rule, starts with its
+    # minimum and grows while running.
+    runs = []
+    campaign = plan.get("name", "campaign")
+    for entry in plan.get("runs", []):
+        benchmarks = _as_list(entry.get("benchmarks", entry.get("benchmark")))
+        backends = _as_list(entry.get("backends", entry.get("backend")))
+        if not benchmarks or not backends:
+            raise ValueError(
+                f"Campaign entry {entry} needs benchmarks and backends."
+            )
+        replicas = entry.get("replicas", 1)
+        stopping = None
+        if isinstance(replicas, dict):
+            stopping = StoppingRule.from_dict(replicas)
+            replicas = stopping.min_replicas
+        for benchmark in benchmarks:
+            points = [{}]
+            if "sweep" in entry:
+                points = sweep_points(benchmark, entry["sweep"])
+            memories = grid(entry.get("memory"))
+            for backend in backends:
+                for point, memory in product(points, memories):
+                    params = resolve_benchmark_params(
+                        benchmark,
+                        backend,
+                        {**entry.get("params", {}), **point}
+                    )
+                    config_id = f"{benchmark}:{backend}:{params_hash(params)}"
+                    if memory is not None:
+                        config_id = f"{config_id}:{memory}MB"
+                    for replica in range(replicas):
+                        runs.append(_new_run(
+                            campaign,
+                            config_id,
+                            benchmark,
+                            backend,
+                            params,
+                            replica,
+                            stopping,
+                            memory,
+                            entry.get("sample_interval"),
+                            parse_retries(entry.get("retries")),
+                            parse_speculation(entry.get("speculation"))
+                        ))
+    return runs
+
+
+class CampaignState:
+
+    def __init__(
+        self,
+        runs: List[dict],
+        ledger: RunLedger
+    ):
+        # The ledger is the persistent record, this is the in-memory view
+        # shared by the backend threads
+        self.runs = runs
+        self.ledger = ledger
+        self.lock = threading.Lock()
+        # Replicas and achieved CI per configuration
+        self.reports: Dict[str, dict] = {}
+
+    def update(self, run: dict, **fields):
+        with self.lock:
+            run.update(fields)
+
+    def config_runs(self, config_id: str) -> List[dict]:
+        with self.lock:
+            return [run for run in self.runs if run["config_id"] == config_id]
+
+    def evaluate(self, config_id: str) -> dict:
+        config_runs = self.config_runs(config_id)
+        stopping = config_runs[0]["stopping"] or StoppingRule(None)
+        report = stopping.evaluate(
+            [
+                load_result(run["result_file"])
+                for run in config_runs if run["status"] == COMPLETED
+            ],
+            sum(run["status"] in (COMPLETED, FAILED) for run in config_runs)
+        )
+        if config_runs[0]["stopping"] is None:
+            report["stop_reason"] = "fixed"
+        with self.lock:
+            self.reports[config_id] = report
+        return report
+
+    def extend(self, config_id: str) -> dict:
+        # Plans one more replica of an adaptive configuration unless its
+        # stopping rule is met; returns the new run, if any
+        report = self.evaluate(config_id)
+        if report["stop_reason"] is not None:
+            return None
+        config_runs = self.config_runs(config_id)
+        last = max(config_runs, key=lambda run: run["replica"])
+        run = _new_run(
+            last["id"].split("/", 1)[0],
+            config_id,
+            last["benchmark"],
+            last["backend"],
+            last["params"],
+            last["replica"] + 1,
+            last["stopping"],
+            last["runtime_memory"],
+            last["sample_interval"],
+            last.get("retries"),
+            last.get("speculation")
+        )
+        self.ledger.add_run(
+            run["benchmark"],
+            run["backend"],
+            run["params"],
+            run_id=run["id"],
+            campaign=run["id"].split("/", 1)[0]
+        )
+        with self.lock:
+            self.runs.append(run)
+        return run
+
+    def pending(self, config_id: str) -> bool:
+        return any(
+            run["status"] in (PLANNED, RUNNING)
+            for run in self.config_runs(config_id)
+        )
+
+    def counts(self) -> Dict[str, int]:
+        counts = {PLANNED: 0, RUNNING: 0, COMPLETED: 0, FAILED: 0}
+        for run in self.runs:
+            counts[run["status"]] += 1
+        return counts
+
+
+def _run_backend(
+    backend: str,
+    runs: List[dict],
+    state: CampaignState,
+    out_dir: str,
+    warmup: bool
+):
+    # Replicas on one backend run one after another so they do not
+    # compete for the same account quotas
+    if warmup:
+        print(f"\033[95m\033[1m[{backend}] Warming up...\033[0m")
+        run_warm_up(backend)
+    queue = deque(runs)
+    while queue:
+        run = queue.popleft()
+        print(
+            f"\033[95m\033[1m[{backend}] Running {run['benchmark']} "
+            f"replica {run['replica'] + 1}...\033[0m"
+        )
+        state.update(run, status=RUNNING, start_time=time.time())
+        try:
+            result_file = run_replica(
+                run["benchmark"],
+                backend,
+                run["params"],
+                out_dir,
+                run_id=run["id"],
+                ledger=state.ledger,
+                runtime_memory=run["runtime_memory"],
+                sample_interval=run["sample_interval"],
+                retries=run.get("retries"),
+                speculation=run.get("speculation")
+            )
+        except Exception as e:
+            traceback.print_exc()
+            state.update(
+                run,
+                status=FAILED,
+                error=repr(e),
+                end_time=time.time()
+            )
+            print(
+                f"\033[91m\033[1m[{backend}] {run['benchmark']} "
+                f"replica {run['replica'] + 1} failed: {e}\033[0m"
+            )
+        else:
+            state.update(
+                run,
+                status=COMPLETED,
+                result_file=result_file,
+                end_time=time.time()
+            )
+            counts = state.counts()
+            print(
+                f"\033[1;32m\033[1m[{backend}] {run['benchmark']} replica "
+                f"{run['replica'] + 1} finished ({counts[COMPLETED]}/"
+                f"{len(state.runs)} runs completed)\033[0m"
+            )
+        if run["stopping"] is not None and not state.pending(run["config_id"]):
+            new_run = state.extend(run["config_id"])
+            if new_run is not None:
+                queue.append(new_run)
+
+
+def _plan_runs(
+    runs: List[dict],
+    ledger: RunLedger,
+    campaign: str,
+    resume: bool
+):
+    # A fresh campaign resets its runs to planned; a resumed one keeps the
+    # ledger's record and only the runs never completed are executed again
+    if not resume:
+        ledger.clear_campaign(campaign)
+    for run in runs:
+        ledger.add_run(
+            run["benchmark"],
+            run["backend"],
+            run["params"],
+            run_id=run["id"],
+            campaign=campaign,
+            replace=not resume
+        )
+    recorded = ledger.get_runs(campaign)
+    for run in runs:
+        if recorded[run["id"]]["status"] == COMPLETED:
+            run["status"] = COMPLETED
+            run["result_file"] = recorded[run["id"]]["result_file"]
+    if not resume:
+        return
+    # Adaptive configurations may have completed replicas past their minimum
+    adaptive = {run["config_id"]: run for run in runs if run["stopping"]}
+    planned_ids = {run["id"] for run in runs}
+    for run_id, record in recorded.items():
+        config_id, replica = run_id.split("/", 1)[1].rsplit(":", 1)
+        if (
+            config_id in adaptive
+            and run_id not in planned_ids
+            and record["status"] == COMPLETED
+        ):
+            first = adaptive[config_id]
+            run = _new_run(
+                campaign,
+                config_id,
+                first["benchmark"],
+                first["backend"],
+                first["params"],
+                int(replica),
+                first["stopping"],
+                first["runtime_memory"],
+                first["sample_interval"],
+                first.get("retries"),
+                first.get("speculation")
+            )
+            run["status"] = COMPLETED
+            run["result_file"] = record["result_file"]
+            runs.append(run)
+
+
+def run_campaign(
+    plan: dict,
+    out_dir: str = None,
+    resume: bool = False
+) -> CampaignState:
+    out_dir = out_dir or plan.get("output_dir", RESULTS_DIR)
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    runs = expand_plan(plan)
+    state = CampaignState(runs, RunLedger(out_dir))
+    _plan_runs(runs, state.ledger, plan.get("name", "campaign"), resume)
+    config_ids = list(dict.fromkeys(run["config_id"] for run in runs))
+    # A resumed adaptive configuration may already need more replicas
+    for config_id in config_ids:
+        first = state.config_runs(config_id)[0]
+        if first["stopping"] is not None and not state.pending(config_id):
+            state.extend(config_id)
+
+    runs_per_backend = {}
+    for run in state.runs:
+        if run["status"] == COMPLETED:
+            continue
+        runs_per_backend.setdefault(run["backend"], []).append(run)
+    if resume:
+        print(
+            f"\033[95m\033[1mResuming campaign: "
+            f"{state.counts()[COMPLETED]} of {len(runs)} runs already "
+            f"completed\033[0m"
+        )
+
+    with ThreadPoolExecutor(max_workers=max(len(runs_per_backend), 1)) as pool:
+        futures = [
+            pool.submit(
+                _run_backend,
+                backend,
+                backend_runs,
+                state,
+                out_dir,
+                plan.get("warmup", False)
+            )
+            for backend, backend_runs in runs_per_backend.items()
+        ]
+        for future in futures:
+            future.result()
+
+    for config_id in config_ids:
+        state.evaluate(config_id)
+    return state
@@ -1,11 +1,73 @@
 import argparse
+import os
+import sys
 
+import numpy as np
+
+from gumeter.adaptive import (
+    DEFAULT_CONFIDENCE,
+    DEFAULT_MAX_REPLICAS,
+    DEFAULT_MIN_REPLICAS,
+    METRICS,
+    StoppingRule,
+    format_report,
+    load_result
+)
 from gumeter.benchmarks.benchmarks import (
     run_benchmark,
     run_all_benchmarks
 )
+from gumeter.benchmarks.registry import list_benchmarks
+from gumeter.benchmarks.speculation import DEFAULT_SPECULATION_PERCENTILE
 from gumeter.benchmarks.warm_up import run_warm_up
+from gumeter.campaign import (
+    COMPLETED,
+    FAILED,
+    load_plan,
+    run_campaign
+)
+from gumeter.compare import (
+    COMPARE_TESTS,
+    DEFAULT_ALPHA,
+    MANN_WHITNEY,
+    compare_results,
+    format_change,
+    format_comparison,
+    inconclusive,
+    regressions
+)
+from gumeter.latency import (
+    cold_start_table,
+    format_latency_table,
+    latency_table
+)
+from gumeter.metrics_cache import (
+    RUN_METRICS,
+    MetricsCache
+)
 from gumeter.plotting.plotting import generate_plots
+from gumeter.store import (
+    JSON,
+    PARQUET,
+    ResultsStore
+)
+from gumeter.stragglers import (
+    DEFAULT_STRAGGLER_THRESHOLD,
+    critical_path,
+    find_stragglers,
+    format_critical_path,
+    format_stragglers
+)
+from gumeter.sweep import (
+    SCALING_MODES,
+    STRONG,
+    format_table,
+    load_results,
+    parse_grid,
+    run_sweep_tables,
+    scaling_table
+)
+from gumeter.trace import export_trace
 from gumeter.config import (
     PLOTS_DIR,
     RESULTS_DIR,
@@ -13,7 +75,10 @@ from gumeter.config import (
 )
 from gumeter.runtime.runtime import deploy_runtime, clean_backend
 from gumeter.backend.set_config import set_config
-from gumeter.utils import push_data_to_storage
+from gumeter.utils import (
+    parse_params,
+    push_data_to_storage
+)
 
 
 def main():
@@ -57,6 +122,86 @@ def main():
         default=1,
         help="Number of replicas to run for the benchmark.",
     )
+    run_parser.add_argument(
+        "--target-ci",
+        type=float,
+        default=None,
+        help=(
+            "Add replicas until the CI half-width relative to the mean "
+            "falls below this value (e.g., 0.05); overrides --num-replicas."
+        ),
+    )
+    run_parser.add_argument(
+        "--ci-metric",
+        type=str,
+        default="time",
+        choices=list(METRICS),
+        help="Metric the confidence interval is computed on.",
+    )
+    run_parser.add_argument(
+        "--confidence",
+        type=float,
+        default=DEFAULT_CONFIDENCE,
+        help="Confidence level of the interval.",
+    )
+    run_parser.add_argument(
+        "--min-replicas",
+        type=int,
+        default=DEFAULT_MIN_REPLICAS,
+        help="Replicas to run before checking the CI target.",
+    )
+    run_parser.add_argument(
+        "--max-replicas",
+        type=int,
+        default=DEFAULT_MAX_REPLICAS,
+        help="Maximum number of replicas with --target-ci.",
+    )
+    run_parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="Maximum summed cost (USD) of the replicas with --target-ci.",
+    )
+    run_parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=None,
+        help="Sample CPU, RSS and network of every worker at this interval "
+             "in seconds (default: no sampling).",
+    )
+    run_parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Resubmit every failed call up to this many times.",
+    )
+    run_parser.add_argument(
+        "--speculative",
+        type=float,
+        nargs="?",
+        const=DEFAULT_SPECULATION_PERCENTILE,
+        default=None,
+        metavar="PERCENTILE",
+        help="Launch a backup of every task running past this percentile "
+             "of the finished tasks' durations, keeping the first result "
+             f"({DEFAULT_SPECULATION_PERCENTILE} if given without a value).",
+    )
+    run_parser.add_argument(
+        "--monitor",
+        action="store_true",
+        help="Show live progress, concurrency and cost of every stage.",
+    )
+    run_parser.add_argument(
+        "--param",
+        type=str,
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help=(
+            "Benchmark parameter, may be repeated "
+            "(e.g., 'reduce_strategy=tree' 'fan_in=8')."
+        ),
+    )
 
     # --- Run all benchmarks ---
     run_all_parser = subparsers.add_parser(
@@ -80,6 +225,303 @@ def main():
         default=1,
         help="Number of replicas to run for each benchmark.",
     )
+    run_all_parser.add_argument(
+        "--monitor",
+        action="store_true",
+        help="Show live progress, concurrency and cost of every stage.",
+    )
+
+    # --- Run a campaign ---
+    campaign_parser = subparsers.add_parser(
+        "campaign",
+        help=(
+            "Run a plan of benchmarks x backends x replicas, "
+            "backends concurrently."
+        )
+    )
+    campaign_parser.add_argument(
+        "plan",
+        type=str,
+        help="Path to the campaign plan (YAML or JSON).",
+    )
+    campaign_parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Directory to save the results (overrides the plan).",
+    )
+    campaign_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the runs the ledger already records as completed.",
+    )
+
+    # --- Sweep a benchmark ---
+    sweep_parser = subparsers.add_parser(
+        "sweep",
+        help=(
+            "Run a benchmark over worker counts, memory and problem sizes "
+            "and print its scaling tables."
+        )
+    )
+    sweep_parser.add_argument(
+        "benchmark_name",
+        type=str,
+        help="Name of the benchmark to sweep."
+    )
+    sweep_parser.add_argument(
+        "--backend",
+        type=str,
+        default="aws_lambda",
+        choices=[b.value for b in Backend],
+        help="Backend to use for the benchmark.",
+    )
+    sweep_parser.add_argument(
+        "--workers",
+        type=str,
+        required=True,
+        help="Worker counts, '1,2,4' or geometric 'start:stop:factor'.",
+    )
+    sweep_parser.add_argument(
+        "--memory",
+        type=str,
+        default=None,
+        help="Runtime memory sizes in MB, '1024,2048' or 'start:stop:factor'.",
+    )
+    sweep_parser.add_argument(
+        "--size",
+        type=str,
+        default=None,
+        help=(
+            "Problem sizes: total with --mode strong, per worker with "
+            "--mode weak (default: the benchmark's own)."
+        ),
+    )
+    sweep_parser.add_argument(
+        "--mode",
+        type=str,
+        default=STRONG,
+        choices=SCALING_MODES,
+        help="Scaling mode of the sweep.",
+    )
+    sweep_parser.add_argument(
+        "--num-replicas",
+        type=int,
+        default=1,
+        help="Number of replicas of every sweep point.",
+    )
+    sweep_parser.add_argument(
+        "--param",
+        type=str,
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Fixed benchmark parameter, may be repeated.",
+    )
+    sweep_parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=RESULTS_DIR,
+        help="Directory to save the results.",
+    )
+    sweep_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the sweep points the ledger records as completed.",
+    )
+
+    # --- Scaling tables ---
+    scaling_parser = subparsers.add_parser(
+        "scaling",
+        help="Compute scaling tables from stored benchmark results."
+    )
+    scaling_parser.add_argument(
+        "--results-dir",
+        type=str,
+        default=RESULTS_DIR,
+        help="Path to the directory containing benchmark results.",
+    )
+    scaling_parser.add_argument(
+        "--mode",
+        type=str,
+        default=STRONG,
+        choices=SCALING_MODES,
+        help="Scaling mode of the table.",
+    )
+    scaling_parser.add_argument(
+        "--csv",
+        type=str,
+        default=None,
+        help="Also write the table to this CSV file.",
+    )
+
+    # --- Ingest results into the columnar store ---
+    ingest_parser = subparsers.add_parser(
+        "ingest",
+        help="Ingest new or changed results into the columnar results store."
+    )
+    ingest_parser.add_argument(
+        "--results-dir",
+        type=str,
+        default=RESULTS_DIR,
+        help="Path to the directory containing benchmark results.",
+    )
+    ingest_parser.add_argument(
+        "--store-dir",
+        type=str,
+        default=None,
+        help="Directory of the store (default: <results-dir>/store).",
+    )
+    ingest_parser.add_argument(
+        "--format",
+        type=str,
+        default=None,
+        choices=[PARQUET, JSON],
+        help="Storage format (default: Parquet if pyarrow is installed).",
+    )
+
+    # --- Per-run metrics ---
+    metrics_parser = subparsers.add_parser(
+        "metrics",
+        help="Compute the metrics of new or changed results and summarize them."
+    )
+    metrics_parser.add_argument(
+        "--results-dir",
+        type=str,
+        default=RESULTS_DIR,
+        help="Path to the directory containing benchmark results.",
+    )
+    metrics_parser.add_argument(
+        "--benchmark",
+        type=str,
+        default=None,
+        help="Only summarize this benchmark.",
+    )
+    metrics_parser.add_argument(
+        "--backend",
+        type=str,
+        default=None,
+        help="Only summarize this backend.",
+    )
+
+    # --- Latency report ---
+    report_parser = subparsers.add_parser(
+        "report",
+        help="Report invocation latency percentiles and cold starts."
+    )
+    report_parser.add_argument(
+        "--results-dir",
+        type=str,
+        default=RESULTS_DIR,
+        help="Path to the directory containing benchmark results.",
+    )
+    report_parser.add_argument(
+        "--benchmark",
+        type=str,
+        default=None,
+        help="Only report this benchmark.",
+    )
+    report_parser.add_argument(
+        "--backend",
+        type=str,
+        default=None,
+        help="Only report this backend.",
+    )
+
+    # --- Regressions between two result sets ---
+    compare_parser = subparsers.add_parser(
+        "compare",
+        help=(
+            "Test a candidate result set against a baseline and exit with "
+            "an error on significant regressions."
+        )
+    )
+    compare_parser.add_argument(
+        "baseline_dir",
+        type=str,
+        help="Directory with the baseline results.",
+    )
+    compare_parser.add_argument(
+        "candidate_dir",
+        type=str,
+        help="Directory with the results to check.",
+    )
+    compare_parser.add_argument(
+        "--test",
+        type=str,
+        default=MANN_WHITNEY,
+        choices=COMPARE_TESTS,
+        help="Mann-Whitney U test, or bootstrap CI on the mean difference.",
+    )
+    compare_parser.add_argument(
+        "--alpha",
+        type=float,
+        default=DEFAULT_ALPHA,
+        help="Significance level.",
+    )
+    compare_parser.add_argument(
+        "--min-change",
+        type=float,
+        default=0.0,
+        help=(
+            "Ignore significant changes smaller than this, relative to "
+            "the baseline (e.g., 0.05)."
+        ),
+    )
+    compare_parser.add_argument(
+        "--benchmark",
+        type=str,
+        default=None,
+        help="Only compare this benchmark.",
+    )
+    compare_parser.add_argument(
+        "--backend",
+        type=str,
+        default=None,
+        help="Only compare this backend.",
+    )
+
+    # --- Stragglers and critical path ---
+    stragglers_parser = subparsers.add_parser(
+        "stragglers",
+        help="Find the stragglers of every stage and the critical path of a run."
+    )
+    stragglers_parser.add_argument(
+        "result_file",
+        type=str,
+        help="Results file of the run.",
+    )
+    stragglers_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_STRAGGLER_THRESHOLD,
+        help="Workers slower than this many times the stage median "
+             f"straggle (default: {DEFAULT_STRAGGLER_THRESHOLD}).",
+    )
+
+    # --- Trace export ---
+    trace_parser = subparsers.add_parser(
+        "trace",
+        help="Export a run as a Chrome Trace Event file for Perfetto."
+    )
+    trace_parser.add_argument(
+        "result_file",
+        type=str,
+        help="Results file of the run.",
+    )
+    trace_parser.add_argument(
+        "--output",
+        "-o",
+        type=str,
+        default=None,
+        help="Trace file, gzipped if it ends in .gz "
+             "(default: <result name>.trace.json in the current directory).",
+    )
+
+    # --- List benchmarks ---
+    subparsers.add_parser(
+        "list", help="List available benchmarks and their parameters."
+    )
 
     # --- Get plots ---
     plot_parser = subparsers.add_parser(
@@ -190,7 +632,21 @@ def main():
         run_benchmark(
             args.benchmark_name,
             args.backend,
-            num_replicas=args.num_replicas
+            out_dir=args.output_dir,
+            num_replicas=args.num_replicas,
+            params=parse_params(args.param),
+            stopping=StoppingRule(
+                target_rel_ci=args.target_ci,
+                metric=args.ci_metric,
+                confidence=args.confidence,
+                min_replicas=args.min_replicas,
+                max_replicas=args.max_replicas,
+                budget=args.budget
+            ) if args.target_ci is not None else None,
+            sample_interval=args.sample_interval,
+            monitor=args.monitor,
+            retries=args.retries,
+            speculation=args.speculative
         )
         print(
             f"\033[1;32m\033[1mBenchmark {args.benchmark_name}",
@@ -204,13 +660,185 @@ def main():
         )
         all_results = run_all_benchmarks(
             args.backend,
-            num_replicas=args.num_replicas
+            out_dir=args.output_dir,
+            num_replicas=args.num_replicas,
+            monitor=args.monitor
         )
         print(
             "\033[1;32m\033[1mAll benchmark results:",
             f"{all_results}\033[0m"
         )
         # Save all results to a file for plotting later
+    elif args.command == "campaign":
+        state = run_campaign(
+            load_plan(args.plan),
+            out_dir=args.output_dir,
+            resume=args.resume
+        )
+        for config_id, report in state.reports.items():
+            print(format_report(config_id, report))
+        counts = state.counts()
+        color = "\033[91m" if counts[FAILED] else "\033[1;32m"
+        print(
+            f"{color}\033[1mCampaign finished: {counts[COMPLETED]} runs "
+            f"completed, {counts[FAILED]} failed\033[0m"
+        )
+        if counts[FAILED]:
+            sys.exit(1)
+    elif args.command == "sweep":
+        plan = {
+            "name": f"sweep_{args.benchmark_name}_{args.backend}",
+            "runs": [{
+                "benchmark": args.benchmark_name,
+                "backend": args.backend,
+                "params": parse_params(args.param),
+                "memory": parse_grid(args.memory),
+                "replicas": args.num_replicas,
+                "sweep": {
+                    "workers": parse_grid(args.workers),
+                    "size": parse_grid(args.size),
+                    "mode": args.mode
+                }
+            }]
+        }
+        state = run_campaign(
+            plan,
+            out_dir=args.output_dir,
+            resume=args.resume
+        )
+        result_files = [
+            run["result_file"] for run in state.runs
+            if run["status"] == COMPLETED
+        ]
+        table = run_sweep_tables(result_files, (args.mode,))[args.mode]
+        print(f"\033[1m{args.mode.capitalize()} scaling:\033[0m")
+        print(format_table(table))
+        if state.counts()[FAILED]:
+            sys.exit(1)
+    elif args.command == "scaling":
+        table = scaling_table(load_results(args.results_dir), args.mode)
+        print(format_table(table))
+        if args.csv:
+            table.to_csv(args.csv, index=False)
+            print(f"\033[1;32m\033[1mTable saved to '{args.csv}'\033[0m")
+    elif args.command == "ingest":
+        store = ResultsStore(
+            args.store_dir or os.path.join(args.results_dir, "store"),
+            fmt=args.format
+        )
+        summary = store.ingest(args.results_dir)
+        print(
+            f"\033[1;32m\033[1mIngested into '{store.store_dir}' "
+            f"({store.fmt}): {summary['added']} added, {summary['updated']} "
+            f"updated, {summary['removed']} removed, {summary['unchanged']} "
+            f"unchanged\033[0m"
+        )
+    elif args.command == "metrics":
+        cache = MetricsCache(args.results_dir)
+        summary = cache.update()
+        print(
+            f"\033[1m{summary['computed']} runs computed, "
+            f"{summary['cached']} cached, {summary['removed']} "
+            f"removed\033[0m"
+        )
+        groups = {}
+        for run in cache.runs(args.benchmark, args.backend):
+            groups.setdefault((run["benchmark"], run["backend"]), []).append(
+                run["metrics"]
+            )
+        for (benchmark, backend), runs in groups.items():
+            summaries = []
+            for name in RUN_METRICS:
+                values = [m[name] for m in runs if m[name] is not None]
+                if values:
+                    summaries.append(
+                        f"{name} {np.mean(values):.4g} ± {np.std(values):.2g}"
+                    )
+            print(
+                f"{benchmark} on {backend} ({len(runs)} runs): "
+                f"{', '.join(summaries)}"
+            )
+    elif args.command == "report":
+        cache = MetricsCache(args.results_dir)
+        cache.update()
+        runs = cache.runs(args.benchmark, args.backend)
+        print("\033[1mInvocation latency (s), mean of per-run percentiles\033[0m")
+        print(format_latency_table(latency_table(runs)))
+        print("\033[1mCold starts\033[0m")
+        print(format_latency_table(cold_start_table(runs)))
+    elif args.command == "compare":
+        baseline = MetricsCache(args.baseline_dir)
+        baseline.update()
+        candidate = MetricsCache(args.candidate_dir)
+        candidate.update()
+        comparison = compare_results(
+            baseline,
+            candidate,
+            test=args.test,
+            alpha=args.alpha,
+            min_change=args.min_change,
+            benchmark=args.benchmark,
+            backend=args.backend
+        )
+        print(format_comparison(comparison))
+        regressed = regressions(comparison)
+        if len(regressed):
+            print(
+                f"\033[91m\033[1m{len(regressed)} significant "
+                "regressions:\033[0m"
+            )
+            for _, row in regressed.iterrows():
+                print(
+                    f"\033[91m  {row['benchmark']} on {row['backend']}: "
+                    f"{row['metric']} {format_change(row)}\033[0m"
+                )
+            sys.exit(1)
+        underpowered = inconclusive(comparison)
+        if len(underpowered):
+            # Too few replicas to detect anything cannot pass a gate
+            print(
+                f"\033[93m\033[1m{len(underpowered)} comparisons are "
+                f"inconclusive, their replicas cannot reach alpha "
+                f"{args.alpha:g}:\033[0m"
+            )
+            for _, row in underpowered.iterrows():
+                print(
+                    f"\033[93m  {row['benchmark']} on {row['backend']}: "
+                    f"{row['metric']} with {row['n_baseline']} vs "
+                    f"{row['n_candidate']} replicas, smallest p-value "
+                    f"{row['min_p_value']:.3g}\033[0m"
+                )
+            sys.exit(2)
+        print("\033[1;32m\033[1mNo significant regressions\033[0m")
+    elif args.command == "stragglers":
+        data = load_result(args.result_file)
+        print("\033[1mStragglers\033[0m")
+        print(format_stragglers(
+            find_stragglers(data, args.threshold),
+            args.threshold
+        ))
+        print("\033[1mCritical path\033[0m")
+        print(format_critical_path(critical_path(data)))
+    elif args.command == "trace":
+        output = args.output or (
+            os.path.splitext(os.path.basename(args.result_file))[0]
+            + ".trace.json"
+        )
+        events = export_trace(args.result_file, output)
+        print(
+            f"\033[1;32m\033[1m{events} trace events saved to '{output}', "
+            f"open it in https://ui.perfetto.dev\033[0m"
+        )
+    elif args.command == "list":
+        for name, benchmark_cls in list_benchmarks().items():
+            print(f"\033[1m{name}\033[0m: {benchmark_cls.description}")
+            for param_name, param in benchmark_cls.params.items():
+                choices = f" {param.choices}" if param.choices else ""
+                print(
+                    f"    {param_name} ({param.type.__name__}"
+                    f"{', list' if param.many else ''}, "
+                    f"default {param.default}){choices}: {param.help}"
+                )
     elif args.command == "plot":
         generate_plots(args.results_dir, args.output_dir)
         print(f"\033[1;32m\033[1mPlots saved to '{args.output_dir}'\033[0m")
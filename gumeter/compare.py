@@ -0,0 +1,216 @@
+import math
+from typing import (
+    Dict,
+    List
+)
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from gumeter.metrics_cache import MetricsCache
+
+
+MANN_WHITNEY = "mannwhitney"
+BOOTSTRAP = "bootstrap"
+COMPARE_TESTS = [MANN_WHITNEY, BOOTSTRAP]
+DEFAULT_ALPHA = 0.05
+DEFAULT_RESAMPLES = 10000
+# Replicas needed on each side before a metric is tested
+MIN_COMPARE_REPLICAS = 2
+
+# Metrics compared, and whether a higher value is the better one
+COMPARE_METRICS: Dict[str, bool] = {
+    "execution_time": False,
+    "cost": False,
+    "elasticity": True,
+    "gflops": True,
+    "failure_rate": False
+}
+
+
+def check_test(test: str, alpha: float):
+    if test not in COMPARE_TESTS:
+        raise ValueError(
+            f"Unknown test '{test}'. Valid tests are: {COMPARE_TESTS}."
+        )
+    if not 0 < alpha < 1:
+        raise ValueError("Alpha must be between 0 and 1.")
+
+
+def min_p_value(n_baseline: int, n_candidate: int) -> float:
+    # Smallest two-sided p-value of the exact Mann-Whitney test, reached
+    # when the two samples do not overlap at all
+    return min(1.0, 2 / math.comb(n_baseline + n_candidate, n_baseline))
+
+
+def mann_whitney(
+    baseline: np.ndarray,
+    candidate: np.ndarray,
+    alpha: float
+) -> dict:
+    # Two-sided rank test on the replicas, centers are medians. With few
+    # replicas the smallest reachable p-value stays above alpha, and the
+    # test is inconclusive whatever the values.
+    p_value = float(stats.mannwhitneyu(
+        baseline,
+        candidate,
+        alternative="two-sided"
+    ).pvalue)
+    min_p = min_p_value(len(baseline), len(candidate))
+    return {
+        "baseline": float(np.median(baseline)),
+        "candidate": float(np.median(candidate)),
+        "p_value": p_value,
+        "min_p_value": min_p,
+        "significant": p_value < alpha,
+        "inconclusive": min_p >= alpha
+    }
+
+
+def bootstrap_difference(
+    baseline: np.ndarray,
+    candidate: np.ndarray,
+    alpha: float,
+    resamples: int = DEFAULT_RESAMPLES,
+    seed: int = 0
+) -> dict:
+    # Percentile interval on the difference of the means (candidate minus
+    # baseline), significant when it excludes zero
+    rng = np.random.default_rng(seed)
+    baseline_means = rng.choice(
+        baseline,
+        (resamples, len(baseline))
+    ).mean(axis=1)
+    candidate_means = rng.choice(
+        candidate,
+        (resamples, len(candidate))
+    ).mean(axis=1)
+    low, high = np.percentile(
+        candidate_means - baseline_means,
+        [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    )
+    return {
+        "baseline": float(np.mean(baseline)),
+        "candidate": float(np.mean(candidate)),
+        "ci_low": float(low),
+        "ci_high": float(high),
+        "significant": bool(low > 0 or high < 0),
+        "inconclusive": False
+    }
+
+
+def compare_metric(
+    baseline: List[float],
+    candidate: List[float],
+    higher_is_better: bool,
+    test: str = MANN_WHITNEY,
+    alpha: float = DEFAULT_ALPHA,
+    min_change: float = 0.0
+) -> dict:
+    # A significant change is a regression when it goes the wrong way by at
+    # least min_change relative to the baseline
+    check_test(test, alpha)
+    baseline = np.asarray(baseline, dtype=float)
+    candidate = np.asarray(candidate, dtype=float)
+    if test == MANN_WHITNEY:
+        result = mann_whitney(baseline, candidate, alpha)
+    else:
+        result = bootstrap_difference(baseline, candidate, alpha)
+    # A zero baseline, the usual one for failure rates, has no relative
+    # change: the change is then the absolute difference, and any
+    # difference is large enough
+    delta = result["candidate"] - result["baseline"]
+    relative = bool(result["baseline"])
+    change = delta / abs(result["baseline"]) if relative else delta
+    worse = delta < 0 if higher_is_better else delta > 0
+    large = abs(change) >= min_change if relative else delta != 0
+    result["change"] = float(change)
+    result["relative"] = relative
+    result["regression"] = bool(result["significant"] and worse and large)
+    result["improvement"] = bool(
+        result["significant"] and not worse and delta != 0 and large
+    )
+    return result
+
+
+def compare_results(
+    baseline: MetricsCache,
+    candidate: MetricsCache,
+    test: str = MANN_WHITNEY,
+    alpha: float = DEFAULT_ALPHA,
+    min_change: float = 0.0,
+    benchmark: str = None,
+    backend: str = None
+) -> pd.DataFrame:
+    # One row per benchmark, backend and metric present in both result sets
+    check_test(test, alpha)
+    pairs = sorted({
+        (run["benchmark"], run["backend"])
+        for run in baseline.runs(benchmark, backend)
+    } & {
+        (run["benchmark"], run["backend"])
+        for run in candidate.runs(benchmark, backend)
+    })
+    rows = []
+    for pair in pairs:
+        for metric, higher_is_better in COMPARE_METRICS.items():
+            baseline_values = baseline.values(*pair, metric)
+            candidate_values = candidate.values(*pair, metric)
+            if (
+                len(baseline_values) < MIN_COMPARE_REPLICAS
+                or len(candidate_values) < MIN_COMPARE_REPLICAS
+            ):
+                continue
+            rows.append({
+                "benchmark": pair[0],
+                "backend": pair[1],
+                "metric": metric,
+                "n_baseline": len(baseline_values),
+                "n_candidate": len(candidate_values),
+                **compare_metric(
+                    baseline_values,
+                    candidate_values,
+                    higher_is_better,
+                    test,
+                    alpha,
+                    min_change
+                )
+            })
+    return pd.DataFrame(rows)
+
+
+def regressions(comparison: pd.DataFrame) -> pd.DataFrame:
+    if comparison.empty:
+        return comparison
+    return comparison[comparison["regression"]]
+
+
+def inconclusive(comparison: pd.DataFrame) -> pd.DataFrame:
+    # Rows whose test could not detect a change with so few replicas
+    if comparison.empty:
+        return comparison
+    return comparison[comparison["inconclusive"]]
+
+
+def format_change(row: dict) -> str:
+    # Relative changes as percentages, changes from a zero baseline as
+    # absolute differences
+    if row["relative"]:
+        return f"{row['change']:+.1%}"
+    return f"{row['change']:+.4g} (abs)"
+
+
+def format_comparison(comparison: pd.DataFrame) -> str:
+    if comparison.empty:
+        return (
+            f"No benchmark and backend with at least {MIN_COMPARE_REPLICAS} "
+            "replicas in both result sets."
+        )
+    display = comparison.assign(change=[
+        format_change(row) for _, row in comparison.iterrows()
+    ])
+    return display.to_string(
+        index=False,
+        float_format=lambda value: f"{value:.4g}"
+    )
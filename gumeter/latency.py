@@ -0,0 +1,142 @@
+from typing import (
+    Callable,
+    Dict,
+    List
+)
+
+import numpy as np
+import pandas as pd
+
+from gumeter.store import iter_stages
+
+
+PERCENTILES = [50, 95, 99]
+
+# Each component from the Lithops stats of a single worker, in seconds
+LATENCY_COMPONENTS: Dict[str, Callable[[dict], float]] = {
+    # Time calls wait in the invoker of the driver before being sent
+    "queueing_delay": lambda w: (
+        w["host_submit_tstamp"] - w["host_job_create_tstamp"]
+    ),
+    # Invocation, container start and, for cold starts, runtime loading
+    "submit_to_start": lambda w: (
+        w["worker_start_tstamp"] - w["host_submit_tstamp"]
+    ),
+    # Worker process up to the user function: data download and imports
+    "worker_setup": lambda w: (
+        w["worker_func_start_tstamp"] - w["worker_start_tstamp"]
+    ),
+    # Worker end until the driver's status polling saw it done
+    "result_collection_lag": lambda w: (
+        w["host_status_done_tstamp"] - w["worker_end_tstamp"]
+    ),
+    "serialization": lambda w: w["host_job_serialize_time"]
+}
+
+
+def _component_values(workers: List[dict], component: Callable) -> list:
+    # Workers whose stats miss a timestamp are left out of that component
+    values = []
+    for worker_stats in workers:
+        try:
+            values.append(component(worker_stats))
+        except (KeyError, TypeError):
+            continue
+    return values
+
+
+def latency_stats(data: dict) -> dict:
+    # Per-run distribution of every component over all the workers of all
+    # stages, plus the fraction of cold starts
+    workers = [
+        worker_stats
+        for _, stats, _ in iter_stages(data)
+        for worker_stats in stats
+    ]
+    stats = {"workers": len(workers)}
+    for name, component in LATENCY_COMPONENTS.items():
+        values = _component_values(workers, component)
+        if not values:
+            stats[name] = None
+            continue
+        percentiles = np.percentile(values, PERCENTILES)
+        stats[name] = {
+            "mean": float(np.mean(values)),
+            **{
+                f"p{p}": float(value)
+                for p, value in zip(PERCENTILES, percentiles)
+            }
+        }
+    cold_starts = [
+        bool(w["worker_cold_start"]) for w in workers
+        if "worker_cold_start" in w
+    ]
+    stats["cold_start_fraction"] = (
+        float(np.mean(cold_starts)) if cold_starts else None
+    )
+    return stats
+
+
+def latency_table(runs: List[dict]) -> pd.DataFrame:
+    # One row per benchmark, backend and component, averaging the
+    # percentiles of every run
+    rows = []
+    for run in runs:
+        latency = run.get("latency") or {}
+        for name in LATENCY_COMPONENTS:
+            if latency.get(name) is None:
+                continue
+            rows.append({
+                "benchmark": run["benchmark"],
+                "backend": run["backend"],
+                "component": name,
+                **latency[name]
+            })
+    if not rows:
+        return pd.DataFrame()
+    table = (
+        pd.DataFrame(rows)
+        .groupby(["benchmark", "backend", "component"], sort=False)
+        .agg(
+            runs=("mean", "count"),
+            mean=("mean", "mean"),
+            **{f"p{p}": (f"p{p}", "mean") for p in PERCENTILES}
+        )
+        .reset_index()
+    )
+    return table
+
+
+def cold_start_table(runs: List[dict]) -> pd.DataFrame:
+    rows = [
+        {
+            "benchmark": run["benchmark"],
+            "backend": run["backend"],
+            "workers": run["latency"]["workers"],
+            "cold_start_fraction": run["latency"]["cold_start_fraction"]
+        }
+        for run in runs
+        if run.get("latency")
+        and run["latency"]["cold_start_fraction"] is not None
+    ]
+    if not rows:
+        return pd.DataFrame()
+    return (
+        pd.DataFrame(rows)
+        .groupby(["benchmark", "backend"], sort=False)
+        .agg(
+            runs=("workers", "count"),
+            workers=("workers", "mean"),
+            cold_start_fraction=("cold_start_fraction", "mean")
+        )
+        .reset_index()
+    )
+
+
+def format_latency_table(table: pd.DataFrame) -> str:
+    if table.empty:
+        return "No worker stats to derive latencies from."
+    return table.to_string(
+        index=False,
+        float_format=lambda value: f"{value:.4g}"
+    )
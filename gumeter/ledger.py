@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from typing import (
+    Dict,
+    List
+)
+
+
+LEDGER_FILE = "ledger.db"
+
+PLANNED = "planned"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    campaign TEXT,
+    benchmark TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    replica INTEGER,
+    result_file TEXT,
+    error TEXT,
+    planned_time REAL,
+    start_time REAL,
+    end_time REAL
+);
+CREATE TABLE IF NOT EXISTS replicas (
+    prefix TEXT PRIMARY KEY,
+    next_replica INTEGER NOT NULL
+);
+"""
+
+
+def _existing_replicas(out_dir: str, prefix: str) -> List[int]:
+    # Exact match, so terasort_aws_lambda does not count the files of
+    # terasort_aws_lambda_redis
+    pattern = re.compile(rf"^{re.escape(prefix)}_replica(\d+)\.json$")
+    if not os.path.isdir(out_dir):
+        return []
+    return [
+        int(match.group(1))
+        for match in map(pattern.match, os.listdir(out_dir))
+        if match
+    ]
+
+
+class RunLedger:
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir, exist_ok=True)
+        self.path = os.path.join(out_dir, LEDGER_FILE)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call keeps the ledger usable from the campaign
+        # threads and from concurrent gumeter processes alike
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def allocate_replica(self, prefix: str) -> int:
+        # BEGIN IMMEDIATE takes the write lock up front, so two writers can
+        # never read the same counter
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT next_replica FROM replicas WHERE prefix = ?",
+                (prefix,)
+            ).fetchone()
+            replica = max(
+                [row["next_replica"] if row else 0]
+                + [r + 1 for r in _existing_replicas(self.out_dir, prefix)]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO replicas (prefix, next_replica) "
+                "VALUES (?, ?)",
+                (prefix, replica + 1)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return replica
+
+    def add_run(
+        self,
+        benchmark: str,
+        backend: str,
+        params: dict,
+        run_id: str = None,
+        campaign: str = None,
+        replace: bool = True
+    ) -> str:
+        # With replace=False an existing run keeps its status, which is how
+        # a resumed campaign finds the work already done
+        run_id = run_id or uuid.uuid4().hex
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with closing(self._connect()) as conn:
+            conn.execute(
+                f"{verb} INTO runs (id, campaign, benchmark, backend, "
+                "params, status, planned_time) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    campaign,
+                    benchmark,
+                    backend,
+                    json.dumps(params, sort_keys=True),
+                    PLANNED,
+                    time.time()
+                )
+            )
+        return run_id
+
+    def clear_campaign(self, campaign: str):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM runs WHERE campaign = ?", (campaign,))
+
+    def _update(self, run_id: str, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                f"UPDATE runs SET {columns} WHERE id = ?",
+                (*fields.values(), run_id)
+            )
+
+    def start(self, run_id: str):
+        self._update(
+            run_id,
+            status=RUNNING,
+            error=None,
+            start_time=time.time(),
+            end_time=None
+        )
+
+    def complete(self, run_id: str, result_file: str, replica: int):
+        self._update(
+            run_id,
+            status=COMPLETED,
+            result_file=result_file,
+            replica=replica,
+            end_time=time.time()
+        )
+
+    def fail(self, run_id: str, error: str):
+        self._update(
+            run_id,
+            status=FAILED,
+            error=error,
+            end_time=time.time()
+        )
+
+    def get_runs(self, campaign: str = None) -> Dict[str, dict]:
+        query = "SELECT * FROM runs"
+        args = ()
+        if campaign is not None:
+            query += " WHERE campaign = ?"
+            args = (campaign,)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, args).fetchall()
+        runs = {}
+        for row in rows:
+            run = dict(row)
+            run["params"] = json.loads(run["params"])
+            runs[run["id"]] = run
+        return runs
@@ -2,50 +2,64 @@ from datetime import datetime
 
 import numpy as np
 
-from gumeter.config import Backend
+from gumeter.benchmarks.flops.flops import get_flops_configs
+from gumeter.benchmarks.retries import (
+    failure_counts,
+    stage_failures
+)
+from gumeter.benchmarks.speculation import (
+    backup_counts,
+    stage_backups
+)
+from gumeter.pricing import (
+    computed_gflop,
+    cost_breakdown
+)
 
-LAMBDA_COST_S = 0.0000166667 * (1679 / 1024)
-LAMBDA_REQUEST_COST = 0.2 / (10**6)
 
-# Assuming request-billing
-CLOUD_RUN_CPU_COST_S = 0.000024
-CLOUD_RUN_MEM_COST_S = 0.0000025 * (2048 / 1024)
-CLOUD_RUN_REQUEST_COST = 0.4 / (10**6)
+def get_cost(
+    backend_data_dict,
+    backend: str
+):
+    # Compute, invocation and storage request cost from the versioned
+    # pricing table, see gumeter/pricing.json
+    return cost_breakdown(backend_data_dict, backend)["total"]
 
-CODE_ENGINE_CPU_COST_S = 0.00003431
-CODE_ENGINE_MEM_COST_S = 0.00000356 * (2048 / 1024)
-CODE_ENGINE_REQUEST_COST = 0.538 / (10**6)
 
+def get_wasted_cost(
+    backend_data_dict,
+    backend: str
+):
+    # Part of the cost spent on attempts that failed
+    return cost_breakdown(backend_data_dict, backend)["wasted"]
 
-def get_cost(
+
+def get_speculative_cost(
     backend_data_dict,
     backend: str
 ):
+    # Part of the cost spent on backups, or on the tasks they replaced,
+    # whose result was not used
+    return cost_breakdown(backend_data_dict, backend)["speculative"]
 
-    cost = 0.0
-    function_times = []
-    for key, value in backend_data_dict.items():
-        if key.startswith("stage") and isinstance(value, list):
-            for v in value:
-                function_times.append(
-                    v['worker_end_tstamp'] - v['worker_start_tstamp']
-                )
 
-    num_functions = len(function_times)
-    total_function_time = sum(function_times)
+def get_backup_rate(backend_data_dict):
+    # Backups launched over tasks of the speculated stages; None for runs
+    # without speculation
+    counts = backup_counts(backend_data_dict)
+    if not counts["tasks"]:
+        return None
+    return counts["backups"] / counts["tasks"]
 
-    if backend == Backend.AWS_LAMBDA.value:
-        cost = (total_function_time * LAMBDA_COST_S) + (num_functions * LAMBDA_REQUEST_COST)
-    elif backend == Backend.GCP_CLOUDRUN.value:
-        cost = (total_function_time * CLOUD_RUN_CPU_COST_S) + \
-               (total_function_time * CLOUD_RUN_MEM_COST_S) + \
-               (num_functions * CLOUD_RUN_REQUEST_COST)
-    elif backend == Backend.CODE_ENGINE.value:
-        cost = (total_function_time * CODE_ENGINE_CPU_COST_S) + \
-               (total_function_time * CODE_ENGINE_MEM_COST_S) + \
-               (num_functions * CODE_ENGINE_REQUEST_COST)
 
-    return cost
+def get_failure_rate(backend_data_dict):
+    # Failed attempts over all attempts; None for runs that predate failure
+    # accounting
+    counts = failure_counts(backend_data_dict)
+    attempts = counts["tasks"] + counts["retried"]
+    if not attempts:
+        return None
+    return counts["failed_attempts"] / attempts
 
 
 def get_execution_time(backend_data_dict):
@@ -59,18 +73,29 @@ def get_execution_time(backend_data_dict):
     return duration
 
 
-def get_step_values(time_axis, event_times, event_counts):
-    values = []
-    if not event_times or event_times[0] > 0:
-        event_times = [0.0] + event_times
-        event_counts = [0] + event_counts
+def get_gflops(backend_data_dict):
+    # FLOPS throughput over all its configurations, each timed from its
+    # submission to its last result; None for other benchmarks
+    gflop = computed_gflop(backend_data_dict)
+    if not gflop:
+        return None
+    total_time = sum(
+        config["total_time"]
+        for config in get_flops_configs(backend_data_dict)
+    )
+    return gflop / total_time if total_time else None
 
-    event_idx = 0
-    for t in time_axis:
-        while event_idx + 1 < len(event_times) and event_times[event_idx + 1] <= t:
-            event_idx += 1
-        values.append(event_counts[event_idx])
-    return values
+
+def get_step_values(time_axis, event_times, event_counts):
+    # Value of the step function at every point of time_axis: the count of
+    # the last event at or before it. Events after the first are sorted.
+    event_times = np.asarray(event_times, dtype=float)
+    event_counts = np.asarray(event_counts)
+    if not event_times.size or event_times[0] > 0:
+        event_times = np.concatenate(([0.0], event_times))
+        event_counts = np.concatenate(([0], event_counts))
+    event_idx = np.searchsorted(event_times[1:], time_axis, side="right")
+    return event_counts[event_idx]
 
 
 def compute_normalized_efficiency_area(C_r, C_p, delta_t=0.1):
@@ -92,73 +117,97 @@ def compute_normalized_efficiency_area(C_r, C_p, delta_t=0.1):
     return efficiency_normalized
 
 
-def measure_elasticity(backend_data):
+def _to_microseconds(timestamps) -> np.ndarray:
+    # Same rounding as datetime.fromtimestamp, so durations match the ones
+    # computed from datetimes to the microsecond
+    fractions, seconds = np.modf(np.asarray(timestamps, dtype=float))
+    return (
+        seconds.astype(np.int64) * 10**6
+        + np.round(fractions * 1e6).astype(np.int64)
+    )
+
 
-    start_time_dt = datetime.fromtimestamp(backend_data['start_time'])
-    end_time_dt = datetime.fromtimestamp(backend_data['end_time'])
-    duration = (end_time_dt - start_time_dt).total_seconds()
-    time_axis = np.arange(0.0, duration + 0.1, 0.1).tolist()
-    if time_axis and time_axis[-1] < duration:
-        time_axis.append(duration)
-    time_axis = [t for t in time_axis if t <= duration + 0.001]
-
-    provisioned_events = []
-    for key, stage_workers in backend_data.items():
-        if key.startswith('stage') and isinstance(stage_workers, list):
-            for worker_stat in stage_workers:
-                worker_start_dt = datetime.fromtimestamp(worker_stat['worker_start_tstamp'])
-                worker_end_dt = datetime.fromtimestamp(worker_stat['worker_end_tstamp'])
-                norm_start = (worker_start_dt - start_time_dt).total_seconds()
-                norm_end = (worker_end_dt - start_time_dt).total_seconds()
-                provisioned_events.append((norm_start, 1))
-                provisioned_events.append((norm_end, -1))
-    provisioned_events.sort(key=lambda x: x[0])
-    provisioned_times_raw = [0.0]
-    provisioned_counts_raw = [0]
-    current_provisioned = 0
-    for time, change in provisioned_events:
-        if time > provisioned_times_raw[-1]:
-            provisioned_times_raw.append(time)
-            provisioned_counts_raw.append(current_provisioned)
-        current_provisioned += change
-        provisioned_times_raw.append(time)
-        provisioned_counts_raw.append(current_provisioned)
-    if provisioned_times_raw[-1] < duration:
-        provisioned_times_raw.append(duration)
-        provisioned_counts_raw.append(current_provisioned)
-    provisioned_cpus_values = get_step_values(time_axis, provisioned_times_raw, provisioned_counts_raw)
-    provisioned_cpus_values = [max(0, val) for val in provisioned_cpus_values]
-
-    required_events = []
-    for key, stage_workers in backend_data.items():
-        if key.startswith('stage') and isinstance(stage_workers, list) and stage_workers:
-            stage_start_dt = min(datetime.fromtimestamp(w['worker_start_tstamp']) for w in stage_workers)
-            norm_stage_start = (stage_start_dt - start_time_dt).total_seconds()
-            required_events.append((norm_stage_start, len(stage_workers)))
-            for worker_stat in stage_workers:
-                worker_end_dt = datetime.fromtimestamp(worker_stat['worker_end_tstamp'])
-                norm_worker_end = (worker_end_dt - start_time_dt).total_seconds()
-                required_events.append((norm_worker_end, -1))
-    required_events.sort(key=lambda x: x[0])
-    required_times_raw = [0.0]
-    required_counts_raw = [0]
-    current_required = 0
-    for time, change in required_events:
-        if time > required_times_raw[-1]:
-            required_times_raw.append(time)
-            required_counts_raw.append(current_required)
-        current_required += change
-        required_times_raw.append(time)
-        required_counts_raw.append(current_required)
-    if required_times_raw[-1] < duration:
-        required_times_raw.append(duration)
-        required_counts_raw.append(current_required)
-    required_cpus_values = get_step_values(time_axis, required_times_raw, required_counts_raw)
-    required_cpus_values = [max(0, val) for val in required_cpus_values]
+def _concurrency(time_axis, event_times, event_changes):
+    # Concurrency after the last event at or before every time point;
+    # a stable sort keeps the order of simultaneous events
+    order = np.argsort(event_times, kind="stable")
+    times = np.concatenate(([0.0], event_times[order]))
+    counts = np.concatenate(([0], np.cumsum(event_changes[order])))
+    return np.maximum(get_step_values(time_axis, times, counts), 0)
+
+
+def _extra_attempts(backend_data, stage_key):
+    # Failed attempts and losing speculative ones that reported their end
+    failures = stage_failures(backend_data, stage_key)
+    backups = stage_backups(backend_data, stage_key)
+    attempts = (failures["failed"] if failures else []) + (
+        backups["losers"] if backups else []
+    )
+    return [w for w in attempts if "worker_end_tstamp" in w]
+
+
+def measure_elasticity(backend_data, resolution: float = 0.1):
+
+    start_us = _to_microseconds(backend_data['start_time'])
+    duration = (
+        _to_microseconds(backend_data['end_time']) - start_us
+    ) / 10**6
+    time_axis = np.arange(0.0, duration + resolution, resolution)
+    if time_axis.size and time_axis[-1] < duration:
+        time_axis = np.append(time_axis, duration)
+    time_axis = time_axis[time_axis <= duration + 0.001]
+
+    # Failed and losing attempts held their CPU like the others, leaving
+    # them out would make a run with failures or backups look more elastic
+    stages = [
+        stage_workers + _extra_attempts(backend_data, key)
+        for key, stage_workers in backend_data.items()
+        if key.startswith('stage') and isinstance(stage_workers, list)
+        and stage_workers
+    ]
+    stage_sizes = np.array([len(workers) for workers in stages], dtype=int)
+    workers = [worker for stage_workers in stages for worker in stage_workers]
+    starts = (_to_microseconds(
+        [w['worker_start_tstamp'] for w in workers]
+    ) - start_us) / 10**6
+    ends = (_to_microseconds(
+        [w['worker_end_tstamp'] for w in workers]
+    ) - start_us) / 10**6
+
+    # Every worker provisions one CPU from its start to its end
+    provisioned_times = np.empty(2 * len(workers))
+    provisioned_times[0::2] = starts
+    provisioned_times[1::2] = ends
+    provisioned_changes = np.tile([1, -1], len(workers))
+    provisioned_cpus_values = _concurrency(
+        time_axis,
+        provisioned_times,
+        provisioned_changes
+    )
+
+    # A stage requires all its workers from its first worker start, and
+    # releases each one as it ends
+    stage_bounds = np.concatenate(([0], np.cumsum(stage_sizes)))
+    required_times = []
+    required_changes = []
+    for i, size in enumerate(stage_sizes):
+        stage_ends = ends[stage_bounds[i]:stage_bounds[i + 1]]
+        stage_starts = starts[stage_bounds[i]:stage_bounds[i + 1]]
+        required_times.append([stage_starts.min()])
+        required_changes.append([size])
+        required_times.append(stage_ends)
+        required_changes.append(np.full(size, -1))
+    required_cpus_values = _concurrency(
+        time_axis,
+        np.concatenate(required_times) if required_times else np.empty(0),
+        np.concatenate(required_changes).astype(int)
+        if required_changes else np.empty(0, dtype=int)
+    )
 
     elasticity_coefficient = compute_normalized_efficiency_area(
-        np.array(required_cpus_values),
-        np.array(provisioned_cpus_values)
+        required_cpus_values,
+        provisioned_cpus_values,
+        delta_t=resolution
     )
 
     return elasticity_coefficient
@@ -0,0 +1,204 @@
+import glob
+import json
+import os
+from typing import (
+    Callable,
+    Dict,
+    List
+)
+
+from gumeter.config import RESULTS_DIR
+from gumeter.latency import latency_stats
+from gumeter.metrics import (
+    get_backup_rate,
+    get_cost,
+    get_execution_time,
+    get_failure_rate,
+    get_gflops,
+    get_speculative_cost,
+    get_wasted_cost,
+    measure_elasticity
+)
+from gumeter.pricing import (
+    cost_per_gb,
+    cost_per_gflop,
+    pricing_version
+)
+from gumeter.store import parse_result_name
+from gumeter.utils import file_hash
+
+
+METRICS_CACHE_FILE = ".metrics_cache.json"
+# Bump whenever a metric definition changes, so cached values are recomputed
+METRICS_VERSION = 8
+
+RUN_METRICS: Dict[str, Callable[[dict, str], float]] = {
+    "execution_time": lambda data, backend: get_execution_time(data),
+    "cost": get_cost,
+    "elasticity": lambda data, backend: measure_elasticity(data),
+    "cost_per_gb": cost_per_gb,
+    "cost_per_gflop": cost_per_gflop,
+    "gflops": lambda data, backend: get_gflops(data),
+    "failure_rate": lambda data, backend: get_failure_rate(data),
+    "wasted_cost": get_wasted_cost,
+    "backup_rate": lambda data, backend: get_backup_rate(data),
+    "speculative_cost": get_speculative_cost
+}
+
+
+class MetricsCache:
+
+    def __init__(
+        self,
+        results_dir: str = RESULTS_DIR,
+        cache_path: str = None
+    ):
+        # Entries are keyed by the content hash of their result file; the
+        # file's size and mtime only spare hashing files that did not change
+        self.results_dir = results_dir
+        self.cache_path = cache_path or os.path.join(
+            results_dir,
+            METRICS_CACHE_FILE
+        )
+        self.files: Dict[str, dict] = {}
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path, "r") as f:
+                cache = json.load(f)
+            # Costs are recomputed when the pricing table changes too
+            if (
+                cache.get("version") == METRICS_VERSION
+                and cache.get("pricing") == pricing_version()
+            ):
+                self.files = cache["files"]
+                self.entries = cache["entries"]
+
+    def _save(self):
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "version": METRICS_VERSION,
+                    "pricing": pricing_version(),
+                    "files": self.files,
+                    "entries": self.entries
+                },
+                f
+            )
+        os.replace(tmp_path, self.cache_path)
+
+    def update(self) -> Dict[str, int]:
+        summary = {"computed": 0, "cached": 0, "removed": 0}
+        current = {}
+        pattern = os.path.join(self.results_dir, "*.json")
+        for path in sorted(glob.glob(pattern)):
+            identity = parse_result_name(path)
+            if identity is None:
+                continue
+            fname = os.path.basename(path)
+            stat = os.stat(path)
+            known = self.files.get(fname)
+            if (
+                known is not None
+                and known["size"] == stat.st_size
+                and known["mtime"] == stat.st_mtime
+                and known["hash"] in self.entries
+            ):
+                current[fname] = known
+                summary["cached"] += 1
+                continue
+            digest = file_hash(path)
+            if digest not in self.entries:
+                self.entries[digest] = self._compute(path, identity)
+                summary["computed"] += 1
+            else:
+                summary["cached"] += 1
+            current[fname] = {
+                "hash": digest,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime
+            }
+
+        summary["removed"] = len(set(self.files) - set(current))
+        live_hashes = {known["hash"] for known in current.values()}
+        changed = summary["computed"] or summary["removed"] or (
+            current != self.files
+        )
+        self.files = current
+        self.entries = {
+            digest: entry for digest, entry in self.entries.items()
+            if digest in live_hashes
+        }
+        if changed:
+            self._save()
+        return summary
+
+    def _compute(self, path: str, identity: tuple) -> dict:
+        with open(path, "r") as f:
+            data = json.load(f)
+        benchmark = data.get("benchmark", identity[0])
+        backend = data.get("backend", identity[1])
+        metrics = {}
+        failed = []
+        for name, metric in RUN_METRICS.items():
+            try:
+                metrics[name] = metric(data, backend)
+            except Exception as e:
+                failed.append(f"{name} ({e!r})")
+                metrics[name] = None
+        # Latency distributions are kept whole, apart from the scalar metrics
+        try:
+            latency = latency_stats(data)
+        except Exception as e:
+            failed.append(f"latency ({e!r})")
+            latency = None
+        if failed:
+            print(
+                f"\033[93mCould not compute {', '.join(failed)} of "
+                f"{os.path.basename(path)}\033[0m"
+            )
+        return {
+            "benchmark": benchmark,
+            "backend": backend,
+            "replica": data.get("replica", identity[2]),
+            "params": data.get("params"),
+            "runtime_memory": data.get("runtime_memory"),
+            "metrics": metrics,
+            "latency": latency
+        }
+
+    def runs(
+        self,
+        benchmark: str = None,
+        backend: str = None
+    ) -> List[dict]:
+        runs = []
+        for fname, known in self.files.items():
+            entry = self.entries[known["hash"]]
+            if benchmark is not None and entry["benchmark"] != benchmark:
+                continue
+            if backend is not None and entry["backend"] != backend:
+                continue
+            runs.append({"file": fname, **entry})
+        return sorted(
+            runs,
+            key=lambda run: (run["benchmark"], run["backend"], run["replica"])
+        )
+
+    def values(
+        self,
+        benchmark: str,
+        backend: str,
+        metric: str
+    ) -> List[float]:
+        return [
+            run["metrics"][metric]
+            for run in self.runs(benchmark, backend)
+            if run["metrics"][metric] is not None
+        ]
+
+
+def load_metrics(results_dir: str = RESULTS_DIR) -> MetricsCache:
+    cache = MetricsCache(results_dir)
+    cache.update()
+    return cache
@@ -5,22 +5,51 @@ import numpy as np
 import pylab
 import json
 from gumeter.config import BENCHMARK_BACKENDS
+from gumeter.benchmarks.flops.flops import get_flops_configs
 import matplotlib.pyplot as plt
 
 
 def create_total_gflops_plot(dst):
+    _create_total_rate_plot(dst, "flops", "est_flops", replica_num=3)
+
+
+def create_total_bandwidth_plot(
+    dst,
+    replica_num: int = 0,
+    results_dir: str = "benchmark_results"
+):
+    # STREAM results share the FLOPS layout, work is counted in bytes
+    _create_total_rate_plot(
+        dst,
+        "stream",
+        "est_bytes",
+        replica_num,
+        results_dir,
+        ylabel="GB/s"
+    )
+
+
+def _create_total_rate_plot(
+    dst,
+    benchmark,
+    work_key,
+    replica_num,
+    results_dir="benchmark_results",
+    ylabel=None
+):
+    # Work (FLOPs or bytes) is plotted in billions per second
 
     all_benchmark_data = {}
-    replica_num = 3
-    results_dir = "benchmark_results"
     for b_i, backend in enumerate(BENCHMARK_BACKENDS):
         backend_name = backend.value
         if backend_name != "aws_batch":
             print(backend_name)
             log_file = os.path.join(
-                results_dir, f"flops_{backend_name}_replica{replica_num}.json"
+                results_dir, f"{benchmark}_{backend_name}_replica{replica_num}.json"
             )
-            all_benchmark_data[backend_name] = json.load(open(log_file, "r"))
+            all_benchmark_data[backend_name] = get_flops_configs(
+                json.load(open(log_file, "r"))
+            )[0]
 
     fig = pylab.figure(figsize=(4.4, 1.7))
     ax = fig.add_subplot(1, 1, 1)
@@ -32,11 +61,11 @@ def create_total_gflops_plot(dst):
         benchmark_data = all_benchmark_data[backend_name]
         tzero = benchmark_data["start_time"]
         data_df = pd.DataFrame(benchmark_data["worker_stats"])
-        data_df["est_flops"] = benchmark_data["est_flops"] / benchmark_data["workers"]
+        data_df["work"] = benchmark_data[work_key] / benchmark_data["workers"]
 
         max_time = np.max(data_df.worker_end_tstamp) - tzero
         runtime_bins = np.linspace(0, int(max_time), int(max_time), endpoint=False)
-        runtime_flops_hist = np.zeros((len(data_df), len(runtime_bins)))
+        runtime_work_hist = np.zeros((len(data_df), len(runtime_bins)))
 
         for i in range(len(data_df)):
             row = data_df.iloc[i]
@@ -44,17 +73,17 @@ def create_total_gflops_plot(dst):
             e = row.worker_func_end_tstamp - tzero
             a, b = np.searchsorted(runtime_bins, [s, e])
             if b - a > 0:
-                runtime_flops_hist[i, a:b] = row.est_flops / float(b - a)
+                runtime_work_hist[i, a:b] = row.work / float(b - a)
 
         results_by_endtime = data_df.sort_values("worker_end_tstamp")
         results_by_endtime["job_endtime_zeroed"] = data_df.worker_end_tstamp - tzero
-        results_by_endtime["flops_done"] = results_by_endtime.est_flops.cumsum()
-        results_by_endtime["rolling_flops_rate"] = (
-            results_by_endtime.flops_done / results_by_endtime.job_endtime_zeroed
+        results_by_endtime["work_done"] = results_by_endtime.work.cumsum()
+        results_by_endtime["rolling_rate"] = (
+            results_by_endtime.work_done / results_by_endtime.job_endtime_zeroed
         )
 
         ax.plot(
-            runtime_flops_hist.sum(axis=0) / 1e9,
+            runtime_work_hist.sum(axis=0) / 1e9,
             label="Peak",
             linewidth=2,
             linestyle="dotted",
@@ -63,7 +92,7 @@ def create_total_gflops_plot(dst):
         )
         ax.fill_between(
             results_by_endtime.job_endtime_zeroed,
-            results_by_endtime.rolling_flops_rate / 1e9,
+            results_by_endtime.rolling_rate / 1e9,
             alpha=0.8,
             color=colors[b_i % len(colors)],
             label="Effective",
@@ -73,7 +102,7 @@ def create_total_gflops_plot(dst):
         )
 
     ax.set_xlabel("Execution Time (s)", fontsize=10)
-    ax.set_ylabel(None)
+    ax.set_ylabel(ylabel, fontsize=10)
 
     max_time = 50
 
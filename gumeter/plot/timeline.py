@@ -130,3 +130,57 @@ def plot_worker_activity(backend_data_dict, dst, elasticity_values, show_legend=
     plt.subplots_adjust(left=0.1, right=0.99, top=0.95, bottom=0.17)
     plt.savefig(dst)
     plt.close()
+
+
+def plot_worker_phases(data, dst):
+    # One row per worker, its whole execution in grey and every phase it
+    # timed on top, relative to the start of the run
+    tzero = data["start_time"]
+    workers = []
+    for key, stage_workers in data.items():
+        if key.startswith("stage") and isinstance(stage_workers, list):
+            workers.extend(stage_workers)
+    workers.sort(key=lambda w: w["worker_start_tstamp"])
+
+    phase_names = []
+    for worker_stat in workers:
+        for phase in worker_stat.get("phases", []):
+            if phase["name"] not in phase_names:
+                phase_names.append(phase["name"])
+    if not phase_names:
+        print("No phases recorded in the results.")
+        return
+
+    cmap = plt.get_cmap("tab10")
+    colors = {name: cmap(i % 10) for i, name in enumerate(phase_names)}
+
+    fig, ax = plt.subplots(figsize=(4, 1.4 + 0.01 * len(workers)))
+    for row, worker_stat in enumerate(workers):
+        ax.broken_barh(
+            [(
+                worker_stat["worker_start_tstamp"] - tzero,
+                worker_stat["worker_end_tstamp"]
+                - worker_stat["worker_start_tstamp"]
+            )],
+            (row, 1),
+            color="#DDDDDD",
+        )
+        for phase in worker_stat.get("phases", []):
+            ax.broken_barh(
+                [(phase["start_tstamp"] - tzero, phase["duration"])],
+                (row, 1),
+                color=colors[phase["name"]],
+            )
+
+    handles = [
+        plt.Rectangle((0, 0), 1, 1, color=colors[name]) for name in phase_names
+    ]
+    ax.legend(handles, phase_names, loc="upper right", fontsize=8)
+    ax.set_xlim(left=0)
+    ax.set_ylim(0, len(workers))
+    ax.set_xlabel("Time (s)", fontsize=10)
+    ax.set_ylabel("Worker", fontsize=10)
+    ax.grid(True, axis="x", linestyle="--", alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(dst)
+    plt.close()
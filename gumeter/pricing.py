@@ -0,0 +1,204 @@
+import json
+import math
+import os
+from typing import Dict
+
+from gumeter.benchmarks.flops.flops import get_flops_configs
+from gumeter.benchmarks.iostats import storage_op_counts
+from gumeter.benchmarks.retries import failed_workers
+from gumeter.benchmarks.speculation import iter_backups
+from gumeter.config import (
+    BACKEND_MEMORY,
+    DEFAULT_MEMORY
+)
+from gumeter.store import iter_stages
+
+
+PRICING_FILE = os.path.join(os.path.dirname(__file__), "pricing.json")
+
+_pricing_cache: Dict[str, dict] = {}
+
+
+def load_pricing(path: str = None) -> dict:
+    # Rates are per GB-second of memory, per vCPU-second, per invocation and
+    # per storage request; the version tags every cost computed with them
+    path = path or PRICING_FILE
+    if path not in _pricing_cache:
+        with open(path, "r") as f:
+            pricing = json.load(f)
+        if "version" not in pricing:
+            raise ValueError(f"Pricing file '{path}' has no version.")
+        _pricing_cache[path] = pricing
+    return _pricing_cache[path]
+
+
+def pricing_version(path: str = None) -> str:
+    return load_pricing(path)["version"]
+
+
+def run_memory(data: dict, backend: str) -> int:
+    # Results saved before they carried their memory ran with the default
+    return (
+        data.get("runtime_memory")
+        or BACKEND_MEMORY.get(backend)
+        or DEFAULT_MEMORY
+    )
+
+
+def billed_duration(duration: float, increment: float) -> float:
+    if not increment:
+        return duration
+    return math.ceil(round(duration / increment, 6)) * increment
+
+
+def backend_rates(backend: str, pricing: dict = None) -> dict:
+    pricing = pricing or load_pricing()
+    if backend not in pricing["backends"]:
+        raise ValueError(
+            f"No pricing for backend '{backend}' in pricing "
+            f"{pricing['version']}."
+        )
+    return pricing["backends"][backend]
+
+
+def storage_rates(storage: str, pricing: dict = None) -> dict:
+    # Rates per request of a storage backend, by its Lithops name
+    pricing = pricing or load_pricing()
+    if storage not in pricing["storage"]:
+        raise ValueError(
+            f"No pricing for storage backend '{storage}' in pricing "
+            f"{pricing['version']}."
+        )
+    return pricing["storage"][storage]
+
+
+def worker_second_cost(
+    backend: str,
+    memory_mb: int,
+    pricing: dict = None
+) -> float:
+    # Cost of a single worker running for one second
+    rates = backend_rates(backend, pricing)
+    return (
+        rates["memory_gb_second"] * memory_mb / 1024
+        + rates["vcpu_second"] * rates["vcpus"]
+    )
+
+
+def cost_breakdown(
+    data: dict,
+    backend: str,
+    pricing: dict = None
+) -> Dict[str, float]:
+    pricing = pricing or load_pricing()
+    rates = backend_rates(backend, pricing)
+    second_cost = worker_second_cost(
+        backend,
+        run_memory(data, backend),
+        pricing
+    )
+
+    def billed(worker_stats: dict) -> float:
+        # Attempts lost without reporting their end have no billed time
+        if "worker_end_tstamp" not in worker_stats:
+            return 0.0
+        duration = (
+            worker_stats["worker_end_tstamp"]
+            - worker_stats["worker_start_tstamp"]
+        )
+        return second_cost * billed_duration(
+            duration,
+            rates["billing_increment_s"]
+        )
+
+    # Storage requests per storage backend, counting those of failed and
+    # losing attempts too: every request was billed. Results saved before
+    # requests were split per backend made them on the run's storage.
+    ops: Dict[str, Dict[str, int]] = {}
+
+    def count_ops(worker_stats: dict):
+        counts = storage_op_counts(worker_stats, rates["storage"])
+        for storage, storage_counts in counts.items():
+            totals = ops.setdefault(storage, {})
+            for op, count in storage_counts.items():
+                totals[op] = totals.get(op, 0) + count
+
+    compute = 0.0
+    workers = 0
+    for _, stats, _ in iter_stages(data):
+        for worker_stats in stats:
+            compute += billed(worker_stats)
+            workers += 1
+            count_ops(worker_stats)
+
+    # Failed attempts are billed too, their cost is work wasted
+    failed = failed_workers(data)
+    wasted = sum(billed(worker_stats) for worker_stats in failed) + (
+        len(failed) * rates["request"]
+    )
+    for worker_stats in failed:
+        count_ops(worker_stats)
+    # So are the attempts speculation launched whose result was not used;
+    # unsettled ones, which never reported their end, are charged from
+    # their submission to the end of the run
+    speculative = 0.0
+    backup_workers = 0
+    for backups in iter_backups(data):
+        attempts = len(backups["losers"]) + backups["unsettled"]
+        backup_workers += backups["backups"]
+        speculative += (
+            sum(billed(worker_stats) for worker_stats in backups["losers"])
+            + second_cost * backups["unsettled_seconds"]
+            + attempts * rates["request"]
+        )
+        for worker_stats in backups["losers"]:
+            count_ops(worker_stats)
+    requests = workers * rates["request"]
+    storage = 0.0
+    for name, counts in ops.items():
+        op_rates = storage_rates(name, pricing)
+        storage += sum(
+            count * op_rates.get(op, 0.0) for op, count in counts.items()
+        )
+    return {
+        "compute": compute,
+        "requests": requests,
+        "storage": storage,
+        "wasted": wasted,
+        "speculative": speculative,
+        "total": compute + requests + storage + wasted + speculative,
+        "workers": workers,
+        "failed_workers": len(failed),
+        "backup_workers": backup_workers,
+        "storage_ops": ops,
+        "pricing_version": pricing["version"]
+    }
+
+
+def sorted_gb(data: dict) -> float:
+    # TeraSort records the size of its input
+    data_size = data.get("data_size")
+    return data_size / 1e9 if data_size else None
+
+
+def computed_gflop(data: dict) -> float:
+    # FLOPS records the operations of every configuration it ran
+    if "configs" not in data and "est_flops" not in data:
+        return None
+    return sum(
+        config.get("est_flops", 0) for config in get_flops_configs(data)
+    ) / 1e9
+
+
+def cost_per_gb(data: dict, backend: str) -> float:
+    gb = sorted_gb(data)
+    if not gb:
+        return None
+    return cost_breakdown(data, backend)["total"] / gb
+
+
+def cost_per_gflop(data: dict, backend: str) -> float:
+    gflop = computed_gflop(data)
+    if not gflop:
+        return None
+    return cost_breakdown(data, backend)["total"] / gflop
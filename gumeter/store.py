@@ -0,0 +1,302 @@
+import glob
+import json
+import os
+import re
+import shutil
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Tuple
+)
+
+import pandas as pd
+
+from gumeter.benchmarks.flops.flops import get_flops_configs
+from gumeter.config import (
+    RESULTS_DIR,
+    Backend
+)
+from gumeter.utils import file_hash
+
+
+STORE_DIR = os.path.join(RESULTS_DIR, "store")
+INDEX_FILE = "index.json"
+PARQUET = "parquet"
+JSON = "json"
+TABLES = ["runs", "stages", "workers"]
+# Every table is sorted by these, and Parquet tables are partitioned by the
+# first two, so reading one benchmark or backend skips the rest
+INDEX_COLUMNS = ["benchmark", "backend", "replica"]
+PARTITION_COLUMNS = ["benchmark", "backend"]
+
+RESULT_FILE_PATTERN = re.compile(r"^(?P<prefix>.+)_replica(?P<replica>\d+)$")
+STAGE_KEY_PATTERN = re.compile(r"^stage(?P<stage>\d+)$")
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parse_result_name(path: str) -> Tuple[str, str, int]:
+    # Results saved before they carried their benchmark, backend and
+    # replica are identified by their {benchmark}_{backend}_replica{n} name
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = RESULT_FILE_PATTERN.match(stem)
+    if match is None:
+        return None
+    prefix = match.group("prefix")
+    # Longest first, so aws_lambda_redis is not taken for aws_lambda
+    for backend in sorted((b.value for b in Backend), key=len, reverse=True):
+        if prefix.endswith(f"_{backend}"):
+            benchmark = prefix[:-len(backend) - 1]
+            return benchmark, backend, int(match.group("replica"))
+    return None
+
+
+def iter_stages(data: dict) -> Iterator[Tuple[int, List[dict], float]]:
+    # FLOPS and STREAM results hold one map per configuration instead of
+    # stages, each configuration is stored as a stage
+    if "configs" in data or "worker_stats" in data:
+        for i, config in enumerate(get_flops_configs(data)):
+            yield (
+                i,
+                config.get("worker_stats", []),
+                config["start_time"] + config["total_time"]
+                if "total_time" in config else None
+            )
+        return
+    stages = []
+    for key, value in data.items():
+        match = STAGE_KEY_PATTERN.match(key)
+        if match and isinstance(value, list):
+            stage = int(match.group("stage"))
+            stages.append((stage, value, data.get(f"{key}_time")))
+    yield from sorted(stages, key=lambda stage: stage[0])
+
+
+def _scalar(value):
+    # Lists and dicts in worker stats are kept as JSON text
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def result_rows(
+    run_id: str,
+    data: dict,
+    identity: Tuple[str, str, int]
+) -> Dict[str, List[dict]]:
+    benchmark, backend, replica = identity
+    key = {
+        "run_id": run_id,
+        "benchmark": benchmark,
+        "backend": backend,
+        "replica": replica
+    }
+    stage_rows = []
+    worker_rows = []
+    for stage, stats, stage_time in iter_stages(data):
+        stage_rows.append({
+            **key,
+            "stage": stage,
+            "stage_time": stage_time,
+            "workers": len(stats),
+            "first_worker_start": min(
+                (w["worker_start_tstamp"] for w in stats), default=None
+            ),
+            "last_worker_end": max(
+                (w["worker_end_tstamp"] for w in stats), default=None
+            )
+        })
+        for worker, worker_stats in enumerate(stats):
+            worker_rows.append({
+                **key,
+                "stage": stage,
+                "worker": worker,
+                **{k: _scalar(v) for k, v in worker_stats.items()}
+            })
+    run_row = {
+        **key,
+        "runtime_memory": data.get("runtime_memory"),
+        "params": json.dumps(data.get("params"), sort_keys=True),
+        "start_time": data.get("start_time"),
+        "end_time": data.get("end_time"),
+        "stages": len(stage_rows),
+        "workers": len(worker_rows)
+    }
+    return {"runs": [run_row], "stages": stage_rows, "workers": worker_rows}
+
+
+class ResultsStore:
+
+    def __init__(
+        self,
+        store_dir: str = STORE_DIR,
+        fmt: str = None
+    ):
+        # Parquet when pyarrow is installed, JSON lines otherwise
+        self.store_dir = store_dir
+        self.index_path = os.path.join(store_dir, INDEX_FILE)
+        self.index = {"format": None, "runs": {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+        self.fmt = fmt or self.index["format"] or (
+            PARQUET if parquet_available() else JSON
+        )
+        if self.fmt not in (PARQUET, JSON):
+            raise ValueError(f"Unknown store format '{self.fmt}'.")
+        if self.fmt == PARQUET and not parquet_available():
+            raise ImportError(
+                "The Parquet store needs pyarrow, install gumeter[parquet]."
+            )
+
+    def _path(self, table: str) -> str:
+        if self.fmt == PARQUET:
+            return os.path.join(self.store_dir, table)
+        return os.path.join(self.store_dir, f"{table}.jsonl")
+
+    def read(
+        self,
+        table: str,
+        columns: List[str] = None,
+        benchmark: str = None,
+        backend: str = None,
+        replica: int = None
+    ) -> pd.DataFrame:
+        if table not in TABLES:
+            raise ValueError(
+                f"Unknown table '{table}'. Valid tables are: {TABLES}."
+            )
+        path = self._path(table)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=columns)
+        conditions = [
+            (name, value) for name, value in zip(
+                INDEX_COLUMNS,
+                (benchmark, backend, replica)
+            ) if value is not None
+        ]
+        if self.fmt == PARQUET:
+            df = pd.read_parquet(
+                path,
+                columns=columns,
+                filters=[(n, "==", v) for n, v in conditions] or None
+            )
+            # Partition columns come back as categoricals
+            for name in PARTITION_COLUMNS:
+                if name in df.columns:
+                    df[name] = df[name].astype(str)
+            return df.reset_index(drop=True)
+        df = pd.read_json(
+            path,
+            orient="records",
+            lines=True,
+            convert_dates=False,
+            dtype=False
+        )
+        for name, value in conditions:
+            df = df[df[name] == value]
+        if columns is not None:
+            df = df[columns]
+        return df.reset_index(drop=True)
+
+    def _write(self, table: str, df: pd.DataFrame):
+        path = self._path(table)
+        tmp_path = f"{path}.tmp"
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+        if not df.empty:
+            df = df.sort_values(INDEX_COLUMNS, kind="stable")
+        if self.fmt == PARQUET:
+            df.to_parquet(
+                tmp_path,
+                partition_cols=PARTITION_COLUMNS,
+                index=False
+            )
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+        else:
+            df.to_json(
+                tmp_path,
+                orient="records",
+                lines=True,
+                double_precision=15
+            )
+        os.replace(tmp_path, path)
+
+    def ingest(self, results_dir: str = RESULTS_DIR) -> Dict[str, int]:
+        # Only result files that are new or whose content changed are
+        # parsed; runs whose file disappeared are dropped
+        current = {}
+        for path in sorted(glob.glob(os.path.join(results_dir, "*.json"))):
+            identity = parse_result_name(path)
+            if identity is not None:
+                run_id = os.path.splitext(os.path.basename(path))[0]
+                current[run_id] = (path, identity)
+
+        indexed = self.index["runs"]
+        hashes = {
+            run_id: file_hash(path) for run_id, (path, _) in current.items()
+        }
+        changed = [
+            run_id for run_id in current
+            if indexed.get(run_id, {}).get("hash") != hashes[run_id]
+        ]
+        removed = [run_id for run_id in indexed if run_id not in current]
+        summary = {
+            "added": sum(run_id not in indexed for run_id in changed),
+            "updated": sum(run_id in indexed for run_id in changed),
+            "removed": len(removed),
+            "unchanged": len(current) - len(changed)
+        }
+        if not changed and not removed:
+            return summary
+
+        new_rows = {table: [] for table in TABLES}
+        for run_id in changed:
+            path, identity = current[run_id]
+            with open(path, "r") as f:
+                data = json.load(f)
+            identity = (
+                data.get("benchmark", identity[0]),
+                data.get("backend", identity[1]),
+                data.get("replica", identity[2])
+            )
+            for table, rows in result_rows(run_id, data, identity).items():
+                new_rows[table].extend(rows)
+            indexed[run_id] = {
+                "file": os.path.basename(path),
+                "hash": hashes[run_id],
+                "benchmark": identity[0],
+                "backend": identity[1],
+                "replica": identity[2]
+            }
+        for run_id in removed:
+            del indexed[run_id]
+
+        stale = set(changed) | set(removed)
+        os.makedirs(self.store_dir, exist_ok=True)
+        for table in TABLES:
+            df = self.read(table)
+            if not df.empty:
+                df = df[~df["run_id"].isin(stale)]
+            frames = [
+                frame for frame in (df, pd.DataFrame(new_rows[table]))
+                if not frame.empty
+            ]
+            if frames:
+                df = pd.concat(frames, ignore_index=True)
+            self._write(table, df)
+
+        self.index["format"] = self.fmt
+        tmp_index = f"{self.index_path}.tmp"
+        with open(tmp_index, "w") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_index, self.index_path)
+        return summary
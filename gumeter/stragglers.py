@@ -0,0 +1,234 @@
+from typing import (
+    Dict,
+    List
+)
+
+import numpy as np
+
+from gumeter.benchmarks.iostats import (
+    STORAGE_OPERATIONS,
+    summarize_io
+)
+from gumeter.benchmarks.phases import PHASES_KEY
+from gumeter.benchmarks.sampler import summarize_resources
+from gumeter.benchmarks.speculation import stage_backups
+from gumeter.store import iter_stages
+
+
+DEFAULT_STRAGGLER_THRESHOLD = 1.5
+# Phases moving data; every other phase, and untimed function code, counts
+# as compute
+IO_PHASES = ["read", "write"]
+COMPONENTS = ["startup", "compute", "io", "teardown"]
+
+
+def _is_io(phase: dict) -> bool:
+    return phase["name"] in IO_PHASES or phase.get("bytes", 0) > 0
+
+
+def worker_breakdown(worker_stats: dict) -> Dict[str, float]:
+    # Splits a worker's time from its submission to its end: startup up to
+    # the user function, its compute and I/O, and teardown after it
+    submit = worker_stats["host_submit_tstamp"]
+    end = worker_stats["worker_end_tstamp"]
+    func_start = worker_stats.get(
+        "worker_func_start_tstamp",
+        worker_stats["worker_start_tstamp"]
+    )
+    func_end = worker_stats.get("worker_func_end_tstamp", end)
+    io = sum(
+        phase["duration"] for phase in worker_stats.get(PHASES_KEY, [])
+        if _is_io(phase)
+    )
+    return {
+        "startup": func_start - submit,
+        "compute": func_end - func_start - io,
+        "io": io,
+        "teardown": end - func_end,
+        "total": end - submit
+    }
+
+
+def find_stragglers(
+    data: dict,
+    threshold: float = DEFAULT_STRAGGLER_THRESHOLD
+) -> List[dict]:
+    # A straggler takes over threshold times the stage median. Its excess
+    # over the median is attributed to the components where it lost time.
+    if threshold <= 1:
+        raise ValueError("The straggler threshold must be above 1.")
+    stages = []
+    for stage, stats, _ in iter_stages(data):
+        if not stats:
+            continue
+        breakdowns = [worker_breakdown(w) for w in stats]
+        medians = {
+            name: float(np.median([b[name] for b in breakdowns]))
+            for name in COMPONENTS + ["total"]
+        }
+        stragglers = []
+        for worker, breakdown in enumerate(breakdowns):
+            if breakdown["total"] <= threshold * medians["total"]:
+                continue
+            excess = {
+                name: breakdown[name] - medians[name] for name in COMPONENTS
+            }
+            stragglers.append({
+                "worker": worker,
+                "total": breakdown["total"],
+                "ratio": breakdown["total"] / medians["total"],
+                "cold_start": bool(stats[worker].get("worker_cold_start")),
+                "excess": excess,
+                "cause": max(excess, key=excess.get)
+            })
+        stages.append({
+            "stage": stage,
+            "workers": len(stats),
+            "resources": summarize_resources(stats),
+            "storage": summarize_io(stats),
+            "backups": stage_backups(data, f"stage{stage}"),
+            "median": medians,
+            "max_total": max(b["total"] for b in breakdowns),
+            "stragglers": sorted(
+                stragglers,
+                key=lambda s: s["total"],
+                reverse=True
+            )
+        })
+    return stages
+
+
+def critical_path(data: dict) -> List[dict]:
+    # Stages run one after the other, each ending when the driver has seen
+    # its last worker. The path goes through the driver between stages and,
+    # within a stage, through the worker that ended last. A stage's slack is
+    # what it would save if its last worker took the stage median.
+    segments = []
+    cursor = data["start_time"]
+    for stage, stats, stage_time in iter_stages(data):
+        if not stats:
+            continue
+        first_submit = min(w["host_submit_tstamp"] for w in stats)
+        last = max(
+            range(len(stats)),
+            key=lambda i: stats[i]["worker_end_tstamp"]
+        )
+        breakdown = worker_breakdown(stats[last])
+        stage_end = stage_time or max(
+            w.get("host_status_done_tstamp", w["worker_end_tstamp"])
+            for w in stats
+        )
+        median = float(
+            np.median([worker_breakdown(w)["total"] for w in stats])
+        )
+        segments.append({
+            "segment": "driver",
+            "stage": None,
+            "duration": first_submit - cursor
+        })
+        segments.append({
+            "segment": f"stage{stage}",
+            "stage": stage,
+            "duration": stage_end - first_submit,
+            "worker": last,
+            "submit_delay": stats[last]["host_submit_tstamp"] - first_submit,
+            **{name: breakdown[name] for name in COMPONENTS},
+            "collection": stage_end - stats[last]["worker_end_tstamp"],
+            "slack": breakdown["total"] - median
+        })
+        cursor = stage_end
+    if "end_time" in data:
+        segments.append({
+            "segment": "driver",
+            "stage": None,
+            "duration": data["end_time"] - cursor
+        })
+    total = sum(segment["duration"] for segment in segments)
+    for segment in segments:
+        segment["share"] = segment["duration"] / total if total else 0.0
+    return segments
+
+
+def _format_bytes(nbytes: float) -> str:
+    for unit in ["B", "KB", "MB"]:
+        if nbytes < 1024:
+            return f"{nbytes:.3g} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.3g} GB"
+
+
+def _format_op(op: str, summary: dict) -> str:
+    text = f"{summary['requests']} {op.upper()}"
+    if summary["bytes"]:
+        text += f" {_format_bytes(summary['bytes'])}"
+    return (
+        f"{text} (mean {summary['mean_ms']:.3g} ms, "
+        f"p95 <= {summary['p95_ms']:g} ms)"
+    )
+
+
+def format_stragglers(stages: List[dict], threshold: float) -> str:
+    lines = []
+    for stage in stages:
+        lines.append(
+            f"stage{stage['stage']}: {stage['workers']} workers, median "
+            f"{stage['median']['total']:.3g}s, slowest "
+            f"{stage['max_total']:.3g}s, {len(stage['stragglers'])} above "
+            f"{threshold:g}x the median"
+        )
+        resources = stage["resources"]
+        if resources is not None:
+            lines.append(
+                f"    resources: CPU {resources['cpu_percent']:.0f}%, peak "
+                f"RSS {resources['peak_rss_mb']:.0f} MiB, network "
+                f"{resources['net_recv_mib_s']:.3g} MiB/s in, "
+                f"{resources['net_sent_mib_s']:.3g} MiB/s out (sampling "
+                f"overhead {resources['overhead_fraction']:.2%})"
+            )
+        storage = stage["storage"]
+        if storage is not None:
+            for backend, summary in storage["backends"].items():
+                ops = ", ".join(
+                    _format_op(op, summary[op]) for op in STORAGE_OPERATIONS
+                    if summary[op]["requests"]
+                )
+                lines.append(f"    storage ({backend}): {ops}")
+        backups = stage["backups"]
+        if backups is not None:
+            lines.append(
+                f"    backups: {backups['backups']} launched past the "
+                f"p{backups['percentile']:g}, {backups['backup_wins']} won, "
+                f"{backups['abandoned']} abandoned"
+            )
+        for straggler in stage["stragglers"]:
+            excess = ", ".join(
+                f"{name} {value:+.3g}s"
+                for name, value in straggler["excess"].items()
+            )
+            cold = " (cold start)" if straggler["cold_start"] else ""
+            lines.append(
+                f"    worker {straggler['worker']}: "
+                f"{straggler['total']:.3g}s, {straggler['ratio']:.2f}x"
+                f"{cold}, mostly {straggler['cause']} [{excess}]"
+            )
+    return "\n".join(lines)
+
+
+def format_critical_path(segments: List[dict]) -> str:
+    lines = []
+    for segment in segments:
+        line = (
+            f"{segment['segment']:>8}: {segment['duration']:8.3f}s "
+            f"({segment['share']:.1%})"
+        )
+        if segment["stage"] is not None:
+            parts = ", ".join(
+                f"{name} {segment[name]:.3g}s"
+                for name in ["submit_delay"] + COMPONENTS + ["collection"]
+            )
+            line += (
+                f" via worker {segment['worker']} [{parts}], "
+                f"slack {segment['slack']:.3g}s"
+            )
+        lines.append(line)
+    return "\n".join(lines)
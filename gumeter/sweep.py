@@ -0,0 +1,182 @@
+import glob
+import json
+import os
+from typing import (
+    Any,
+    Dict,
+    List,
+    Tuple
+)
+
+import pandas as pd
+
+from gumeter.benchmarks.registry import get_benchmark
+from gumeter.metrics import get_execution_time
+
+
+STRONG = "strong"
+WEAK = "weak"
+SCALING_MODES = [STRONG, WEAK]
+
+
+def grid(spec) -> list:
+    # A single value, an explicit list or a geometric progression given as
+    # {start, stop, factor}, stop included when reached
+    if spec is None:
+        return [None]
+    if isinstance(spec, dict):
+        start, stop = spec["start"], spec["stop"]
+        factor = spec.get("factor", 2)
+        if start <= 0 or factor <= 1:
+            raise ValueError(
+                "Geometric grids need a positive start and a factor above 1."
+            )
+        values = []
+        value = start
+        while value <= stop:
+            values.append(value)
+            value *= factor
+        return values
+    return spec if isinstance(spec, list) else [spec]
+
+
+def parse_grid(text: str) -> list:
+    # Command line form of a grid: "1,2,4" or "start:stop:factor"
+    if text is None:
+        return None
+    if ":" in text:
+        start, stop, factor = (float(v) for v in text.split(":"))
+        values = grid({"start": start, "stop": stop, "factor": factor})
+    else:
+        values = [float(v) for v in text.split(",")]
+    return [int(v) if v.is_integer() else v for v in values]
+
+
+def sweep_points(
+    benchmark_name: str,
+    sweep: dict
+) -> List[Dict[str, Any]]:
+    # In strong scaling `size` is the total problem size, in weak scaling the
+    # size per worker, in the benchmark's size_unit
+    mode = sweep.get("mode", STRONG)
+    if mode not in SCALING_MODES:
+        raise ValueError(
+            f"Unknown scaling mode '{mode}'. Valid modes are: "
+            f"{SCALING_MODES}."
+        )
+    benchmark = get_benchmark(benchmark_name)()
+    points = []
+    for size in grid(sweep.get("size")):
+        for workers in grid(sweep.get("workers")):
+            if workers is None:
+                raise ValueError("A sweep needs a grid of workers.")
+            total = size
+            if size is not None and mode == WEAK:
+                total = size * workers
+            points.append(benchmark.scaling_params(int(workers), total))
+    return points
+
+
+def load_results(results_dir: str) -> List[dict]:
+    results = []
+    for path in sorted(glob.glob(os.path.join(results_dir, "*.json"))):
+        with open(path, "r") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                continue
+        # Only results saved with their benchmark parameters can be placed
+        if isinstance(data, dict) and "params" in data:
+            results.append(data)
+    return results
+
+
+def _scaling_rows(results: List[dict]) -> pd.DataFrame:
+    rows = []
+    for data in results:
+        benchmark = get_benchmark(data["benchmark"])()
+        params = data["params"]
+        workers = benchmark.workers(params)
+        if workers is None:
+            continue
+        size = benchmark.problem_size(params)
+        fixed = {
+            name: value for name, value in params.items()
+            if name not in (benchmark.workers_param, benchmark.size_param)
+        }
+        rows.append({
+            "benchmark": data["benchmark"],
+            "backend": data["backend"],
+            "runtime_memory": data.get("runtime_memory"),
+            "params": json.dumps(fixed, sort_keys=True),
+            "size": size,
+            "size_per_worker": size / workers if size is not None else None,
+            "workers": workers,
+            "time": get_execution_time(data)
+        })
+    return pd.DataFrame(rows)
+
+
+def scaling_table(
+    results: List[dict],
+    mode: str = STRONG
+) -> pd.DataFrame:
+    # Strong scaling keeps the total size, weak scaling the size per worker.
+    # Each series is relative to its smallest worker count p0:
+    #   strong: speedup = T(p0) / T(p), efficiency = speedup * p0 / p
+    #   weak:   efficiency = T(p0) / T(p), speedup = efficiency * p / p0
+    if mode not in SCALING_MODES:
+        raise ValueError(
+            f"Unknown scaling mode '{mode}'. Valid modes are: "
+            f"{SCALING_MODES}."
+        )
+    rows = _scaling_rows(results)
+    if rows.empty:
+        return rows
+    series_keys = [
+        "benchmark",
+        "backend",
+        "runtime_memory",
+        "params",
+        "size" if mode == STRONG else "size_per_worker"
+    ]
+    table = (
+        rows.groupby(series_keys + ["workers"], dropna=False)["time"]
+        .agg(replicas="count", time="mean", time_std="std")
+        .reset_index()
+        .sort_values(series_keys + ["workers"])
+    )
+    # A single worker count is no scaling series
+    series = table.groupby(series_keys, dropna=False)
+    table = table[series["workers"].transform("nunique") > 1].copy()
+    series = table.groupby(series_keys, dropna=False)
+    base_time = series["time"].transform("first")
+    base_workers = series["workers"].transform("first")
+    ratio = base_time / table["time"]
+    if mode == STRONG:
+        table["speedup"] = ratio
+        table["efficiency"] = ratio * base_workers / table["workers"]
+    else:
+        table["efficiency"] = ratio
+        table["speedup"] = ratio * table["workers"] / base_workers
+    return table.reset_index(drop=True)
+
+
+def format_table(table: pd.DataFrame) -> str:
+    if table.empty:
+        return "No results with a worker count to scale."
+    return table.to_string(
+        index=False,
+        float_format=lambda value: f"{value:.4g}"
+    )
+
+
+def run_sweep_tables(
+    result_files: List[str],
+    modes: Tuple[str, ...] = (STRONG, WEAK)
+) -> Dict[str, pd.DataFrame]:
+    results = []
+    for path in result_files:
+        with open(path, "r") as f:
+            results.append(json.load(f))
+    return {mode: scaling_table(results, mode) for mode in modes}
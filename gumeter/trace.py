@@ -0,0 +1,152 @@
+import gzip
+import json
+from typing import (
+    Iterator,
+    TextIO
+)
+
+from gumeter.benchmarks.phases import PHASES_KEY
+from gumeter.store import iter_stages
+
+
+DRIVER_PID = 0
+# Driver instant marking the end of a stage, named after its results key
+STAGE_END_EVENT = "stage{}_time"
+
+
+def _us(tstamp: float, tzero: float) -> float:
+    # Trace timestamps are microseconds, from the start of the run
+    return round((tstamp - tzero) * 1e6, 3)
+
+
+def _span(name, cat, start, end, tzero, pid, tid, args=None) -> dict:
+    event = {
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "ts": _us(start, tzero),
+        "dur": max(round((end - start) * 1e6, 3), 0),
+        "pid": pid,
+        "tid": tid
+    }
+    if args:
+        event["args"] = args
+    return event
+
+
+def _metadata(kind: str, name: str, pid: int, tid: int = 0) -> dict:
+    return {
+        "name": kind,
+        "ph": "M",
+        "pid": pid,
+        "tid": tid,
+        "args": {"name": name}
+    }
+
+
+def _worker_events(
+    worker_stats: dict,
+    tzero: float,
+    pid: int,
+    tid: int
+) -> Iterator[dict]:
+    # Spans on a worker's track nest by time: invocation, then the worker
+    # process holding its setup, the function and its phases, then the
+    # driver collecting the result
+    submit = worker_stats["host_submit_tstamp"]
+    start = worker_stats["worker_start_tstamp"]
+    end = worker_stats["worker_end_tstamp"]
+    func_start = worker_stats.get("worker_func_start_tstamp", start)
+    func_end = worker_stats.get("worker_func_end_tstamp", end)
+    cold = bool(worker_stats.get("worker_cold_start"))
+
+    yield _span(
+        "cold start" if cold else "queued",
+        "invocation", submit, start, tzero, pid, tid
+    )
+    yield _span(
+        "worker", "worker", start, end, tzero, pid, tid,
+        {"cold_start": cold}
+    )
+    yield _span("setup", "worker", start, func_start, tzero, pid, tid)
+    yield _span("function", "worker", func_start, func_end, tzero, pid, tid)
+    for phase in worker_stats.get(PHASES_KEY, []):
+        yield _span(
+            phase["name"], "phase",
+            phase["start_tstamp"], phase["end_tstamp"],
+            tzero, pid, tid,
+            {"bytes": phase["bytes"]}
+        )
+    if "host_status_done_tstamp" in worker_stats:
+        yield _span(
+            "collection", "driver",
+            end, worker_stats["host_status_done_tstamp"],
+            tzero, pid, tid
+        )
+
+
+def trace_events(data: dict) -> Iterator[dict]:
+    # The driver is a process of its own; every stage is a process with a
+    # track (thread) per worker
+    stages = list(iter_stages(data))
+    tzero = data.get("start_time") or min(
+        w["host_submit_tstamp"] for _, stats, _ in stages for w in stats
+    )
+    yield _metadata("process_name", "driver", DRIVER_PID)
+    yield _metadata("thread_name", "driver", DRIVER_PID)
+    if "end_time" in data:
+        yield _span(
+            data.get("benchmark", "run"), "driver",
+            tzero, data["end_time"], tzero, DRIVER_PID, 0,
+            {"backend": data.get("backend"), "params": data.get("params")}
+        )
+
+    for stage, stats, stage_time in stages:
+        pid = stage + 1
+        yield _metadata("process_name", f"stage{stage}", pid)
+        if stats:
+            first_submit = min(w["host_submit_tstamp"] for w in stats)
+            stage_end = stage_time or max(
+                w["worker_end_tstamp"] for w in stats
+            )
+            yield _span(
+                f"stage{stage}", "driver",
+                first_submit, stage_end, tzero, DRIVER_PID, 0,
+                {"workers": len(stats)}
+            )
+        if stage_time is not None:
+            yield {
+                "name": STAGE_END_EVENT.format(stage),
+                "cat": "driver",
+                "ph": "i",
+                "s": "g",
+                "ts": _us(stage_time, tzero),
+                "pid": DRIVER_PID,
+                "tid": 0
+            }
+        for worker, worker_stats in enumerate(stats):
+            yield _metadata("thread_name", f"worker {worker}", pid, worker)
+            yield from _worker_events(worker_stats, tzero, pid, worker)
+
+
+def write_trace(data: dict, out: TextIO) -> int:
+    # Events are written as they are produced, so the trace of a large run
+    # is never held in memory
+    out.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+    count = 0
+    for event in trace_events(data):
+        if count:
+            out.write(",\n")
+        out.write(json.dumps(event, separators=(",", ":")))
+        count += 1
+    out.write("\n]}\n")
+    return count
+
+
+def export_trace(result_file: str, trace_file: str) -> int:
+    # Perfetto and chrome://tracing also open gzipped traces
+    with open(result_file, "r") as f:
+        data = json.load(f)
+    opener = gzip.open if trace_file.endswith(".gz") else open
+    with opener(trace_file, "wt") as out:
+        return write_trace(data, out)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 import subprocess
 import sys
@@ -17,6 +19,8 @@ def remove_objects(
         bucket,
         prefix=prefix
     )
+    if not objects:
+        return
     storage.delete_objects(
         bucket,
         [obj['Key'] for obj in objects]
@@ -27,26 +31,31 @@ def remove_objects(
     )
 
 
-def get_fname_w_replica_num(
-        fname: str
+def parse_params(
+        items: list
+) -> dict:
+    params = {}
+    for item in items or []:
+        if "=" not in item:
+            raise ValueError(
+                f"Invalid parameter '{item}', expected KEY=VALUE."
+            )
+        key, value = item.split("=", 1)
+        try:
+            params[key] = json.loads(value)
+        except json.JSONDecodeError:
+            params[key] = value
+    return params
+
+
+def file_hash(
+        path: str
 ) -> str:
-    if not fname.endswith(".json"):
-        raise ValueError("Filename must end with .json")
-
-    base = os.path.splitext(fname)[0]
-    directory = os.path.dirname(fname)
-    if directory == "":
-        directory = "."
-    prefix = os.path.basename(base)
-
-    files = [
-        f for f in os.listdir(directory)
-        if f.startswith(prefix) and f.endswith(".json")
-    ]
-
-    replica_num = len(files)
-    new_fname = f"{base}_replica{replica_num}.json"
-    return new_fname
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
 
 
 def _run_command(command: list, cwd: str = None, out=True):
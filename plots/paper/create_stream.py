@@ -0,0 +1,5 @@
+from gumeter.plot.flops import create_total_bandwidth_plot
+
+if __name__ == "__main__":
+
+    create_total_bandwidth_plot("plots/paper/stream_one.pdf")
@@ -2,13 +2,17 @@ import json
 import os
 
 from gumeter.config import BACKEND_STRING, BENCHMARK_BACKENDS
-from gumeter.plot.timeline import plot_worker_activity
-from gumeter.metrics import measure_elasticity
+from gumeter.plot.timeline import (
+    plot_worker_activity,
+    plot_worker_phases
+)
+from gumeter.metrics_cache import load_metrics
 
 if __name__ == "__main__":
 
     replica_num = 3
     results_dir = "benchmark_results"
+    metrics = load_metrics(results_dir)
 
     benchmarks = ["montecarlo_stock", "montecarlo_pi", "terasort", "mandelbrot"]
 
@@ -25,20 +29,14 @@ if __name__ == "__main__":
                 benchmark_data = json.load(open(log_file, "r"))
                 backend_str = BACKEND_STRING[backend_name]
                 backend_dict[backend_str] = benchmark_data
+                plot_worker_phases(
+                    benchmark_data,
+                    f"plots/paper/worker_phases_{benchmark}_{backend_name}.pdf"
+                )
 
-                elasticity_metrics[benchmark][backend_name] = []
-                results_dir = "benchmark_results"
-                matching_files = [
-                    f
-                    for f in os.listdir(results_dir)
-                    if f.startswith(f"{benchmark}_{backend_name}")
-                ]
-                for file_name in matching_files:
-                    log_file = os.path.join(results_dir, file_name)
-                    if os.path.isfile(log_file):
-                        backend_data = json.load(open(log_file, "r"))
-                        elasticity = measure_elasticity(backend_data)
-                        elasticity_metrics[benchmark][backend_name].append(elasticity)
+                elasticity_metrics[benchmark][backend_name] = metrics.values(
+                    benchmark, backend_name, "elasticity"
+                )
 
         dst = f"plots/paper/worker_activity_{benchmark}.pdf"
         plot_worker_activity(
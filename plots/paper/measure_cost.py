@@ -1,8 +1,5 @@
-import os
-import json
-
 from gumeter.config import BENCHMARK_BACKENDS
-from gumeter.metrics import get_cost
+from gumeter.metrics_cache import load_metrics
 import numpy as np
 
 
@@ -10,25 +7,16 @@ if __name__ == "__main__":
 
     benchmarks = ["montecarlo_stock", "montecarlo_pi", "terasort", "mandelbrot"]
     elasticity_metrics = {}
+    metrics = load_metrics("benchmark_results")
 
     for bch_i, benchmark in enumerate(benchmarks):
         elasticity_metrics[benchmark] = {}
         for b_i, backend in enumerate(BENCHMARK_BACKENDS):
             backend_name = backend.value
             if backend_name != "aws_batch":
-                elasticity_metrics[benchmark][backend_name] = []
-                results_dir = "benchmark_results"
-                matching_files = [
-                    f
-                    for f in os.listdir(results_dir)
-                    if f.startswith(f"{benchmark}_{backend_name}")
-                ]
-                for file_name in matching_files:
-                    log_file = os.path.join(results_dir, file_name)
-                    if os.path.isfile(log_file):
-                        backend_data = json.load(open(log_file, "r"))
-                        elasticity = get_cost(backend_data, backend_name)
-                        elasticity_metrics[benchmark][backend_name].append(elasticity)
+                elasticity_metrics[benchmark][backend_name] = metrics.values(
+                    benchmark, backend_name, "cost"
+                )
 
     import matplotlib.pyplot as plt
 
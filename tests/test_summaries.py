@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from gumeter.benchmarks.montecarlo_stock.montecarlo_stock import StockData
+from gumeter.benchmarks.montecarlo_stock.summaries import (
+    FixedHistogram,
+    KLLSketch,
+    Moments,
+    ValueSummary
+)
+
+
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+# Rank error allowed to a KLL sketch with the default k
+MAX_RANK_ERROR = 0.02
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).lognormal(size=100_000)
+
+
+def _moments(chunk):
+    moments = Moments()
+    moments.update(chunk)
+    return moments
+
+
+def _sketch(chunk):
+    sketch = KLLSketch()
+    sketch.update(chunk)
+    return sketch
+
+
+def _rank_errors(sketch, values):
+    return [
+        abs(np.mean(values <= estimate) - q)
+        for q, estimate in zip(QUANTILES, sketch.quantiles(QUANTILES))
+    ]
+
+
+def test_moments_merge_matches_numpy(values):
+    moments = Moments()
+    for chunk in np.array_split(values, 7):
+        moments.merge(_moments(chunk))
+    assert moments.count == len(values)
+    assert moments.mean == pytest.approx(np.mean(values))
+    assert moments.std == pytest.approx(np.std(values))
+    assert moments.min == np.min(values)
+    assert moments.max == np.max(values)
+
+
+def test_moments_merge_is_associative(values):
+    a, b, c = np.array_split(values, 3)
+    left = _moments(a)
+    left.merge(_moments(b))
+    left.merge(_moments(c))
+    right = _moments(b)
+    right.merge(_moments(c))
+    grouped = _moments(a)
+    grouped.merge(right)
+    assert grouped.count == left.count
+    assert grouped.mean == pytest.approx(left.mean)
+    assert grouped.m2 == pytest.approx(left.m2)
+
+
+def test_histogram_merge_matches_single_update(values):
+    whole = FixedHistogram(0.5, 5.0)
+    whole.update(values)
+    merged = FixedHistogram(0.5, 5.0)
+    for chunk in np.array_split(values, 5):
+        part = FixedHistogram(0.5, 5.0)
+        part.update(chunk)
+        merged.merge(part)
+    assert np.array_equal(merged.counts, whole.counts)
+    assert merged.underflow == whole.underflow == np.sum(values < 0.5)
+    assert merged.overflow == whole.overflow == np.sum(values > 5.0)
+    assert (
+        merged.counts.sum() + merged.underflow + merged.overflow
+        == len(values)
+    )
+
+
+def test_histogram_merge_rejects_other_bins():
+    with pytest.raises(ValueError):
+        FixedHistogram(0.0, 1.0).merge(FixedHistogram(0.0, 2.0))
+
+
+def test_kll_quantiles_within_rank_error(values):
+    sketch = KLLSketch()
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+    assert max(_rank_errors(sketch, values)) < MAX_RANK_ERROR
+
+
+def test_kll_merge_within_rank_error(values):
+    # A two-level tree, as the tree reduction builds it
+    chunks = [_sketch(chunk) for chunk in np.array_split(values, 8)]
+    level = []
+    for i in range(0, len(chunks), 2):
+        chunks[i].merge(chunks[i + 1])
+        level.append(chunks[i])
+    merged = level[0]
+    for sketch in level[1:]:
+        merged.merge(sketch)
+    assert max(_rank_errors(merged, values)) < MAX_RANK_ERROR
+
+
+def test_kll_is_reproducible(values):
+    first, second = KLLSketch(), KLLSketch()
+    for sketch in (first, second):
+        for chunk in np.array_split(values, 10):
+            sketch.merge(_sketch(chunk))
+    assert len(first.compactors) == len(second.compactors)
+    for a, b in zip(first.compactors, second.compactors):
+        assert np.array_equal(a, b)
+
+
+def test_summary_merge_counts_every_value(values):
+    merged = ValueSummary(0.5, 5.0)
+    for chunk in np.array_split(values, 4):
+        part = ValueSummary(0.5, 5.0)
+        part.update(chunk)
+        merged.merge(part)
+    summary = merged.to_dict()
+    assert summary["count"] == len(values)
+    assert summary["quantiles"]["0.5"] == pytest.approx(
+        np.quantile(values, 0.5),
+        rel=0.05
+    )
+
+
+def test_forecast_summaries_reproducible_from_seed():
+    # More forecasts than k, so the sketches compact
+    stock = StockData("test", -0.000225, 0.0122, 159.44)
+    first = stock.forecast_summaries(5000, [123, 4])
+    second = stock.forecast_summaries(5000, [123, 4])
+    other = stock.forecast_summaries(5000, [123, 5])
+    for a, b in zip(first, second):
+        assert a.to_dict() == b.to_dict()
+    assert first[1].to_dict() != other[1].to_dict()